@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+FreeRADIUS accounting session replayer
+
+Scales accounting_test.py's single Start / Interim-Update / Stop sequence
+up to tens of thousands of concurrent sessions.  New sessions arrive at
+--rate per second; each has its own Acct-Session-Id, an exponentially
+distributed length, Interim-Updates every --interim seconds (+-10%) and
+octet counters growing at a per-session rate.  Sessions are spread over a
+process pool, one asyncio loop per worker; a worker opens another UDP
+socket (source port) whenever all 256 RADIUS identifiers of its sockets
+are in flight, up to --max-sockets.
+
+--reboot-burst N replays the aftermath of a NAS reboot: an Accounting-On
+followed by N sessions starting at the same moment.
+
+Accounting-Response latency and loss (requests never answered, even after
+--retries) are reported per packet type.  Latency counts from the moment
+a request is ready to go, so time queued for a free identifier is in it;
+that queueing is also reported on its own.
+
+    python accounting_replay.py --mock --rate 200 --duration 60 --interim 10
+    python accounting_replay.py --server 10.0.0.5 --reboot-burst 20000 --workers 8
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from radius_load import (
+    ERROR, TIMEOUT, LatencyHistogram, LoadStats, SocketPool, start_mock_responder,
+)
+from radius_packets import AccountingRequestTemplate
+
+OCTET_WRAP = 1 << 32
+
+
+class SessionReplayer:
+    """Replays every `workers`-th session of the schedule from one process."""
+
+    def __init__(self, args, worker_id):
+        self.args = args
+        self.worker_id = worker_id
+        self.secret = args.secret.encode()
+        self.template = AccountingRequestTemplate(self.secret, args.dictionary)
+        self.rng = random.Random(args.seed * 1000 + worker_id)
+        self.stats = LoadStats()
+        self.lag = LatencyHistogram()
+        self.sessions_started = 0
+        self.active = 0
+        self.peak_active = 0
+        self.sock = None
+        self.epoch = None
+
+    def build_request(self, ident, status, fields):
+        return self.template.encode(ident, status, **fields)[0]
+
+    async def send(self, status, fields, scheduled):
+        """Send one Accounting-Request, retrying unanswered ones.
+
+        fields are AccountingRequestTemplate.encode() keyword arguments.
+        """
+        self.lag.record(max(time.perf_counter() - scheduled, 0.0))
+        fields = dict(fields)
+        for attempt in range(self.args.retries + 1):
+            if attempt:
+                fields["delay_time"] = int(attempt * self.args.timeout)
+            outcome, seconds = await self.sock.exchange(
+                lambda ident: self.build_request(ident, status, fields), self.args.timeout
+            )
+            if outcome not in (TIMEOUT, ERROR):
+                break
+        self.stats.record(f"{status} {outcome}", seconds)
+
+    async def session(self, index, start):
+        args = self.args
+        rng = self.rng
+        length = rng.expovariate(1 / args.mean_session)
+        input_rate = rng.lognormvariate(10, 1.5)  # bytes/s, median ~22 kB/s
+        output_rate = input_rate * rng.uniform(0.1, 0.5)
+        base = {
+            "username": f"{args.user_prefix}{index % args.users}",
+            "session_id": f"{self.worker_id:02x}{index:08x}",
+            # Fixed for the whole session, so encoded once
+            "session_attributes": self.template.encode_attributes({
+                "NAS-IP-Address": f"192.168.{index % 4}.1",
+                "NAS-Port": index % 65536,
+            }),
+        }
+
+        def counters(elapsed):
+            return {
+                "session_time": int(elapsed),
+                "input_octets": int(input_rate * elapsed) % OCTET_WRAP,
+                "output_octets": int(output_rate * elapsed) % OCTET_WRAP,
+            }
+
+        self.sessions_started += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await self.send("Start", base, start)
+            elapsed = 0.0
+            while True:
+                interval = args.interim * rng.uniform(0.9, 1.1)
+                if elapsed + interval >= length:
+                    break
+                elapsed += interval
+                await self._sleep_until(start + elapsed)
+                await self.send("Interim-Update", dict(base, **counters(elapsed)), start + elapsed)
+            await self._sleep_until(start + length)
+            stop = dict(base, **counters(length))
+            stop["terminate_cause"] = "User-Request"
+            await self.send("Stop", stop, start + length)
+        finally:
+            self.active -= 1
+
+    @staticmethod
+    async def _sleep_until(when):
+        await asyncio.sleep(max(0.0, when - time.perf_counter()))
+
+    def schedule(self):
+        """Yield (session index, start offset in seconds) for this worker's sessions."""
+        args = self.args
+        workers = args.workers
+        for index in range(self.worker_id, args.reboot_burst, workers):
+            yield index, 0.0
+        arrivals = int(args.rate * args.duration)
+        for n in range(self.worker_id, arrivals, workers):
+            yield args.reboot_burst + n, n / args.rate
+
+    async def run(self, port, epoch):
+        self.sock = SocketPool(self.args.server, port, self.secret, self.args.max_sockets)
+        # Align all workers on the same wall-clock start
+        start = time.perf_counter() + max(0.0, epoch - time.time())
+        deadline = start + self.args.duration
+        tasks = set()
+        try:
+            if self.args.reboot_burst and self.worker_id == 0:
+                await self._sleep_until(start)
+                nas = self.template.encode_attributes({"NAS-IP-Address": "192.168.0.1"})
+                await self.send("Accounting-On", {"session_id": "0", "username": None,
+                                                  "session_attributes": nas}, start)
+            for index, offset in self.schedule():
+                await self._sleep_until(start + offset)
+                task = asyncio.ensure_future(self.session(index, start + offset))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await self._sleep_until(deadline)
+        finally:
+            # Sessions still open when the run ends are abandoned, not stopped,
+            # so the end of the run doesn't add an artificial Stop burst
+            open_sessions = len(tasks)
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.sock.close()
+        self.stats.started, self.stats.finished = start, deadline
+        return {
+            'stats': self.stats,
+            'lag': self.lag,
+            'id_wait': self.sock.id_wait,
+            'sockets': len(self.sock.sockets),
+            'sessions': self.sessions_started,
+            'peak_active': self.peak_active,
+            'open_at_end': open_sessions,
+        }
+
+
+def _run_worker(args, worker_id, port, epoch):
+    return asyncio.run(SessionReplayer(args, worker_id).run(port, epoch))
+
+
+def _serve_mock(args, port_queue):
+    async def serve():
+        _, _, port = await start_mock_responder(
+            args.server, 0, secret=args.secret.encode(), dictionary=args.dictionary
+        )
+        port_queue.put(port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def replay(args):
+    """Run the replay across args.workers processes and return the merged results."""
+    mock = None
+    port = args.port
+    if args.mock:
+        port_queue = multiprocessing.Queue()
+        mock = multiprocessing.Process(target=_serve_mock, args=(args, port_queue), daemon=True)
+        mock.start()
+        port = port_queue.get(timeout=10)
+        print(f"Mock RADIUS responder listening on {args.server}:{port}")
+
+    epoch = time.time() + 1.0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(_run_worker, args, worker_id, port, epoch)
+                       for worker_id in range(args.workers)]
+            results = [future.result() for future in futures]
+    finally:
+        if mock:
+            mock.terminate()
+
+    merged = {'stats': LoadStats(), 'lag': LatencyHistogram(), 'id_wait': LatencyHistogram(),
+              'sockets': 0, 'sessions': 0, 'peak_active': 0, 'open_at_end': 0}
+    for result in results:
+        merged['stats'].merge(result['stats'])
+        merged['lag'].merge(result['lag'])
+        merged['id_wait'].merge(result['id_wait'])
+        for key in ('sockets', 'sessions', 'peak_active', 'open_at_end'):
+            merged[key] += result[key]
+    return merged
+
+
+def print_replay_report(result):
+    stats = result['stats']
+    stats.print_report("ACCOUNTING REPLAY")
+    sent = sum(stats.counts.values())
+    lost = sum(count for outcome, count in stats.counts.items()
+               if outcome.endswith(TIMEOUT) or outcome.endswith(ERROR))
+    print()
+    print(f"Sessions started: {result['sessions']}  "
+          f"peak concurrent: ~{result['peak_active']}  still open at end: {result['open_at_end']}")
+    print(f"Loss: {lost}/{sent} requests ({lost / sent * 100 if sent else 0:.2f}%)")
+    print(f"Send lag behind schedule: p50 {result['lag'].percentile(50) * 1000:.2f} ms, "
+          f"p99 {result['lag'].percentile(99) * 1000:.2f} ms")
+    print(f"Wait for a free identifier: p50 {result['id_wait'].percentile(50) * 1000:.2f} ms, "
+          f"p99 {result['id_wait'].percentile(99) * 1000:.2f} ms, "
+          f"max {result['id_wait'].percentile(100) * 1000:.2f} ms over {result['sockets']} socket(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FreeRADIUS accounting session replayer')
+    parser.add_argument('--server', default='127.0.0.1', help='RADIUS server address')
+    parser.add_argument('--port', type=int, default=1813, help='Accounting port (default: 1813)')
+    parser.add_argument('--secret', default='testing123', help='Shared secret')
+    parser.add_argument('--dictionary', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionary'),
+                       help='RADIUS dictionary file')
+    parser.add_argument('--rate', type=float, default=50, help='New sessions per second (default: 50)')
+    parser.add_argument('--duration', type=float, default=60, help='Length of the run in seconds (default: 60)')
+    parser.add_argument('--mean-session', type=float, default=600,
+                       help='Mean session length in seconds (default: 600)')
+    parser.add_argument('--interim', type=float, default=60,
+                       help='Interim-Update interval in seconds (default: 60)')
+    parser.add_argument('--reboot-burst', type=int, default=0,
+                       help='Sessions starting at once after a simulated NAS reboot')
+    parser.add_argument('--users', type=int, default=10000, help='Distinct user names (default: 10000)')
+    parser.add_argument('--user-prefix', default='user', help='User name prefix (default: user)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-sockets', type=int, default=64,
+                       help='UDP sockets per worker, 256 requests in flight each (default: 64)')
+    parser.add_argument('--timeout', type=float, default=3.0, help='Reply timeout in seconds (default: 3)')
+    parser.add_argument('--retries', type=int, default=0, help='Retransmissions per request (default: 0)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--mock', action='store_true', help='Replay against a local mock responder')
+    args = parser.parse_args()
+
+    print(f"Replaying ~{int(args.rate * args.duration) + args.reboot_burst} sessions over "
+          f"{args.duration:g}s on {args.workers} workers...")
+    print_replay_report(replay(args))
+
+
+if __name__ == "__main__":
+    main()
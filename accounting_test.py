@@ -4,11 +4,12 @@ Simple FreeRADIUS Accounting Test for bob
 """
 
 from pyrad.client import Client
-from pyrad.dictionary import Dictionary
 import pyrad.packet
 import time
 import uuid
 
+from radius_packets import load_dictionary
+
 def main():
     # Setup
     username = "bob"
@@ -16,13 +17,14 @@ def main():
     session_id = str(uuid.uuid4())[:8]
     
     print("FreeRADIUS initialized")
+    dictionary = load_dictionary("dictionary")
     
     # Connect to RADIUS for authentication
     auth_client = Client(
         server="127.0.0.1",
         authport=1812,
         secret=b"testing123",
-        dict=Dictionary("dictionary")
+        dict=dictionary
     )
     
     # Connect to RADIUS for accounting
@@ -30,7 +32,7 @@ def main():
         server="127.0.0.1",
         acctport=1813,
         secret=b"testing123",
-        dict=Dictionary("dictionary")
+        dict=dictionary
     )
     
     # Authenticate user
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Aggregates of an auth event frame, computed once for every report
+
+aggregate_auth_events() reduces a frame to everything print_summary, the
+JSON summary and the three figures need: totals, per-user success and
+failure counts, attempts per hour, the day-of-week x hour-of-day matrix
+and the binned timeline.  It runs two bincounts over the events (per
+user x result, per hour) and one more over the events of the timeline's
+users; the hour-of-day and day x hour counts are folded from the hourly
+series rather than from the events.  The frame is not modified.
+
+The result is an immutable AuthAggregates; its frames and series are
+shared by all the consumers and must be treated as read-only.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+TIMELINE_BINS = 400
+TIMELINE_USERS = 20
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class AuthAggregates(namedtuple('AuthAggregates', [
+        'total', 'successful', 'failed', 'start', 'end',
+        'user_counts', 'hourly', 'hour_of_day', 'day_hour',
+        'timeline', 'timeline_users', 'bin_seconds'])):
+    """Report aggregates of a non-empty auth event frame.
+
+    user_counts has one row per user seen, with 'success', 'failed' and
+    'total' columns, most active users first.  timeline holds (timestamp,
+    username, success, count) rows, one per time bin of bin_seconds and
+    user of timeline_users.
+    """
+    __slots__ = ()
+
+    @property
+    def success_rate(self):
+        return self.successful / self.total
+
+    @property
+    def unique_users(self):
+        return len(self.user_counts)
+
+    @property
+    def results(self):
+        """Attempts per auth_result, as value_counts() would list them."""
+        counts = pd.Series({'Success': self.successful, 'Failed': self.failed}, name='count')
+        counts.index.name = 'auth_result'
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def top_users(self, n=5):
+        return self.user_counts['total'].head(n).rename('count')
+
+    def top_failed_users(self, n=5):
+        failed = self.user_counts['failed']
+        failed = failed[failed > 0]
+        return failed.iloc[np.argsort(-failed.to_numpy(), kind='stable')[:n]].rename('count')
+
+
+def _user_codes(usernames):
+    if not isinstance(usernames.dtype, pd.CategoricalDtype):
+        usernames = usernames.astype('category')
+    return usernames.cat.codes.to_numpy(), usernames.cat.categories
+
+
+def aggregate_auth_events(df, timeline_bins=TIMELINE_BINS, timeline_users=TIMELINE_USERS):
+    """Return the AuthAggregates of a non-empty auth event frame (compact or plain schema)."""
+    codes, categories = _user_codes(df['username'])
+    if 'success' in df:
+        success = df['success'].to_numpy(dtype=bool)
+    else:
+        success = (df['auth_result'] == 'Success').to_numpy()
+    seconds = df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    first, last = int(seconds.min()), int(seconds.max())
+
+    # Per user x result
+    per_user = np.bincount(codes * 2 + success, minlength=2 * len(categories)).reshape(-1, 2)
+    totals = per_user.sum(axis=1)
+    seen = np.flatnonzero(totals)
+    order = seen[np.argsort(-totals[seen], kind='stable')]
+    index = pd.Index(categories[order].astype(str), name='username')
+    user_counts = pd.DataFrame({'success': per_user[order, 1], 'failed': per_user[order, 0],
+                                'total': totals[order]}, index=index)
+    successful = int(per_user[:, 1].sum())
+
+    # Per hour, from the first event's hour to the last event's
+    first_hour = first // 3600 * 3600
+    per_hour = np.bincount((seconds - first_hour) // 3600)
+    hours = pd.date_range(pd.Timestamp(first_hour, unit='s'), periods=len(per_hour), freq='h')
+    hourly = pd.Series(per_hour, index=hours)
+
+    # Hour of day and day x hour, folded from the hourly series
+    slot = hours.dayofweek.to_numpy() * 24 + hours.hour.to_numpy()
+    matrix = np.bincount(slot, weights=per_hour, minlength=7 * 24).astype(np.int64).reshape(7, 24)
+    days = np.flatnonzero(matrix.sum(axis=1))
+    columns = np.flatnonzero(matrix.sum(axis=0))
+    day_hour = pd.DataFrame(matrix[np.ix_(days, columns)], index=[DAY_NAMES[day] for day in days],
+                            columns=pd.Index(columns, name='hour'))
+    hour_of_day = pd.Series(matrix.sum(axis=0)[columns], index=pd.Index(columns, name='timestamp'),
+                            name='count')
+
+    # Timeline: (time bin, user, result) counts of the most active users
+    width = max(1, math.ceil((last - first) / timeline_bins))
+    shown = order[:timeline_users]
+    position = np.full(len(categories), -1, dtype=np.int64)
+    position[shown] = np.arange(len(shown))
+    rows = position[codes]
+    keep = rows >= 0
+    bins = (seconds[keep] - first) // width
+    keys = (bins * len(shown) + rows[keep]) * 2 + success[keep]
+    counts = np.bincount(keys)
+    present = np.flatnonzero(counts)
+    bin_index, rest = np.divmod(present, 2 * len(shown))
+    user_index, result = np.divmod(rest, 2)
+    users = [str(user) for user in categories[shown]]
+    timeline = pd.DataFrame({
+        'timestamp': pd.to_datetime(first + bin_index * width, unit='s'),
+        'username': np.asarray(users, dtype=object)[user_index],
+        'success': result.astype(bool),
+        'count': counts[present],
+    })
+
+    return AuthAggregates(
+        total=len(df), successful=successful, failed=len(df) - successful,
+        start=pd.Timestamp(first, unit='s'), end=pd.Timestamp(last, unit='s'),
+        user_counts=user_counts, hourly=hourly, hour_of_day=hour_of_day, day_hour=day_hour,
+        timeline=timeline, timeline_users=users, bin_seconds=width,
+    )
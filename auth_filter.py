@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Event filters of read_logs, checked on the raw bytes before parsing
+
+An AuthFilter selects auth events by username, NAS, result, status text
+and time.  lines() runs on a block of raw log bytes and throws away lines
+that can't match using only bytes.find and `in` checks, before anything
+is decoded, regex-matched or has its timestamp parsed:
+
+    usernames   find each b'[name]' in the block and take the lines around
+                the hits, so the cost follows the hits, not the block size
+    statuses    likewise, for the status text (when no usernames are given)
+    nases       b'(from client NAS ' must be in the line
+    results     'Login OK' / 'Access-Accept' in the line's status part
+
+Without usernames or statuses, the block is split into lines and only
+Auth: lines go on to the other checks.  The checks may let through lines
+that don't match (a status text that happens to appear in a username) but
+never drop one that does; apply() then filters the parsed frame exactly.
+The time window is not checked per line: read_logs seeks to it (see
+log_archive.seek_time) and apply() trims the edges.
+"""
+
+import numpy as np
+
+RESULTS = ('Success', 'Failed')
+SUCCESS_MARKERS = (b'Login OK', b'Access-Accept')
+
+
+def _lines_around(data, needles):
+    """Return the lines of data containing any of needles, in order, without their newline."""
+    spans = {}
+    for needle in needles:
+        position = data.find(needle)
+        while position >= 0:
+            start = data.rfind(b'\n', 0, position) + 1
+            end = data.find(b'\n', position)
+            if end < 0:
+                end = len(data)
+            spans[start] = end
+            position = data.find(needle, end)
+    return [data[start:spans[start]] for start in sorted(spans)]
+
+
+class AuthFilter:
+    """Which auth events to keep; any criterion left as None keeps everything.
+
+    usernames, nases and statuses are collections (a status matches if it
+    contains one of the texts), results a collection of 'Success' and
+    'Failed', since and until datetimes bounding the window (inclusive).
+    NASes are only known on the raw lines, so they are checked by lines()
+    alone.
+    """
+
+    def __init__(self, usernames=None, nases=None, results=None, statuses=None, since=None, until=None):
+        self.usernames = list(usernames) if usernames is not None else None
+        self.nases = list(nases) if nases is not None else None
+        self.results = list(results) if results is not None else None
+        self.statuses = list(statuses) if statuses is not None else None
+        self.since = since
+        self.until = until
+        unknown = set(self.results or ()) - set(RESULTS)
+        if unknown:
+            raise ValueError(f"Unknown result {', '.join(sorted(unknown))}, expected {' or '.join(RESULTS)}")
+
+    @property
+    def selective(self):
+        """Whether any criterion besides the time window is set."""
+        return any(value is not None for value in (self.usernames, self.nases, self.results, self.statuses))
+
+    def lines(self, data):
+        """Return the decoded lines of a block of raw log lines that may match."""
+        if self.usernames is not None:
+            candidates = _lines_around(data, [b'[' + name.encode('utf-8') + b']' for name in self.usernames])
+            candidates = [line for line in candidates if b'Auth:' in line]
+        elif self.statuses is not None:
+            candidates = _lines_around(data, [status.encode('utf-8') for status in self.statuses])
+            candidates = [line for line in candidates if b'Auth:' in line]
+        else:
+            candidates = [line for line in data.split(b'\n') if b'Auth:' in line]
+
+        if self.statuses is not None and self.usernames is not None:
+            needles = [status.encode('utf-8') for status in self.statuses]
+            candidates = [line for line in candidates if any(needle in line for needle in needles)]
+        if self.nases is not None:
+            needles = [b'(from client ' + nas.encode('utf-8') + b' ' for nas in self.nases]
+            candidates = [line for line in candidates if any(needle in line for needle in needles)]
+        if self.results is not None and len(set(self.results)) == 1:
+            ok, accept = SUCCESS_MARKERS
+            if self.results[0] == 'Success':
+                candidates = [line for line in candidates if ok in line or accept in line]
+            else:
+                # Only a marker before the username's '[' is surely in the status
+                candidates = [line for line in candidates
+                              if not (ok in line[:line.find(b'[')] or accept in line[:line.find(b'[')])]
+        return [line.decode('utf-8', errors='replace') for line in candidates]
+
+    def matches(self, event):
+        """Whether one event parsed by RadiusLogMonitor.parse_log_line passes (NASes aside)."""
+        if self.usernames is not None and event['username'] not in self.usernames:
+            return False
+        if self.results is not None and event['auth_result'] not in self.results:
+            return False
+        if self.statuses is not None and not any(status in event['status'] for status in self.statuses):
+            return False
+        if self.since is not None and event['timestamp'] < self.since:
+            return False
+        if self.until is not None and event['timestamp'] > self.until:
+            return False
+        return True
+
+    def apply(self, df):
+        """Return the rows of a parsed auth event frame that pass (NASes aside)."""
+        if df.empty:
+            return df
+        keep = np.ones(len(df), dtype=bool)
+        if self.since is not None:
+            keep &= (df['timestamp'] >= self.since).to_numpy()
+        if self.until is not None:
+            keep &= (df['timestamp'] <= self.until).to_numpy()
+        if self.usernames is not None:
+            keep &= df['username'].isin(self.usernames).to_numpy()
+        if self.results is not None:
+            keep &= df['auth_result'].isin(self.results).to_numpy()
+        if self.statuses is not None:
+            # Match each distinct status text once rather than every row
+            texts = df['status'].unique()
+            wanted = [text for text in texts if any(status in text for status in self.statuses)]
+            keep &= df['status'].isin(wanted).to_numpy()
+        if keep.all():
+            return df
+        return df[keep].reset_index(drop=True)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Headless, cached rendering of the authentication report figures
+
+Each figure is drawn from the AuthAggregates of the events (see
+auth_aggregates) rather than the events themselves: the timeline plots
+one marker per (time bin, user, result) for the most active users, with
+at most 400 time bins, so a figure costs the same for a thousand events
+or ten million.
+
+write_report() renders the figures to PNG or SVG files in an output
+directory with matplotlib's Agg canvas (no display needed), one figure per
+worker process, and writes an index.html showing them.  A content hash of
+each figure's aggregate is kept in the directory; a figure whose input
+hasn't changed since the previous run is not drawn again, so the report
+can be refreshed from cron cheaply:
+
+    */5 * * * * cd /opt/aaa && python radius_log_monitor.py --report /var/www/radius
+"""
+
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from auth_aggregates import aggregate_auth_events
+
+FORMATS = ('png', 'svg')
+FIGURE_SIZES = {'timeline': (15, 8), 'users': (15, 10), 'heatmap': (15, 6)}
+HASH_FILE = 'report-hashes.json'
+# Bump when a draw function changes, so existing reports are redrawn
+RENDER_VERSION = 1
+
+
+def timeline_data(aggregates):
+    """Binned (time, user, result) counts for the most active users, and attempts per hour."""
+    return {'counts': aggregates.timeline, 'users': list(aggregates.timeline_users),
+            'bin_seconds': aggregates.bin_seconds, 'hourly': aggregates.hourly}
+
+
+def users_data(aggregates):
+    """Per-user and per-result counts for the user analysis figure."""
+    return {
+        'top_users': aggregates.top_users(10),
+        'results': aggregates.results,
+        'failed_users': aggregates.top_failed_users(10),
+        'hour_of_day': aggregates.hour_of_day,
+    }
+
+
+def heatmap_data(aggregates):
+    """Attempts per (day of week, hour of day), days in calendar order."""
+    return {'table': aggregates.day_hour}
+
+
+def draw_timeline(fig, data):
+    counts = data['counts']
+    position = {user: i for i, user in enumerate(data['users'])}
+    largest = counts['count'].max() if not counts.empty else 1
+
+    ax = fig.add_subplot(2, 1, 1)
+    for success, color, label in ((True, 'green', 'Successful'), (False, 'red', 'Failed')):
+        points = counts[counts['success'] == success]
+        if not points.empty:
+            ax.scatter(points['timestamp'], points['username'].map(position), color=color, alpha=0.7,
+                       label=label, s=10 + 90 * (points['count'] / largest) ** 0.5)
+    ax.set_yticks(range(len(data['users'])), data['users'])
+    ax.set_title(f"FreeRADIUS Authentication Timeline "
+                 f"(top {len(data['users'])} users, {data['bin_seconds']} s bins)")
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Username')
+    ax.legend()
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+    hourly = data['hourly']
+    ax = fig.add_subplot(2, 1, 2)
+    ax.plot(hourly.index, hourly.values, marker='o', linewidth=2)
+    ax.set_title('Authentication Attempts per Hour')
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Number of Attempts')
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+
+
+def draw_users(fig, data):
+    axes = fig.subplots(2, 2)
+
+    user_counts = data['top_users']
+    axes[0, 0].bar(user_counts.index.astype(str), user_counts.values)
+    axes[0, 0].set_title('Top 10 Most Active Users')
+    axes[0, 0].set_xlabel('Username')
+    axes[0, 0].set_ylabel('Authentication Attempts')
+    axes[0, 0].tick_params(axis='x', rotation=45)
+
+    auth_results = data['results']
+    colors = ['green' if x == 'Success' else 'red' for x in auth_results.index]
+    axes[0, 1].pie(auth_results.values, labels=auth_results.index.astype(str),
+                   autopct='%1.1f%%', colors=colors)
+    axes[0, 1].set_title('Authentication Success Rate')
+
+    failed_users = data['failed_users']
+    if not failed_users.empty:
+        axes[1, 0].bar(failed_users.index.astype(str), failed_users.values, color='red', alpha=0.7)
+        axes[1, 0].set_title('Top 10 Users with Failed Attempts')
+        axes[1, 0].set_xlabel('Username')
+        axes[1, 0].set_ylabel('Failed Attempts')
+        axes[1, 0].tick_params(axis='x', rotation=45)
+
+    hourly_attempts = data['hour_of_day']
+    axes[1, 1].plot(hourly_attempts.index, hourly_attempts.values, marker='o')
+    axes[1, 1].set_title('Authentication Attempts by Hour of Day')
+    axes[1, 1].set_xlabel('Hour')
+    axes[1, 1].set_ylabel('Number of Attempts')
+    axes[1, 1].grid(True, alpha=0.3)
+    fig.tight_layout()
+
+
+def draw_heatmap(fig, data):
+    import seaborn as sns
+
+    ax = fig.add_subplot(1, 1, 1)
+    sns.heatmap(data['table'], cmap='YlOrRd', annot=True, fmt='d',
+                cbar_kws={'label': 'Authentication Attempts'}, ax=ax)
+    ax.set_title('Authentication Attempts Heatmap (Day vs Hour)')
+    ax.set_xlabel('Hour of Day')
+    ax.set_ylabel('Day of Week')
+    fig.tight_layout()
+
+
+FIGURES = {
+    'timeline': (timeline_data, draw_timeline),
+    'users': (users_data, draw_users),
+    'heatmap': (heatmap_data, draw_heatmap),
+}
+
+
+def content_hash(name, data, fmt):
+    """Return a hex digest of everything a rendered figure depends on."""
+    digest = hashlib.sha256(f"{RENDER_VERSION}:{name}:{fmt}".encode())
+    for key in sorted(data):
+        value = data[key]
+        digest.update(key.encode())
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(value.to_json(date_format='iso').encode())
+        else:
+            digest.update(json.dumps(value).encode())
+    return digest.hexdigest()
+
+
+def render_figure(name, data, path, fmt):
+    """Draw one figure on an Agg canvas and write it atomically to path."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=FIGURE_SIZES[name])
+    FIGURES[name][1](fig, data)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        fig.savefig(tmp_path, format=fmt)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return name
+
+
+def _load_hashes(output_dir):
+    try:
+        with open(os.path.join(output_dir, HASH_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_index(aggregates, output_dir, fmt):
+    """Write index.html with the report's headline numbers and figures."""
+    rows = [
+        ('Total authentication attempts', aggregates.total),
+        ('Successful authentications', aggregates.successful),
+        ('Failed authentications', aggregates.failed),
+        ('Success rate', f"{aggregates.success_rate * 100:.1f}%"),
+        ('Unique users', aggregates.unique_users),
+        ('Time range', f"{aggregates.start} to {aggregates.end}"),
+    ]
+    table = '\n'.join(f"<tr><th>{html.escape(label)}</th><td>{html.escape(str(value))}</td></tr>"
+                      for label, value in rows)
+    images = '\n'.join(f'<p><img src="{name}.{fmt}" alt="{name}"></p>' for name in FIGURES)
+    with open(os.path.join(output_dir, 'index.html'), 'w') as f:
+        f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                f"<title>FreeRADIUS Authentication Report</title></head><body>\n"
+                f"<h1>FreeRADIUS Authentication Report</h1>\n"
+                f"<p>Generated {datetime.now():%Y-%m-%d %H:%M:%S}</p>\n"
+                f"<table>\n{table}\n</table>\n{images}\n</body></html>\n")
+
+
+def write_report(df, output_dir, fmt='png', workers=None, aggregates=None):
+    """Render the report figures of df into output_dir.
+
+    aggregates, if given, are the AuthAggregates of df, so they are not
+    computed again.  Figures whose data matches the data they were last
+    rendered from are skipped.  Returns (rendered, skipped) lists of
+    figure names.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported report format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    hashes = _load_hashes(output_dir)
+    if aggregates is None:
+        aggregates = aggregate_auth_events(df)
+
+    jobs = []
+    skipped = []
+    for name, (figure_data, _) in FIGURES.items():
+        data = figure_data(aggregates)
+        digest = content_hash(name, data, fmt)
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        if hashes.get(name) == digest and os.path.exists(path):
+            skipped.append(name)
+        else:
+            hashes[name] = digest
+            jobs.append((name, data, path, fmt))
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        rendered = [render_figure(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(render_figure, *zip(*jobs)))
+
+    write_index(aggregates, output_dir, fmt)
+    with open(os.path.join(output_dir, HASH_FILE), 'w') as f:
+        json.dump(hashes, f, indent=2)
+    return rendered, skipped
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Archive benchmark: a week of rotated, compressed radius.log files
+
+Writes radius.log, radius.log.1 and radius.log.2.gz .. radius.log.6.gz,
+one day each, then times a 168-hour read_logs over the glob with 1, 2, 4,
+... worker processes up to the CPU count.
+
+    python benchmarks/bench_archive.py
+    python benchmarks/bench_archive.py --lines-per-day 2000000
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generators import write_auth_log
+from radius_log_monitor import RadiusLogMonitor
+
+
+def write_archive(directory, days, lines_per_day, users=10000, seed=1):
+    """Write `days` daily logs of generators.write_auth_log ending now, rotated logrotate-style."""
+    now = datetime.now()
+    for day in range(days - 1, -1, -1):
+        end = now - timedelta(days=day)
+        path = os.path.join(directory, 'radius.log' + (f'.{day}' if day else ''))
+        write_auth_log(path, lines_per_day, users=users, hours=24, end=end, seed=seed + day)
+        if day >= 2:
+            with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+            path += '.gz'
+        # Rotation happens right after the last line
+        os.utime(path, (end.timestamp(), end.timestamp()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel archive parsing')
+    parser.add_argument('--days', type=int, default=7, help='Daily log files (default: 7)')
+    parser.add_argument('--lines-per-day', type=int, default=500000, help='Lines per file (default: 500000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Writing {args.days} days x {args.lines_per_day} lines...")
+        write_archive(directory, args.days, args.lines_per_day)
+        pattern = os.path.join(directory, 'radius.log*')
+        workers = 1
+        baseline = None
+        while True:
+            monitor = RadiusLogMonitor(pattern, workers=workers)
+            started = time.perf_counter()
+            df = monitor.read_logs(since_hours=args.days * 24)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>3} workers  {elapsed:7.2f} s  {len(df):>10} rows  speedup {baseline / elapsed:.1f}x")
+            if workers >= (os.cpu_count() or 1):
+                break
+            workers = min(workers * 2, os.cpu_count())
+
+
+if __name__ == "__main__":
+    main()
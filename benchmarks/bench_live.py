@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Live mode latency benchmark: inotify vs. stat polling in log_watcher.follow
+
+A writer thread appends Auth: lines to a temporary radius.log at random
+intervals (with a rename-style rotation halfway through) while follow()
+tails it; the time from each write to the line reaching on_lines is
+recorded.  Then the process CPU time over an idle period is measured.
+
+    python benchmarks/bench_live.py
+    python benchmarks/bench_live.py --writes 500 --poll-interval 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from log_watcher import LogWatcher, follow
+
+
+def writer(path, writes, sent):
+    """Append one line per write, recording when it was written; rotate halfway."""
+    rng = random.Random(1)
+    for i in range(writes):
+        time.sleep(rng.uniform(0.001, 0.02))
+        if i == writes // 2:
+            os.rename(path, path + '.1')
+        with open(path, 'a') as f:
+            sent[i] = time.perf_counter()
+            f.write(f"Mon Jun  2 10:15:32 2025 : Auth: ({i}) Login OK: [user{i % 7}] "
+                    f"(from client nas01 port 0)\n")
+
+
+async def run(path, mode, writes, poll_interval, idle_seconds):
+    sent = {}
+    received = {}
+    refreshes = []
+
+    def on_lines(lines):
+        now = time.perf_counter()
+        for line in lines:
+            received[int(line.split('(', 1)[1].split(')', 1)[0])] = now
+
+    watcher = LogWatcher(path, poll_interval, use_inotify=(mode == 'inotify'))
+    task = asyncio.create_task(follow(path, on_lines, lambda: refreshes.append(time.perf_counter()),
+                                      refresh_interval=0.5, idle_interval=3600, watcher=watcher))
+    await asyncio.sleep(0.1)
+    thread = threading.Thread(target=writer, args=(path, writes, sent))
+    thread.start()
+    while thread.is_alive() or len(received) < writes:
+        await asyncio.sleep(0.05)
+        if not thread.is_alive() and time.perf_counter() - max(sent.values()) > 5:
+            break
+    thread.join()
+
+    cpu = time.process_time()
+    await asyncio.sleep(idle_seconds)
+    idle_cpu = time.process_time() - cpu
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    latencies = sorted((received[i] - sent[i]) * 1000 for i in received)
+    print(f"{mode:<8} {len(received):>5}/{writes} lines  latency median {statistics.median(latencies):7.2f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:7.2f} ms  max {latencies[-1]:7.2f} ms  "
+          f"refreshes {len(refreshes):>3}  idle CPU {idle_cpu / idle_seconds * 100:.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the live mode watcher')
+    parser.add_argument('--writes', type=int, default=300, help='Lines written (default: 300)')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                       help='Poll interval of the fallback (default: 1)')
+    parser.add_argument('--idle', type=float, default=5.0, help='Idle seconds measured (default: 5)')
+    args = parser.parse_args()
+
+    for mode in ('inotify', 'polling'):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'radius.log')
+            open(path, 'w').close()
+            asyncio.run(run(path, mode, args.writes, args.poll_interval, args.idle))
+
+
+if __name__ == "__main__":
+    main()
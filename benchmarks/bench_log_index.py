@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Per-user lookup benchmark: line indexes vs. parsing the logs
+
+Writes a month of daily rotated logs (radius.log, radius.log.1, ...),
+indexes them, and times one user's history through the indexes
+(find_lines) against read_logs(usernames=...) over all the files.  Also
+times an incremental update after a day's worth of lines is appended.
+
+    python benchmarks/bench_log_index.py                    # 30 days x 200k lines
+    python benchmarks/bench_log_index.py --days 7 --lines 1000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generators import END, write_auth_log
+from log_index import LogIndex, find_lines, update_indexes
+from radius_log_monitor import RadiusLogMonitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-user lookups through the line indexes')
+    parser.add_argument('--days', type=int, default=30, help='Daily log files (default: 30)')
+    parser.add_argument('--lines', type=int, default=200_000, help='Lines per file (default: 200000)')
+    parser.add_argument('--user', default='user00042', help='User to look up (default: user00042)')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"Generating {args.days} x {args.lines} lines into {directory}...")
+        for day in range(args.days):
+            name = 'radius.log' + (f".{day}" if day else '')
+            write_auth_log(os.path.join(directory, name), args.lines, end=END - timedelta(days=day), seed=day)
+        pattern = os.path.join(directory, 'radius.log*')
+
+        started = time.perf_counter()
+        update_indexes(pattern)
+        elapsed = time.perf_counter() - started
+        logs = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                   if not name.endswith('.idx'))
+        indexes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                      if name.endswith('.idx'))
+        print(f"index build     {elapsed:8.3f} s  logs {logs / 1e6:.0f} MB, indexes {indexes / 1e6:.1f} MB "
+              f"({indexes / (args.days * args.lines):.1f} bytes/line)")
+
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            lines = list(find_lines(pattern, [args.user]))
+            timings.append(time.perf_counter() - started)
+        print(f"indexed lookup  {min(timings) * 1000:8.2f} ms  {len(lines):>8} lines")
+
+        started = time.perf_counter()
+        df = RadiusLogMonitor(pattern, workers=1).read_logs(since_hours=None, usernames=[args.user])
+        print(f"read_logs       {time.perf_counter() - started:8.3f} s  {len(df):>8} events")
+
+        live = os.path.join(directory, 'radius.log')
+        with open(live, 'a') as out, open(os.path.join(directory, 'radius.log.1')) as day:
+            shutil.copyfileobj(day, out)
+        started = time.perf_counter()
+        added = LogIndex(live).update()
+        print(f"incremental     {time.perf_counter() - started:8.3f} s  {added:>8} new lines indexed")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
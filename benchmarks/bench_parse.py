@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Parser benchmark: line-by-line parse_log_line vs. the vectorized parse_lines
+
+Writes a synthetic radius.log with generators.write_auth_log and times
+RadiusLogMonitor.read_logs with both parsing paths on it.
+
+    python benchmarks/bench_parse.py                 # 10M lines
+    python benchmarks/bench_parse.py --lines 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generators import write_auth_log
+from radius_log_monitor import RadiusLogMonitor
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.2f} s  {len(result):>10} rows")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark radius.log parsing strategies')
+    parser.add_argument('--lines', type=int, default=10_000_000,
+                       help='Number of synthetic log lines (default: 10000000)')
+    parser.add_argument('--log-file', help='Reuse an existing log instead of generating one')
+    args = parser.parse_args()
+
+    path = args.log_file
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        print(f"Generating {args.lines} lines into {path}...")
+        write_auth_log(path, args.lines)
+    print(f"Log size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+    monitor = RadiusLogMonitor(path)
+    try:
+        per_line = timed('per-line', lambda: monitor.read_logs(since_hours=None, vectorized=False))
+        vectorized = timed('vectorized', lambda: monitor.read_logs(since_hours=None, vectorized=True))
+        print(f"Speedup: {per_line / vectorized:.1f}x")
+    finally:
+        if not args.log_file:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
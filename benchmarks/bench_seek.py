@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Time-window seek benchmark: read_logs(since_hours=1) with and without seek_time
+
+Writes a synthetic radius.log covering the last 23 hours and times the
+binary search for the start of the last hour, then the "last hour" view
+parsed from there vs. parsed from the start of the file and filtered.
+
+    python benchmarks/bench_seek.py                  # 5M lines
+    python benchmarks/bench_seek.py --log-file /var/log/freeradius/radius.log
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generators import write_auth_log
+from log_archive import seek_time
+from radius_log_monitor import RadiusLogMonitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the time-window seek of read_logs')
+    parser.add_argument('--lines', type=int, default=5_000_000,
+                       help='Number of synthetic log lines (default: 5000000)')
+    parser.add_argument('--hours', type=float, default=1, help='Window to read (default: 1)')
+    parser.add_argument('--log-file', help='Use an existing log instead of generating one')
+    args = parser.parse_args()
+
+    path = args.log_file
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        print(f"Generating {args.lines} lines into {path}...")
+        write_auth_log(path, args.lines, end=datetime.now())
+    print(f"Log size: {os.path.getsize(path) / 1e6:.1f} MB")
+
+    try:
+        cutoff = datetime.now() - timedelta(hours=args.hours)
+        started = time.perf_counter()
+        offset = seek_time(path, cutoff)
+        print(f"seek_time: {(time.perf_counter() - started) * 1000:.2f} ms -> byte {offset}")
+
+        monitor = RadiusLogMonitor(path)
+        for label, seek in (('seek', True), ('full scan', False)):
+            started = time.perf_counter()
+            df = monitor.read_logs(since_hours=args.hours, seek=seek)
+            print(f"{label:<10} {time.perf_counter() - started:8.3f} s  {len(df):>10} rows")
+    finally:
+        if not args.log_file:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
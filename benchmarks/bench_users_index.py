@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Users file benchmark: parsed UserPolicy vs. the compiled, mmap'ed index
+
+Writes a users file with --users subscribers plus DEFAULT rules, then
+times what a (re)load costs each way: parsing the file into a UserPolicy,
+compiling it with users_index.py, and opening the compiled index (what
+policy.py's reload does).  Lookup latency is measured for both with a mix
+of known and unknown users.
+
+    python benchmarks/bench_users_index.py                 # 1M users
+    python benchmarks/bench_users_index.py --users 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mods-config', 'python3'))
+
+from users_file import UserPolicy
+from users_index import CompiledUserPolicy, compile_users_file
+
+
+def write_users_file(path, users):
+    with open(path, 'w') as f:
+        f.write('DEFAULT Auth-Type := PAP\n    Fall-Through = Yes\n\n')
+        for i in range(users):
+            f.write(f'subscriber{i} Cleartext-Password := "pw{i}"\n'
+                    f'    Reply-Message := "Welcome subscriber{i}",\n'
+                    f'    Framed-IP-Address := 10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}\n\n')
+        f.write('DEFAULT Service-Type != Administrative-User\n'
+                '    Reply-Message := "Permission Denied",\n'
+                '    Auth-Type := Reject\n')
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:<34} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+def lookup_latency(policy, names, request):
+    started = time.perf_counter()
+    for name in names:
+        policy.lookup(name, request)
+    return (time.perf_counter() - started) / len(names) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled users index')
+    parser.add_argument('--users', type=int, default=1000000, help='Subscribers in the users file (default: 1000000)')
+    parser.add_argument('--lookups', type=int, default=100000, help='Lookups per variant (default: 100000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = os.path.join(tmpdir, 'authorize')
+        index = os.path.join(tmpdir, 'authorize.idx')
+        timed(f"Writing {args.users:,} users", lambda: write_users_file(source, args.users))
+        print(f"Users file: {os.path.getsize(source) / 1e6:.1f} MB")
+        print()
+
+        parsed = timed("Parse into UserPolicy (reload)", lambda: UserPolicy.from_file(source))
+        timed("Compile index", lambda: compile_users_file(source, index))
+        print(f"Index file: {os.path.getsize(index) / 1e6:.1f} MB")
+        compiled = timed("Open compiled index (reload)", lambda: CompiledUserPolicy(index))
+        print()
+
+        rng = random.Random(1)
+        names = [f"subscriber{rng.randrange(args.users)}" if i % 4 else f"unknown{i}"
+                 for i in range(args.lookups)]
+        request = {'Service-Type': 'Framed-User'}
+        for name in names[:1000]:
+            assert parsed.lookup(name, request) == compiled.lookup(name, request)
+        print(f"Lookup, parsed UserPolicy          {lookup_latency(parsed, names, request):8.2f} us")
+        print(f"Lookup, compiled index (mmap)      {lookup_latency(compiled, names, request):8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic FreeRADIUS data for the benchmarks
+
+write_auth_log() writes radius.log Auth: lines (with Info: noise, failure
+bursts and malformed lines) and write_detail_file() a detail file of
+Start / Interim-Update / Stop accounting records; write_session_logs()
+writes matching radius.log and timestamped linelog files of sessions.
+Output depends only on the arguments: the same seed and end time give
+byte-identical files, so timings from different runs and machines are
+measured on the same input.
+
+    python benchmarks/generators.py auth radius.log --lines 1000000
+    python benchmarks/generators.py detail detail-20250602 --records 100000
+    python benchmarks/generators.py sessions ./logs --sessions 100000
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+# Fixed so generated files don't depend on when they were generated
+END = datetime(2025, 6, 2, 12, 0, 0)
+TIMESTAMP_FORMAT = '%a %b %e %H:%M:%S %Y'
+OK = 'Login OK'
+FAILURES = [
+    'Login incorrect (pap: Cleartext password does not match "known good" password)',
+    'Login incorrect (No Auth-Type found: rejecting the user via Post-Auth-Type = Reject)',
+    'Invalid user (rlm_pap: Cleartext password does not match "known good" password)',
+]
+TERMINATE_CAUSES = ['User-Request', 'Lost-Carrier', 'Idle-Timeout', 'Session-Timeout', 'NAS-Reboot']
+
+
+class _Timestamps:
+    """strftime once per second of log time."""
+
+    def __init__(self, start):
+        self.start = start
+        self.second = None
+        self.text = None
+
+    def at(self, offset):
+        second = int(offset)
+        if second != self.second:
+            self.second = second
+            self.text = (self.start + timedelta(seconds=second)).strftime(TIMESTAMP_FORMAT)
+        return self.text
+
+
+def write_auth_log(path, lines, users=10000, failure_ratio=0.2, noise_ratio=0.1, malformed_ratio=0.001,
+                   bursts=10, burst_lines=None, nas_count=8, hours=23, end=END, seed=1):
+    """Write `lines` radius.log lines spread evenly over the `hours` before `end`.
+
+    noise_ratio of the lines are Info: lines and malformed_ratio are Auth:
+    lines the parser must reject (cut short, or with a broken timestamp).
+    Of the rest, failure_ratio are failed logins.  `bursts` times a random
+    user gets a password-guessing burst: over burst_lines lines (default:
+    1 in 500 of the log), half the attempts are failures of that user
+    through one NAS.
+    """
+    rng = random.Random(seed)
+    burst_lines = burst_lines or max(lines // 500, 10)
+    names = [f"user{i:05d}" for i in range(users)]
+    nases = [f"nas{i:02d}" for i in range(nas_count)]
+    span = hours * 3600
+    timestamps = _Timestamps(end - timedelta(seconds=span))
+    burst_starts = sorted(rng.randrange(max(lines - burst_lines, 1)) for _ in range(bursts))
+    burst_victims = [rng.choice(names) for _ in burst_starts]
+    burst = 0
+    random_ = rng.random
+    choice = rng.choice
+    with open(path, 'w') as fh:
+        write = fh.write
+        for i in range(lines):
+            ts = timestamps.at(i * span / lines)
+            while burst < len(burst_starts) and burst_starts[burst] + burst_lines <= i:
+                burst += 1
+            draw = random_()
+            if draw < noise_ratio:
+                write(f"{ts} : Info: rlm_sql (sql): Reserved connection ({i % 32})\n")
+                continue
+            draw -= noise_ratio
+            if draw < malformed_ratio:
+                if i % 2:
+                    write(f"{ts} : Auth: ({i}) Login OK: [{choice(names)}\n")
+                else:
+                    write(f"Xyz Jun 99 99:99:99 2025 : Auth: ({i}) Login OK: [{choice(names)}] "
+                          f"(from client {choice(nases)} port 0)\n")
+                continue
+            if burst < len(burst_starts) and burst_starts[burst] <= i and random_() < 0.5:
+                user, nas, status = burst_victims[burst], nases[burst % nas_count], FAILURES[0]
+            else:
+                user, nas = choice(names), choice(nases)
+                status = choice(FAILURES) if random_() < failure_ratio else OK
+            write(f"{ts} : Auth: ({i}) {status}: [{user}] (from client {nas} port {i % 48})\n")
+
+
+def write_detail_file(path, records, users=1000, interim_updates=2, nas='192.168.1.1',
+                      hours=23, end=END, seed=1):
+    """Write about `records` accounting records of overlapping sessions to a detail file.
+
+    Every session has a Start, interim_updates Interim-Updates and a Stop,
+    at random times within the `hours` before `end`, written in time order.
+    """
+    rng = random.Random(seed)
+    per_session = interim_updates + 2
+    span = hours * 3600
+    start = end - timedelta(seconds=span)
+    events = []
+    for session in range(max(records // per_session, 1)):
+        began = int(rng.uniform(0, span * 0.9))
+        length = int(rng.uniform(60, span - began))
+        user = f"user{rng.randrange(users):05d}"
+        rate = rng.randrange(1000, 100000)
+        cause = rng.choice(TERMINATE_CAUSES)
+        for n in range(per_session):
+            events.append((began + length * n // (per_session - 1), session, n, began, user, rate, cause))
+    events.sort()
+
+    timestamps = _Timestamps(start)
+    with open(path, 'w') as fh:
+        write = fh.write
+        for offset, session, n, began, user, rate, cause in events:
+            write(f"{timestamps.at(offset)}\n")
+            status = 'Start' if n == 0 else 'Stop' if n == per_session - 1 else 'Interim-Update'
+            write(f'\tAcct-Status-Type = {status}\n'
+                  f'\tUser-Name = "{user}"\n'
+                  f'\tAcct-Session-Id = "{session:08x}"\n'
+                  f'\tNAS-IP-Address = {nas}\n')
+            if n:
+                session_time = offset - began
+                octets = session_time * rate
+                write(f'\tAcct-Session-Time = {session_time}\n'
+                      f'\tAcct-Input-Octets = {octets & 0xFFFFFFFF}\n'
+                      f'\tAcct-Input-Gigawords = {octets >> 32}\n'
+                      f'\tAcct-Output-Octets = {(octets * 4) & 0xFFFFFFFF}\n'
+                      f'\tAcct-Output-Gigawords = {(octets * 4) >> 32}\n')
+            if status == 'Stop':
+                write(f'\tAcct-Terminate-Cause = {cause}\n')
+            write('\n')
+
+
+def write_session_logs(directory, sessions, users=1000, reject_ratio=0.1, orphan_ratio=0.01,
+                       no_session_ratio=0.02, nas_count=8, hours=23, end=END, seed=1):
+    """Write radius.log and the timestamped linelog files for `sessions` sessions into directory.
+
+    A session is a login (after a rejected attempt, reject_ratio of the
+    time) logged in radius.log and linelog-events, then a Connect and a
+    Disconnect in linelog-accounting-events, as the linelog_events and
+    log_accounting_events instances of mods-available/linelog write them.
+    orphan_ratio of the sessions have no login and no_session_ratio of the
+    logins open no session.  Returns the counts
+    (sessions, logins without a session, sessions without a login).
+    """
+    rng = random.Random(seed)
+    span = hours * 3600
+    start = end - timedelta(seconds=span)
+    auth, linelog, accounting = [], [], []
+    counts = {'sessions': 0, 'logins_without_session': 0, 'sessions_without_login': 0}
+    for session in range(sessions):
+        user = f"user{rng.randrange(users):05d}"
+        nas = f"nas{rng.randrange(nas_count):02d}"
+        login = rng.uniform(0, span * 0.9)
+        if rng.random() < reject_ratio:
+            auth.append((login - 5, f"Login incorrect (pap: Cleartext password does not match \"known good\" "
+                                    f"password): [{user}] (from client {nas} port 0)"))
+            linelog.append((login - 5, f"Rejected user: {user}"))
+        orphan = rng.random() < orphan_ratio
+        if not orphan:
+            auth.append((login, f"Login OK: [{user}] (from client {nas} port 0)"))
+            linelog.append((login, f"Accepted user: {user}"))
+            if rng.random() < no_session_ratio:
+                counts['logins_without_session'] += 1
+                continue
+        else:
+            counts['sessions_without_login'] += 1
+        counts['sessions'] += 1
+        began = login + rng.uniform(0, 3)
+        length = int(rng.uniform(60, span - began))
+        address = f"10.{session >> 16 & 255}.{session >> 8 & 255}.{session & 255}"
+        fields = f"did 00-11-22-33-44-55 cli 66-77-88-99-AA-BB port {session % 48} ip {address}"
+        accounting.append((began, f"Connect: [{user}] ({fields})"))
+        accounting.append((began + length, f"Disconnect: [{user}] ({fields}) {length} seconds"))
+
+    os.makedirs(directory, exist_ok=True)
+    timestamps = _Timestamps(start)
+    for name, lines, prefix in (('radius.log', auth, 'Auth: (0) '), ('linelog-events', linelog, ''),
+                                ('linelog-accounting-events', accounting, '')):
+        lines.sort(key=lambda line: line[0])
+        with open(os.path.join(directory, name), 'w') as fh:
+            write = fh.write
+            for offset, message in lines:
+                write(f"{timestamps.at(max(offset, 0))} : {prefix}{message}\n")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write deterministic synthetic FreeRADIUS data')
+    kinds = parser.add_subparsers(dest='kind', required=True)
+    auth = kinds.add_parser('auth', help='radius.log with Auth: lines')
+    auth.add_argument('path', help='File to write')
+    auth.add_argument('--lines', type=int, default=1000000, help='Log lines (default: 1000000)')
+    auth.add_argument('--users', type=int, default=10000, help='Distinct users (default: 10000)')
+    auth.add_argument('--failure-ratio', type=float, default=0.2,
+                      help='Share of logins that fail (default: 0.2)')
+    auth.add_argument('--malformed-ratio', type=float, default=0.001,
+                      help='Share of unparseable Auth: lines (default: 0.001)')
+    auth.add_argument('--bursts', type=int, default=10, help='Password-guessing bursts (default: 10)')
+    detail = kinds.add_parser('detail', help='detail file of accounting records')
+    detail.add_argument('path', help='File to write')
+    detail.add_argument('--records', type=int, default=100000, help='Accounting records (default: 100000)')
+    detail.add_argument('--users', type=int, default=1000, help='Distinct users (default: 1000)')
+    session_logs = kinds.add_parser('sessions', help='radius.log and timestamped linelog files of sessions')
+    session_logs.add_argument('path', help='Directory to write the three files to')
+    session_logs.add_argument('--sessions', type=int, default=100000, help='Sessions (default: 100000)')
+    session_logs.add_argument('--users', type=int, default=1000, help='Distinct users (default: 1000)')
+    for kind in (auth, detail, session_logs):
+        kind.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    if args.kind == 'auth':
+        write_auth_log(args.path, args.lines, users=args.users, failure_ratio=args.failure_ratio,
+                       malformed_ratio=args.malformed_ratio, bursts=args.bursts, seed=args.seed)
+    elif args.kind == 'detail':
+        write_detail_file(args.path, args.records, users=args.users, seed=args.seed)
+    else:
+        write_session_logs(args.path, args.sessions, users=args.users, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the log monitor, with stored baselines
+
+Times parse_log_line, read_logs (also filtered to one user's failures),
+aggregate (the AuthAggregates shared by the reports), print_summary, the
+three figures and the detail-file analysis on deterministic synthetic
+data (see generators.py) of 10k, 1M and 10M log lines, and compares
+every timing with the one stored in baseline.json.  A case more than --threshold slower than its
+baseline is reported as SLOWER and makes the run exit with status 1.
+
+Generated files are kept in --data-dir and reused.  Each case runs up to
+--repeat times (fewer once it has taken 10 s) and its best time counts.
+Figures are drawn on the Agg backend, so no display is needed.
+
+    python benchmarks/run_benchmarks.py                       # compare with baseline.json
+    python benchmarks/run_benchmarks.py --sizes 10k,1M --cases read_logs,print_summary
+    python benchmarks/run_benchmarks.py --save-baseline       # record new baselines
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib.pyplot as plt
+
+from detail_analyzer import analyze
+from generators import write_auth_log, write_detail_file
+from radius_log_monitor import RadiusLogMonitor
+
+SIZES = {'10k': 10_000, '1M': 1_000_000, '10M': 10_000_000}
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# parse_log_line is timed per line on at most this many lines
+PARSE_SAMPLE = 100_000
+# Detail files get one accounting record per this many log lines
+DETAIL_RATIO = 10
+REPEAT_BUDGET = 10.0
+# read_logs_filtered selects this user's failed logins
+FILTER_USER = 'user00042'
+
+
+def machine():
+    return {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def measure(func, repeat):
+    """Run func up to `repeat` times (until REPEAT_BUDGET is spent); return all durations."""
+    durations = []
+    while len(durations) < repeat and sum(durations) < REPEAT_BUDGET:
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def data_files(data_dir, label, lines):
+    """Return (auth log, detail file) paths for a size, generating them if missing."""
+    os.makedirs(data_dir, exist_ok=True)
+    log_path = os.path.join(data_dir, f"radius-{label}.log")
+    detail_path = os.path.join(data_dir, f"detail-{label}")
+    for path, write in ((log_path, lambda tmp: write_auth_log(tmp, lines)),
+                        (detail_path, lambda tmp: write_detail_file(tmp, lines // DETAIL_RATIO))):
+        if not os.path.exists(path):
+            print(f"Generating {path}...", flush=True)
+            write(path + '.tmp')
+            os.replace(path + '.tmp', path)
+    return log_path, detail_path
+
+
+def size_cases(log_path, detail_path):
+    """Return [(case, unit, scale, func)] for one data size; time * scale is reported in unit."""
+    monitor = RadiusLogMonitor(log_path, workers=1)
+    with open(log_path) as f:
+        sample = [line for _, line in zip(range(PARSE_SAMPLE), f)]
+    frame = {}
+
+    def read_logs():
+        frame['df'] = monitor.read_logs(since_hours=None)
+
+    def read_logs_filtered():
+        # One user's failures: the byte-level prefilter path
+        monitor.read_logs(since_hours=None, usernames=[FILTER_USER], results=['Failed'])
+
+    def parse_log_line():
+        parse = monitor.parse_log_line
+        for line in sample:
+            if 'Auth:' in line:
+                parse(line)
+
+    def aggregate():
+        frame['aggregates'] = monitor.aggregate(frame['df'])
+
+    def print_summary():
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.print_summary(frame['df'], frame['aggregates'])
+
+    def figure(method):
+        def draw():
+            with warnings.catch_warnings():
+                # plt.show() on Agg warns that it can't show anything
+                warnings.simplefilter('ignore', UserWarning)
+                method(frame['df'], frame['aggregates'])
+            plt.close('all')
+        return draw
+
+    def detail_analyze():
+        analyze([detail_path], workers=1)
+
+    return [
+        ('parse_log_line', 'us/line', 1e6 / len(sample), parse_log_line),
+        ('read_logs', 's', 1, read_logs),
+        ('read_logs_filtered', 's', 1, read_logs_filtered),
+        ('aggregate', 's', 1, aggregate),
+        ('print_summary', 's', 1, print_summary),
+        ('create_timeline_plot', 's', 1, figure(monitor.create_timeline_plot)),
+        ('create_user_analysis', 's', 1, figure(monitor.create_user_analysis)),
+        ('create_heatmap', 's', 1, figure(monitor.create_heatmap)),
+        ('detail_analyze', 's', 1, detail_analyze),
+    ]
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'machine': None, 'results': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the log monitor benchmark suite')
+    parser.add_argument('--sizes', default='10k,1M,10M',
+                       help=f"Comma-separated data sizes out of {', '.join(SIZES)} (default: all)")
+    parser.add_argument('--cases', help='Comma-separated case names to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='Maximum runs per case (default: 5)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'aaa-benchmarks'),
+                       help='Where generated data is kept between runs')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline file (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                       help='Store these timings as the new baseline of the cases run')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                       help='Relative slowdown reported as a regression (default: 0.25)')
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(',')
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        print(f"Error: unknown size {', '.join(unknown)}; choose from {', '.join(SIZES)}")
+        sys.exit(2)
+    wanted = set(args.cases.split(',')) if args.cases else None
+
+    baseline = load_baseline(args.baseline)
+    if baseline['machine'] and baseline['machine'] != machine():
+        print(f"Note: the baseline was recorded on {baseline['machine']}")
+    results = {}
+    regressions = []
+    print(f"{'case':<22} {'size':>5} {'best':>10} {'median':>10} {'unit':<8} {'baseline':>10} {'change':>8}")
+    for label in sizes:
+        log_path, detail_path = data_files(args.data_dir, label, SIZES[label])
+        for case, unit, scale, func in size_cases(log_path, detail_path):
+            # read_logs and aggregate also produce the inputs of the later cases
+            if wanted is not None and case not in wanted and case not in ('read_logs', 'aggregate'):
+                continue
+            durations = [d * scale for d in measure(func, args.repeat)]
+            if wanted is not None and case not in wanted:
+                continue
+            key = f"{case}@{label}"
+            best = min(durations)
+            results[key] = {'best': best, 'median': statistics.median(durations), 'unit': unit}
+            line = f"{case:<22} {label:>5} {best:10.4f} {results[key]['median']:10.4f} {unit:<8}"
+            previous = baseline['results'].get(key)
+            if previous:
+                change = best / previous['best'] - 1
+                flag = ''
+                if change > args.threshold:
+                    flag = '  SLOWER'
+                    regressions.append(key)
+                elif change < -args.threshold:
+                    flag = '  faster'
+                line += f" {previous['best']:10.4f} {change * 100:+7.1f}%{flag}"
+            print(line, flush=True)
+
+    if args.save_baseline:
+        baseline['machine'] = machine()
+        baseline['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved {len(results)} timings to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than "
+              f"{args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Real-time brute-force / credential-stuffing detector for radius.log
+
+Tails the log and counts failed logins per username and per NAS (the
+"from client ..." name) over a sliding window, in fixed memory: a sliding
+count-min sketch gives windowed counts and a SpaceSaving tracker keeps the
+heaviest offenders.  An alert is raised on the poll in which a counter
+crosses its threshold, and again at most once per cooldown.
+
+    python brute_force_detector.py --log-file ./logs/radius.log --user-threshold 5
+"""
+
+import argparse
+import re
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from radius_log_monitor import AUTH_PATTERN, TIMESTAMP_FORMAT, IncrementalLogReader
+from sketches import SlidingCountMin, SpaceSaving, hash_values
+
+FAILURE_PATTERN = re.compile(AUTH_PATTERN + r'(?:[^(]*\(from client (?P<nas>[^\s)]+))?')
+
+Alert = namedtuple('Alert', ['timestamp', 'kind', 'key', 'failures', 'window_seconds'])
+
+
+class BruteForceDetector:
+    # Distinct timestamp strings cached before the cache is reset
+    TIMESTAMP_CACHE_SIZE = 4096
+
+    def __init__(self, user_threshold=10, nas_threshold=100, window_seconds=60,
+                 top_k=100, cooldown_seconds=None):
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds or window_seconds
+        self.thresholds = {'user': user_threshold, 'nas': nas_threshold}
+        self.counters = {'user': SlidingCountMin(window_seconds), 'nas': SlidingCountMin(window_seconds)}
+        self.heavy_hitters = {'user': SpaceSaving(top_k), 'nas': SpaceSaving(top_k)}
+        self.events = 0
+        self.failures = 0
+        self._alerted = {}
+        self._epochs = {}
+
+    def _epoch(self, timestamp_str):
+        epoch = self._epochs.get(timestamp_str)
+        if epoch is None:
+            if len(self._epochs) >= self.TIMESTAMP_CACHE_SIZE:
+                self._epochs.clear()
+            epoch = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT).timestamp()
+            self._epochs[timestamp_str] = epoch
+        return epoch
+
+    def parse_failures(self, lines):
+        """Return (epochs, usernames, nas) arrays for the failed logins in lines."""
+        epochs, usernames, nas = [], [], []
+        search = FAILURE_PATTERN.search
+        for line in lines:
+            if 'Auth:' not in line:
+                continue
+            self.events += 1
+            if 'Login OK' in line or 'Access-Accept' in line:
+                continue
+            match = search(line)
+            if match is None:
+                continue
+            status = match.group('status')
+            if 'Login OK' in status or 'Access-Accept' in status:
+                continue
+            epochs.append(self._epoch(match.group('timestamp')))
+            usernames.append(match.group('username'))
+            nas.append(match.group('nas') or 'unknown')
+        return (np.asarray(epochs, dtype=np.float64),
+                np.asarray(usernames, dtype=object), np.asarray(nas, dtype=object))
+
+    def feed_lines(self, lines):
+        """Process a batch of raw log lines and return the alerts they raise."""
+        return self.process(*self.parse_failures(lines))
+
+    def process(self, epochs, usernames, nas):
+        """Process a batch of failed logins (parallel arrays, epochs in seconds)."""
+        if len(epochs) == 0:
+            return []
+        self.failures += len(epochs)
+        alerts = []
+        for kind, keys in (('user', usernames), ('nas', nas)):
+            alerts.extend(self._count(kind, epochs, keys))
+        self._forget_old_alerts(epochs.max())
+        return alerts
+
+    def _count(self, kind, epochs, keys):
+        counter = self.counters[kind]
+        threshold = self.thresholds[kind]
+        self.heavy_hitters[kind].update(Counter(keys.tolist()))
+        hashes = hash_values(keys)
+
+        alerts = []
+        # Log timestamps have one-second resolution: add one second at a time
+        order = np.argsort(epochs, kind='stable')
+        seconds, starts = np.unique(epochs[order], return_index=True)
+        ends = np.r_[starts[1:], len(order)]
+        for second, start, end in zip(seconds, starts, ends):
+            batch = order[start:end]
+            counter.add(hashes[batch], second)
+            batch_keys, first = np.unique(keys[batch], return_index=True)
+            estimates = counter.estimate(hashes[batch][first])
+            for key, estimate in zip(batch_keys[estimates >= threshold], estimates[estimates >= threshold]):
+                last = self._alerted.get((kind, key))
+                if last is not None and second - last < self.cooldown_seconds:
+                    continue
+                self._alerted[(kind, key)] = second
+                alerts.append(Alert(datetime.fromtimestamp(second), kind, key, int(estimate),
+                                    self.window_seconds))
+        return alerts
+
+    def _forget_old_alerts(self, now):
+        if len(self._alerted) < 10000:
+            return
+        self._alerted = {
+            key: second for key, second in self._alerted.items()
+            if now - second < self.cooldown_seconds
+        }
+
+    def top_offenders(self, kind='user', n=10):
+        """Return the n heaviest (key, windowed failure estimate) pairs of a kind."""
+        candidates = list(self.heavy_hitters[kind].counts)
+        if not candidates:
+            return []
+        estimates = self.counters[kind].estimate(hash_values(candidates))
+        ranked = sorted(zip(candidates, estimates.tolist()), key=lambda item: item[1], reverse=True)
+        return [(key, count) for key, count in ranked[:n] if count > 0]
+
+
+def format_alert(alert):
+    label = 'user' if alert.kind == 'user' else 'NAS'
+    return (f"ALERT {alert.timestamp}: {label} {alert.key} had {alert.failures} failed "
+            f"logins in the last {alert.window_seconds}s")
+
+
+def watch(log_file_path, detector, poll_interval=0.2, from_start=False):
+    """Tail log_file_path and print alerts until interrupted."""
+    reader = IncrementalLogReader(log_file_path)
+    if not from_start:
+        # Only new traffic matters for live alerting
+        reader.skip_existing()
+    print(f"Watching {log_file_path} for brute-force attempts. Press Ctrl+C to stop.")
+    try:
+        while True:
+            for alert in detector.feed_lines(reader.read_new_lines()):
+                print(format_alert(alert), flush=True)
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopping detector...")
+        print("Top users with failed attempts in the window:")
+        for key, count in detector.top_offenders('user', 5):
+            print(f"  {key}: ~{count}")
+    finally:
+        reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FreeRADIUS brute-force detector')
+    parser.add_argument('--log-file', default='./logs/radius.log',
+                       help='Path to FreeRADIUS log file')
+    parser.add_argument('--window', type=int, default=60,
+                       help='Sliding window in seconds (default: 60)')
+    parser.add_argument('--user-threshold', type=int, default=10,
+                       help='Failed logins per user per window that raise an alert (default: 10)')
+    parser.add_argument('--nas-threshold', type=int, default=100,
+                       help='Failed logins per NAS per window that raise an alert (default: 100)')
+    parser.add_argument('--poll-interval', type=float, default=0.2,
+                       help='Seconds between checks of the log for new lines (default: 0.2)')
+    parser.add_argument('--from-start', action='store_true',
+                       help='Replay the existing log content before tailing')
+    args = parser.parse_args()
+
+    detector = BruteForceDetector(
+        user_threshold=args.user_threshold,
+        nas_threshold=args.nas_threshold,
+        window_seconds=args.window,
+    )
+    watch(args.log_file, detector, args.poll_interval, args.from_start)
+
+
+if __name__ == "__main__":
+    main()
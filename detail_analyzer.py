@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+FreeRADIUS detail-file (radacct) usage analyzer
+
+The `detail` module writes every Accounting-Request to
+${radacctdir}/<client>/detail-YYYYMMDD as a block of attribute lines under
+a timestamp header:
+
+    Mon Jun  2 10:15:32 2025
+        Acct-Status-Type = Interim-Update
+        User-Name = "bob"
+        Acct-Session-Id = "0000002a"
+        Acct-Input-Octets = 123456
+        ...
+
+Records are streamed and joined into sessions by (NAS, Acct-Session-Id) in
+a bounded session table; a Stop (or an Accounting-On/Off from the NAS)
+closes a session and its final counters go into per-user and per-NAS
+rollups of sessions, session time, octets and terminate causes.  Files are
+analyzed in parallel, one per task, and sessions that span two files
+(e.g. across midnight) are reconciled when the results are merged.
+
+    python detail_analyzer.py ./logs/radacct --date 20250602
+    python detail_analyzer.py ./logs/radacct/192.168.1.1/detail-20250602 --top 20
+"""
+
+import argparse
+import os
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from radius_log_monitor import TIMESTAMP_FORMAT
+
+# Attributes the analyzer keeps from each record; the rest are skipped
+ATTRIBUTES = frozenset([
+    'Acct-Status-Type', 'Acct-Session-Id', 'User-Name', 'NAS-IP-Address', 'NAS-Identifier',
+    'Acct-Session-Time', 'Acct-Input-Octets', 'Acct-Output-Octets', 'Acct-Input-Gigawords',
+    'Acct-Output-Gigawords', 'Acct-Terminate-Cause', 'Timestamp',
+])
+STATUS_NAMES = {'1': 'Start', '2': 'Stop', '3': 'Interim-Update', '7': 'Accounting-On', '8': 'Accounting-Off'}
+USAGE_COLUMNS = ['sessions', 'session_time', 'input_octets', 'output_octets']
+
+
+def read_detail_records(path):
+    """Yield one {attribute: value} dict per record of a detail file.
+
+    Quoted values are unquoted; the header timestamp is stored under
+    'Timestamp' when the record has no Timestamp attribute.
+    """
+    record = None
+    header = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line[:1] in ('\t', ' '):
+                if record is None:
+                    continue
+                name, sep, value = line.strip().partition(' = ')
+                if sep and name in ATTRIBUTES:
+                    if value[:1] == '"':
+                        value = value[1:-1]
+                    record[name] = value
+            elif line.strip():
+                if record:
+                    yield _finish(record, header)
+                header = line.strip()
+                record = {}
+            elif record:
+                yield _finish(record, header)
+                record = None
+    if record:
+        yield _finish(record, header)
+
+
+def _finish(record, header):
+    if 'Timestamp' not in record and header:
+        try:
+            record['Timestamp'] = datetime.strptime(header, TIMESTAMP_FORMAT).timestamp()
+        except ValueError:
+            pass
+    return record
+
+
+def _counter(record, octets, gigawords):
+    return (int(record.get(gigawords, 0)) << 32) + int(record.get(octets, 0))
+
+
+class UsageRollup:
+    """Per-user and per-NAS usage totals, mergeable across workers."""
+
+    def __init__(self):
+        self.users = {}
+        self.nas = {}
+        self.user_causes = {}
+        self.nas_causes = {}
+        self.records = Counter()
+        self.evicted = 0
+        self.open_sessions = 0
+
+    def add_session(self, user, nas, session_time, input_octets, output_octets, cause):
+        for totals, causes, key in ((self.users, self.user_causes, user), (self.nas, self.nas_causes, nas)):
+            usage = totals.get(key)
+            if usage is None:
+                usage = totals[key] = [0, 0, 0, 0]
+                causes[key] = Counter()
+            usage[0] += 1
+            usage[1] += session_time
+            usage[2] += input_octets
+            usage[3] += output_octets
+            causes[key][cause] += 1
+
+    def merge(self, other):
+        for mine, theirs in ((self.users, other.users), (self.nas, other.nas)):
+            for key, usage in theirs.items():
+                if key in mine:
+                    mine[key] = [a + b for a, b in zip(mine[key], usage)]
+                else:
+                    mine[key] = list(usage)
+        for mine, theirs in ((self.user_causes, other.user_causes), (self.nas_causes, other.nas_causes)):
+            for key, causes in theirs.items():
+                mine.setdefault(key, Counter()).update(causes)
+        self.records.update(other.records)
+        self.evicted += other.evicted
+        self.open_sessions += other.open_sessions
+
+    def frame(self, kind='user'):
+        """Return the rollup as a DataFrame, one row per user (or NAS), heaviest first.
+
+        Columns are USAGE_COLUMNS, total_octets and one count column per
+        terminate cause.
+        """
+        totals, causes = (self.users, self.user_causes) if kind == 'user' else (self.nas, self.nas_causes)
+        df = pd.DataFrame.from_dict(totals, orient='index', columns=USAGE_COLUMNS)
+        df.index.name = 'username' if kind == 'user' else 'nas'
+        df['total_octets'] = df['input_octets'] + df['output_octets']
+        if causes:
+            cause_counts = pd.DataFrame.from_dict(causes, orient='index').fillna(0).astype('int64')
+            df = df.join(cause_counts[sorted(cause_counts.columns)])
+        return df.sort_values('total_octets', ascending=False)
+
+    def terminate_causes(self):
+        total = Counter()
+        for causes in self.nas_causes.values():
+            total.update(causes)
+        return total
+
+
+class SessionTable:
+    """Open sessions keyed by (NAS, Acct-Session-Id), at most max_sessions of them.
+
+    Counters in Interim-Update and Stop records are cumulative, so a session
+    only keeps its latest values.  When the table is full the least recently
+    updated session is closed with the cause 'Evicted' and its last known
+    usage, which keeps memory bounded at the cost of an over-count if its
+    Stop does turn up later.
+    """
+
+    def __init__(self, rollup, max_sessions=100000):
+        self.rollup = rollup
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        # Sessions closed here whose Start was not seen: they may continue
+        # an open session of an earlier file
+        self.continued = set()
+
+    def feed(self, record, default_nas):
+        status = record.get('Acct-Status-Type', '')
+        status = STATUS_NAMES.get(status, status)
+        if status == 'Alive':
+            status = 'Interim-Update'
+        self.rollup.records[status] += 1
+        nas = record.get('NAS-IP-Address') or record.get('NAS-Identifier') or default_nas
+
+        if status in ('Accounting-On', 'Accounting-Off'):
+            # The NAS rebooted: none of its sessions will send a Stop
+            for key in [key for key in self.sessions if key[0] == nas]:
+                self._close(key, self.sessions.pop(key), 'NAS-Reboot')
+            return
+        session_id = record.get('Acct-Session-Id')
+        if session_id is None or status not in ('Start', 'Interim-Update', 'Stop'):
+            return
+
+        key = (nas, session_id)
+        session = self.sessions.pop(key, None)
+        if session is None:
+            session = {'user': record.get('User-Name', ''), 'nas': nas, 'started': status == 'Start',
+                       'session_time': 0, 'input_octets': 0, 'output_octets': 0, 'timestamp': 0.0}
+        if status != 'Start':
+            session['session_time'] = int(record.get('Acct-Session-Time', 0))
+            session['input_octets'] = _counter(record, 'Acct-Input-Octets', 'Acct-Input-Gigawords')
+            session['output_octets'] = _counter(record, 'Acct-Output-Octets', 'Acct-Output-Gigawords')
+        session['timestamp'] = float(record.get('Timestamp', session['timestamp']))
+        if status == 'Stop':
+            if not session['started']:
+                self.continued.add(key)
+            self._close(key, session, record.get('Acct-Terminate-Cause', 'Unknown'))
+            return
+
+        self.sessions[key] = session
+        if len(self.sessions) > self.max_sessions:
+            evicted_key, evicted = self.sessions.popitem(last=False)
+            self.rollup.evicted += 1
+            self._close(evicted_key, evicted, 'Evicted')
+
+    def _close(self, key, session, cause):
+        self.rollup.add_session(session['user'], session['nas'], session['session_time'],
+                                session['input_octets'], session['output_octets'], cause)
+
+
+def analyze_file(path, max_sessions=100000):
+    """Analyze one detail file.
+
+    Returns (rollup of the sessions closed in the file, sessions still open
+    at its end, keys of sessions closed without a Start in the file).
+    """
+    rollup = UsageRollup()
+    table = SessionTable(rollup, max_sessions)
+    # The detail module names each directory after the client's address
+    default_nas = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    for record in read_detail_records(path):
+        table.feed(record, default_nas)
+    return rollup, dict(table.sessions), table.continued
+
+
+def find_detail_files(paths, date=None):
+    """Expand directories into the detail-* files under them, optionally for one YYYYMMDD date."""
+    pattern = f"detail-{date}" if date else "detail-"
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.startswith(pattern) and not name.endswith('.tmp'))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            print(f"Error: {path} not found")
+    return sorted(files)
+
+
+def analyze(paths, workers=None, max_sessions=100000):
+    """Analyze detail files in parallel and return the merged UsageRollup.
+
+    Sessions still open at the end of a file are dropped if a later file
+    closes them (its Stop carries the final counters), otherwise the newest
+    state seen is counted with the cause 'Open'.
+    """
+    rollup = UsageRollup()
+    open_sessions = {}
+    continued = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(analyze_file, paths, [max_sessions] * len(paths))
+        for file_rollup, file_open, file_continued in results:
+            rollup.merge(file_rollup)
+            continued.update(file_continued)
+            for key, session in file_open.items():
+                known = open_sessions.get(key)
+                if known is None or session['timestamp'] >= known['timestamp']:
+                    open_sessions[key] = session
+
+    for key, session in open_sessions.items():
+        if key in continued:
+            continue
+        rollup.open_sessions += 1
+        rollup.add_session(session['user'], session['nas'], session['session_time'],
+                           session['input_octets'], session['output_octets'], 'Open')
+    return rollup
+
+
+def format_octets(octets):
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if octets < 1024 or unit == 'TiB':
+            return f"{octets:.1f} {unit}" if unit != 'B' else f"{octets} B"
+        octets /= 1024
+
+
+def print_usage_report(rollup, top=10):
+    users = rollup.frame('user')
+    nas = rollup.frame('nas')
+    print("=" * 50)
+    print("FREERADIUS ACCOUNTING USAGE SUMMARY")
+    print("=" * 50)
+    print("Records: " + ", ".join(f"{status or 'Unknown'} {count}"
+                                  for status, count in rollup.records.most_common()))
+    print(f"Sessions: {int(users['sessions'].sum()) if not users.empty else 0} "
+          f"({rollup.open_sessions} still open, {rollup.evicted} evicted from the session table)")
+    if users.empty:
+        print("No accounting sessions found")
+        return
+    print(f"Users: {len(users)}  NAS: {len(nas)}")
+    print(f"Session time: {users['session_time'].sum() / 3600:.1f} h")
+    print(f"Input: {format_octets(int(users['input_octets'].sum()))}  "
+          f"Output: {format_octets(int(users['output_octets'].sum()))}")
+    print()
+
+    print("Terminate causes:")
+    for cause, count in rollup.terminate_causes().most_common():
+        print(f"  {cause}: {count}")
+    print()
+
+    columns = USAGE_COLUMNS + ['total_octets']
+    print(f"Top {top} users by traffic:")
+    print(users[columns].head(top).to_string())
+    print()
+    print("Usage per NAS:")
+    print(nas[columns].head(top).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FreeRADIUS detail-file usage analyzer')
+    parser.add_argument('paths', nargs='*', default=['./logs/radacct'],
+                       help='Detail files or radacct directories (default: ./logs/radacct)')
+    parser.add_argument('--date', help='Only analyze detail-YYYYMMDD files of this date')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes (default: CPU count)')
+    parser.add_argument('--max-sessions', type=int, default=100000,
+                       help='Open sessions kept per file before the oldest are evicted (default: 100000)')
+    parser.add_argument('--top', type=int, default=10, help='Users shown in the report (default: 10)')
+    parser.add_argument('--csv', metavar='DIR', help='Also write users.csv and nas.csv rollups to DIR')
+    args = parser.parse_args()
+
+    files = find_detail_files(args.paths, args.date)
+    if not files:
+        print("No detail files found")
+        return
+    print(f"Analyzing {len(files)} detail files...")
+    rollup = analyze(files, args.workers, args.max_sessions)
+    print_usage_report(rollup, args.top)
+
+    if args.csv:
+        os.makedirs(args.csv, exist_ok=True)
+        rollup.frame('user').to_csv(os.path.join(args.csv, 'users.csv'))
+        rollup.frame('nas').to_csv(os.path.join(args.csv, 'nas.csv'))
+        print(f"\nRollups written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
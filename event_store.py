@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Columnar event store for parsed FreeRADIUS auth events
+
+Parsed events are written as Parquet files partitioned by hour:
+
+    <root>/date=2025-06-02/hour=10/part-<inode>-<offset>.parquet
+
+Ingestion is incremental: the byte offset reached in radius.log is kept in
+<root>/_checkpoint.json, so re-running it only parses what was appended.
+Reads open only the partitions that overlap the requested time window and
+push the timestamp and username filters down into the Parquet scan.
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from radius_log_monitor import (
+    IncrementalLogReader, RadiusLogMonitor, drop_unused_categories,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+CHECKPOINT_FILE = '_checkpoint.json'
+PARTITION_FORMAT = os.path.join('date=%Y-%m-%d', 'hour=%H')
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The event store needs pyarrow: pip install pyarrow")
+
+
+class EventStore:
+    # Bytes of raw log parsed per batch; bounds memory during a first ingest
+    BATCH_BYTES = 256 * 1024 * 1024
+    ROW_GROUP_SIZE = 128 * 1024
+
+    def __init__(self, root):
+        _require_pyarrow()
+        self.root = root
+
+    def ingest(self, log_file_path, monitor=None):
+        """Parse everything appended to log_file_path since the last ingest.
+
+        Returns the number of events written.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        monitor = monitor or RadiusLogMonitor(log_file_path)
+        reader = IncrementalLogReader(
+            log_file_path, os.path.join(self.root, CHECKPOINT_FILE), autosave=False
+        )
+        written = 0
+        try:
+            while True:
+                # Parts are named after the checkpointed position the batch
+                # starts from, so a rerun after a crash between writing them
+                # and saving the checkpoint overwrites them instead of
+                # duplicating their events
+                inode, committed_offset = reader.inode, reader.committed_offset
+                start_offset = reader.offset
+                lines = reader.read_new_lines(max_bytes=self.BATCH_BYTES)
+                df = monitor.parse_lines(lines)
+                if not df.empty:
+                    part_name = f"part-{inode or reader.inode}-{committed_offset}"
+                    written += self._write_partitions(df, part_name)
+                # Only advance the checkpoint once the batch is on disk
+                reader.save_checkpoint()
+                if reader.offset == start_offset:
+                    break
+        finally:
+            reader.close()
+        return written
+
+    def _write_partitions(self, df, part_name):
+        hours = df['timestamp'].dt.floor('h')
+        for hour, group in df.groupby(hours, sort=False):
+            directory = os.path.join(self.root, hour.strftime(PARTITION_FORMAT))
+            os.makedirs(directory, exist_ok=True)
+            table = pa.Table.from_pandas(group, preserve_index=False)
+            path = os.path.join(directory, part_name + '.parquet')
+            pq.write_table(table, path + '.tmp', row_group_size=self.ROW_GROUP_SIZE)
+            os.replace(path + '.tmp', path)
+        return len(df)
+
+    def partitions(self):
+        """Return (hour, directory) for every partition, oldest first."""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for date_dir in os.listdir(self.root):
+            if not date_dir.startswith('date='):
+                continue
+            for hour_dir in os.listdir(os.path.join(self.root, date_dir)):
+                directory = os.path.join(date_dir, hour_dir)
+                try:
+                    hour = datetime.strptime(directory, PARTITION_FORMAT)
+                except ValueError:
+                    continue
+                found.append((hour, os.path.join(self.root, directory)))
+        return sorted(found)
+
+    def _files(self, start, end):
+        files = []
+        for hour, directory in self.partitions():
+            if start is not None and hour + timedelta(hours=1) <= start:
+                continue
+            if end is not None and hour > end:
+                continue
+            files.extend(sorted(
+                os.path.join(directory, name) for name in os.listdir(directory)
+                if name.endswith('.parquet')
+            ))
+        return files
+
+    def read(self, since_hours=None, start=None, end=None, usernames=None):
+        """Load the events in [start, end] (or the last since_hours) as a DataFrame.
+
+        Only partitions overlapping the window are opened; the timestamp and
+        username conditions are evaluated inside the Parquet scan.
+        """
+        if since_hours:
+            start = datetime.now() - pd.Timedelta(hours=since_hours)
+        files = self._files(start, end)
+        if not files:
+            return pd.DataFrame()
+
+        condition = None
+        if start is not None:
+            condition = ds.field('timestamp') >= pa.scalar(start)
+        if end is not None:
+            upper = ds.field('timestamp') <= pa.scalar(end)
+            condition = upper if condition is None else condition & upper
+        if usernames is not None:
+            users = ds.field('username').isin(list(usernames))
+            condition = users if condition is None else condition & users
+
+        table = ds.dataset(files, format='parquet').to_table(filter=condition)
+        df = table.to_pandas()
+        if df.empty:
+            return pd.DataFrame()
+        # pyarrow hands second-resolution timestamps back as datetime64[ms]
+        df['timestamp'] = df['timestamp'].astype('datetime64[s]')
+        return drop_unused_categories(df)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+One time-ordered event stream over radius.log, linelog and linelog-accounting
+
+Each source is a log file (or a glob of its rotations) with a parser that
+turns one of its lines into an Event, or None for lines it doesn't care
+about.  The built-in sources and the files they read in the log
+directory, current and rotated (plain or compressed):
+
+    radius              radius.log*: Auth: lines (Login OK / Login incorrect ...)
+    linelog             linelog-events*: Accepted user: / Rejected user: /
+                        Sent challenge:
+    linelog-accounting  linelog-accounting-events*: Connect: / Disconnect: /
+                        NAS ... just came online
+
+Every source's file is already in time order, so merge_events() reads
+the sources line by line and merges them lazily with a heap-based k-way
+merge (heapq.merge): one pending event per source is held in memory,
+whatever the size of the files.  The linelog files are the ones the
+linelog_events and log_accounting_events instances of
+mods-available/linelog write: the stock linelog and linelog-accounting
+files have no timestamps, so they can't be merged, and are left out
+with a warning.
+
+AuthAccountingCorrelator then matches, in one pass over the merged
+stream, each accepted login to the accounting session it opens, and
+reports per-user logins, sessions and session time plus the sessions
+without a login and the logins that never opened a session.
+
+    python event_stream.py --log-dir ./logs
+    python event_stream.py --log-dir ./logs --print --user alice
+"""
+
+import argparse
+import heapq
+import logging
+import os
+import re
+from collections import Counter, deque, namedtuple
+from datetime import datetime, timedelta
+from operator import attrgetter
+
+import pandas as pd
+
+from log_archive import find_log_files, open_log, overlapping_files
+from radius_log_monitor import AUTH_PATTERN, TIMESTAMP_FORMAT
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ['timestamp', 'source', 'kind', 'username', 'nas', 'result',
+                             'session_time', 'address'], defaults=(None,) * 5)
+
+# Event kinds
+AUTH = 'auth'
+CHALLENGE = 'challenge'
+SESSION_START = 'session-start'
+SESSION_STOP = 'session-stop'
+NAS_ON = 'nas-on'
+NAS_OFF = 'nas-off'
+
+LINE_PATTERN = re.compile(r'(\w{3} \w{3} [ \d]\d \d\d:\d\d:\d\d \d{4}) : (.*)')
+RADIUS_PATTERN = re.compile(AUTH_PATTERN + r'(?:[^(]*\(from client (?P<nas>[^\s)]+))?')
+LINELOG_PATTERN = re.compile(r'(Accepted|Rejected) user: (.*)|Sent challenge: (.*)')
+ACCOUNTING_PATTERN = re.compile(
+    r'(?:(Connect)|(Disconnect)): \[([^\]]*)\] \(did \S* cli \S* port \S* ip (\S*)\)(?: (\d+) seconds)?'
+    r'|NAS (\S+) \(([^)]*)\) just (came online|went offline)'
+)
+# Distinct timestamp strings cached before the cache is reset
+TIMESTAMP_CACHE_SIZE = 4096
+_timestamps = {}
+
+
+def parse_timestamp(raw):
+    """datetime of a ctime-style log timestamp, converted once per distinct string."""
+    timestamp = _timestamps.get(raw)
+    if timestamp is None:
+        if len(_timestamps) >= TIMESTAMP_CACHE_SIZE:
+            _timestamps.clear()
+        timestamp = _timestamps[raw] = datetime.strptime(raw, TIMESTAMP_FORMAT)
+    return timestamp
+
+
+def parse_radius_line(line):
+    """Event of a radius.log Auth: line, or None."""
+    if 'Auth:' not in line:
+        return None
+    match = RADIUS_PATTERN.search(line)
+    if match is None:
+        return None
+    try:
+        timestamp = parse_timestamp(match.group('timestamp'))
+    except ValueError:
+        return None
+    status = match.group('status')
+    result = 'Success' if ('Login OK' in status or 'Access-Accept' in status) else 'Failed'
+    return Event(timestamp, 'radius', AUTH, match.group('username'), match.group('nas'), result)
+
+
+def _split_line(line):
+    match = LINE_PATTERN.match(line)
+    if match is None:
+        return None, None
+    try:
+        return parse_timestamp(match.group(1)), match.group(2)
+    except ValueError:
+        return None, None
+
+
+def parse_linelog_line(line):
+    """Event of a linelog Accepted / Rejected / Sent challenge line, or None."""
+    timestamp, message = _split_line(line)
+    if timestamp is None:
+        return None
+    match = LINELOG_PATTERN.match(message)
+    if match is None:
+        return None
+    verdict, username, challenged = match.groups()
+    if challenged is not None:
+        return Event(timestamp, 'linelog', CHALLENGE, challenged)
+    return Event(timestamp, 'linelog', AUTH, username, result='Success' if verdict == 'Accepted' else 'Failed')
+
+
+def parse_accounting_line(line):
+    """Event of a linelog-accounting Connect / Disconnect / NAS on-off line, or None."""
+    timestamp, message = _split_line(line)
+    if timestamp is None:
+        return None
+    match = ACCOUNTING_PATTERN.match(message)
+    if match is None:
+        return None
+    connect, disconnect, username, address, seconds, source_ip, nas, state = match.groups()
+    if connect or disconnect:
+        return Event(timestamp, 'linelog-accounting', SESSION_START if connect else SESSION_STOP, username,
+                     session_time=int(seconds) if seconds else None, address=address or None)
+    return Event(timestamp, 'linelog-accounting', NAS_ON if state == 'came online' else NAS_OFF,
+                 nas=nas or source_ip)
+
+
+PARSERS = {
+    'radius': parse_radius_line,
+    'linelog': parse_linelog_line,
+    'linelog-accounting': parse_accounting_line,
+}
+# File name of each source in the FreeRADIUS log directory
+SOURCE_FILES = {'radius': 'radius.log', 'linelog': 'linelog-events',
+                'linelog-accounting': 'linelog-accounting-events'}
+# Files of the stock linelog instances, without timestamps
+UNTIMED_FILES = {'linelog': 'linelog', 'linelog-accounting': 'linelog-accounting'}
+
+
+def read_events(pattern, parser):
+    """Yield the events parser finds in the log files matching pattern, oldest file first, lazily."""
+    for path in overlapping_files(find_log_files(pattern)):
+        with open_log(path) as f:
+            for raw in f:
+                event = parser(raw.decode('utf-8', errors='replace').rstrip('\n'))
+                if event is not None:
+                    yield event
+
+
+def merge_events(sources):
+    """Merge the time-ordered event streams of sources ({pattern: parser}) into one, lazily.
+
+    Events with equal timestamps come out in the order of sources.
+    """
+    return heapq.merge(*(read_events(pattern, parser) for pattern, parser in sources.items()),
+                       key=attrgetter('timestamp'))
+
+
+def log_dir_sources(log_dir, names=None):
+    """Return {glob: parser} for the built-in sources with current or rotated files in log_dir."""
+    sources = {}
+    for name in names or SOURCE_FILES:
+        pattern = os.path.join(log_dir, SOURCE_FILES[name] + '*')
+        if find_log_files(pattern):
+            sources[pattern] = PARSERS[name]
+        elif name in UNTIMED_FILES and os.path.exists(os.path.join(log_dir, UNTIMED_FILES[name])):
+            logger.warning("%s has no timestamps to merge on, leaving it out; enable the %s instance "
+                           "of the linelog module to write %s", UNTIMED_FILES[name],
+                           'linelog_events' if name == 'linelog' else 'log_accounting_events',
+                           SOURCE_FILES[name])
+    return sources
+
+
+class AuthAccountingCorrelator:
+    """Match accepted logins to the accounting sessions they open, in one pass.
+
+    A session start is matched to the user's latest accepted login at most
+    window_seconds earlier.  Logins seen by both radius.log and linelog
+    count once for matching.  A user may hold several sessions at once, so
+    a stop closes the start with the same user and framed address.  Memory
+    grows with the users seen and the logins of the last window, not with
+    the stream.
+    """
+
+    def __init__(self, window_seconds=60):
+        self.window = timedelta(seconds=window_seconds)
+        self.events = Counter()
+        self.users = {}
+        self.open_sessions = {}
+        self.sessions_without_login = 0
+        self.logins_without_session = 0
+        self.stops_without_start = 0
+        self.login_delays = Counter()  # whole seconds from login to session start: count
+        self._pending = {}
+        self._expiry = deque()
+        self.first = None
+        self.last = None
+
+    def _user(self, username):
+        counts = self.users.get(username)
+        if counts is None:
+            counts = self.users[username] = Counter()
+        return counts
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        while self._expiry and self._expiry[0][0] < cutoff:
+            timestamp, username = self._expiry.popleft()
+            if self._pending.get(username) == timestamp:
+                del self._pending[username]
+                self.logins_without_session += 1
+
+    def feed(self, event):
+        self.events[(event.source, event.kind)] += 1
+        if self.first is None:
+            self.first = event.timestamp
+        self.last = event.timestamp
+        self._expire(event.timestamp)
+        kind = event.kind
+        if kind == AUTH:
+            counts = self._user(event.username)
+            counts[f"{event.source} {'accepted' if event.result == 'Success' else 'rejected'}"] += 1
+            if event.result == 'Success' and self._pending.get(event.username) != event.timestamp:
+                self._pending[event.username] = event.timestamp
+                self._expiry.append((event.timestamp, event.username))
+        elif kind == SESSION_START:
+            counts = self._user(event.username)
+            counts['sessions'] += 1
+            login = self._pending.pop(event.username, None)
+            if login is None:
+                self.sessions_without_login += 1
+            else:
+                self.login_delays[int((event.timestamp - login).total_seconds())] += 1
+            self.open_sessions[(event.username, event.address)] = event.timestamp
+        elif kind == SESSION_STOP:
+            counts = self._user(event.username)
+            counts['session seconds'] += event.session_time or 0
+            if self.open_sessions.pop((event.username, event.address), None) is None:
+                self.stops_without_start += 1
+
+    def feed_all(self, events):
+        for event in events:
+            self.feed(event)
+        self.finish()
+        return self
+
+    def finish(self):
+        """Settle the logins still waiting for a session at the end of the stream."""
+        self.logins_without_session += len(self._pending)
+        self._pending.clear()
+        self._expiry.clear()
+
+    def user_table(self):
+        """Per-user counts, most sessions first."""
+        table = pd.DataFrame.from_dict(self.users, orient='index').fillna(0).astype(int)
+        if table.empty:
+            return table
+        table.index.name = 'username'
+        sort_by = 'sessions' if 'sessions' in table else table.columns[0]
+        return table.sort_values(sort_by, ascending=False, kind='stable')
+
+    def print_summary(self, top=10):
+        print("=" * 50)
+        print("AUTH / ACCOUNTING CORRELATION")
+        print("=" * 50)
+        print(f"Time range: {self.first} to {self.last}")
+        print("Events:")
+        for (source, kind), count in sorted(self.events.items()):
+            print(f"  {source:<20} {kind:<14} {count:>10}")
+        matched = sum(self.login_delays.values())
+        print(f"Sessions opened after a login: {matched}")
+        if matched:
+            seen = 0
+            for median, count in sorted(self.login_delays.items()):
+                seen += count
+                if seen > matched // 2:
+                    break
+            print(f"  login to session start: median {median} s, max {max(self.login_delays)} s")
+        print(f"Sessions without a login in the previous {self.window.total_seconds():.0f} s: {self.sessions_without_login}")
+        print(f"Logins that opened no session: {self.logins_without_session}")
+        print(f"Session stops without a start: {self.stops_without_start}")
+        print(f"Sessions still open: {len(self.open_sessions)}")
+        table = self.user_table()
+        if not table.empty:
+            print(f"\nTop {top} users:")
+            print(table.head(top))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge radius.log, linelog and linelog-accounting into one event stream')
+    parser.add_argument('--log-dir', default='./logs', help='FreeRADIUS log directory (default: ./logs)')
+    parser.add_argument('--sources', default=','.join(SOURCE_FILES),
+                       help=f"Comma-separated sources to merge (default: {','.join(SOURCE_FILES)})")
+    parser.add_argument('--print', action='store_true', help='Print the merged events instead of correlating them')
+    parser.add_argument('--user', help='Only events of this user')
+    parser.add_argument('--window', type=int, default=60,
+                       help='Seconds a login may precede the session it opens (default: 60)')
+    args = parser.parse_args()
+    logging.basicConfig(format='%(levelname)s %(name)s: %(message)s')
+
+    names = args.sources.split(',')
+    unknown = [name for name in names if name not in SOURCE_FILES]
+    if unknown:
+        print(f"Error: unknown source {', '.join(unknown)}; choose from {', '.join(SOURCE_FILES)}")
+        return
+    sources = log_dir_sources(args.log_dir, names)
+    if not sources:
+        print(f"No log files found in {args.log_dir}")
+        return
+
+    events = merge_events(sources)
+    if args.user:
+        events = (event for event in events if event.username == args.user)
+    if args.print:
+        for event in events:
+            details = ' '.join(f"{field}={value}" for field, value in zip(Event._fields[3:], event[3:])
+                               if value is not None)
+            print(f"{event.timestamp} {event.source:<18} {event.kind:<13} {details}")
+    else:
+        AuthAccountingCorrelator(args.window).feed_all(events).print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Parallel analysis of rotated and compressed radius.log archives
+
+A log path may be a file, a directory (every radius.log* in it) or a glob
+(./logs/radius.log*).  Each file's time range is read from its first and
+last timestamps and only the files overlapping the requested window are
+parsed; plain files only from the first line of the window, found by a
+binary search on their timestamps (seek_time).  Plain files are split into
+byte-range chunks on line boundaries, compressed ones (.gz, .bz2, .xz) are
+parsed whole, one task per worker of a ProcessPoolExecutor; the partial
+frames come back in file order and are merged with concat_auth_frames.
+With an AuthFilter, plain files are also cut off after the window and each
+chunk is prefiltered on its raw bytes (see auth_filter) before parsing.
+"""
+
+import bz2
+import glob
+import gzip
+import lzma
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from auth_filter import AuthFilter
+from radius_log_monitor import RadiusLogMonitor, concat_auth_frames, drop_unused_categories
+
+COMPRESSED = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+# radiusd prefixes every log line with a ctime-style timestamp
+LINE_TIMESTAMP = re.compile(rb'^\w{3} \w{3} [ \d]\d \d\d:\d\d:\d\d \d{4}', re.MULTILINE)
+TAIL_BYTES = 64 * 1024
+CHUNK_BYTES = 64 * 1024 * 1024
+# Sidecar line indexes (see log_index) live next to the logs but aren't logs
+INDEX_SUFFIX = '.idx'
+# Lines from concurrent threads can be logged slightly out of order, so a
+# time seek lands this far before the cutoff; the exact filter comes after
+SEEK_SLACK = timedelta(minutes=1)
+
+
+def is_compressed(path):
+    return os.path.splitext(path)[1] in COMPRESSED
+
+
+def open_log(path):
+    """Open a plain or compressed log file for binary reading."""
+    opener = COMPRESSED.get(os.path.splitext(path)[1], open)
+    return opener(path, 'rb')
+
+
+def find_log_files(pattern):
+    """Return the log files a path, directory or glob refers to."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, 'radius.log*')
+    if os.path.isfile(pattern):
+        return [pattern]
+    return sorted(path for path in glob.glob(pattern)
+                  if os.path.isfile(path) and INDEX_SUFFIX not in os.path.basename(path))
+
+
+def _parse_timestamp(raw):
+    """Parse a line's timestamp; None for a corrupted one that only looks like a timestamp."""
+    try:
+        return datetime.strptime(raw.decode('ascii'), '%a %b %d %H:%M:%S %Y')
+    except ValueError:
+        return None
+
+
+def _first_valid(matches):
+    for raw in matches:
+        timestamp = _parse_timestamp(raw)
+        if timestamp is not None:
+            return timestamp
+    return None
+
+
+def first_timestamp(path):
+    """Return the timestamp of the first log line of path, or None."""
+    with open_log(path) as f:
+        return _first_valid(LINE_TIMESTAMP.findall(f.read(TAIL_BYTES)))
+
+
+def last_timestamp(path):
+    """Return the timestamp of the last log line of path, or None.
+
+    A compressed file can't be read from the end, so its modification time
+    stands in: rotation and compression happen after the last write, so it
+    is never earlier than the last line.
+    """
+    if is_compressed(path):
+        return datetime.fromtimestamp(os.path.getmtime(path))
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - TAIL_BYTES))
+        return _first_valid(reversed(LINE_TIMESTAMP.findall(f.read())))
+
+
+def overlapping_files(paths, start=None, end=None):
+    """Return the paths whose time range overlaps [start, end], oldest first."""
+    selected = []
+    for path in paths:
+        first = first_timestamp(path)
+        if first is None:
+            continue
+        if end is not None and first > end:
+            continue
+        if start is not None:
+            last = last_timestamp(path)
+            if last is not None and last < start:
+                continue
+        selected.append((first, path))
+    return [path for _, path in sorted(selected)]
+
+
+def _timestamp_after(buffer, position):
+    """Return the timestamp of the first timestamped line starting at or after position, or None."""
+    size = len(buffer)
+    while position < size:
+        if position:
+            newline = buffer.find(b'\n', position - 1)
+            if newline < 0:
+                return None
+            position = newline + 1
+        match = LINE_TIMESTAMP.match(buffer, position)
+        if match:
+            timestamp = _parse_timestamp(match.group())
+            if timestamp is not None:
+                return timestamp
+        position += 1
+    return None
+
+
+def seek_time(path, since):
+    """Return the byte offset of the first line of a plain log logged at or after `since`.
+
+    Log lines are written in time order, so this is a binary search over
+    the memory-mapped file: about 40 probes, each parsing one timestamp,
+    whatever the size of the file.  The offset is SEEK_SLACK early.
+    """
+    since = since - SEEK_SLACK
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            low, high = 0, size
+            while low < high:
+                middle = (low + high) // 2
+                timestamp = _timestamp_after(buffer, middle)
+                if timestamp is None or timestamp >= since:
+                    high = middle
+                else:
+                    low = middle + 1
+            if not low:
+                return 0
+            newline = buffer.find(b'\n', low - 1)
+            return size if newline < 0 else newline + 1
+
+
+def split_ranges(path, workers, start=0, size=None):
+    """Split bytes `start` to `size` (default: the end) of a plain file into (start, end) ranges, about one per worker."""
+    if size is None:
+        size = os.path.getsize(path)
+    chunks = max(workers, -(-(size - start) // CHUNK_BYTES), 1)
+    step = max(-(-(size - start) // chunks), 1)
+    return [(offset, min(offset + step, size)) for offset in range(start, size, step)]
+
+
+def read_range(path, start=0, end=None):
+    """Return the complete lines that start in the byte range [start, end) of path."""
+    if end is None:
+        with open_log(path) as f:
+            return f.read()
+    with open(path, 'rb') as f:
+        if start:
+            # The line running into `start` belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+            start = f.tell()
+        if start >= end:
+            return b''
+        data = f.read(end - start)
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    return data
+
+
+def parse_range(path, start=0, end=None, auth_filter=None):
+    """Parse one file or byte range into a compact auth frame of the events auth_filter keeps."""
+    monitor = RadiusLogMonitor(path)
+    data = read_range(path, start, end)
+    if auth_filter is None:
+        lines = data.decode('utf-8', errors='replace').splitlines()
+    else:
+        lines = auth_filter.lines(data)
+    del data
+    frames = []
+    for offset in range(0, len(lines), monitor.CHUNK_LINES):
+        frames.append(monitor.parse_lines(lines[offset:offset + monitor.CHUNK_LINES]))
+    df = concat_auth_frames(frames)
+    if df.empty or auth_filter is None:
+        return df
+    kept = auth_filter.apply(df)
+    return df if kept is df else drop_unused_categories(kept)
+
+
+def plan_tasks(paths, workers, since=None, until=None):
+    """Return the (path, start, end) tasks covering paths: byte ranges of plain files, whole compressed files.
+
+    Plain files are only covered from the first line at `since` on, and
+    up to a line at least SEEK_SLACK past `until`.
+    """
+    tasks = []
+    for path in paths:
+        if is_compressed(path):
+            tasks.append((path, 0, None))
+        else:
+            start = seek_time(path, since) if since is not None else 0
+            size = seek_time(path, until + 2 * SEEK_SLACK) if until is not None else None
+            tasks.extend((path, begin, end) for begin, end in split_ranges(path, workers, start, size))
+    return tasks
+
+
+def read_log_files(pattern, since=None, until=None, workers=None, auth_filter=None):
+    """Parse every log file matching pattern that overlaps [since, until], in parallel.
+
+    auth_filter, an AuthFilter, selects the events to keep; its window
+    replaces since and until.  Returns one compact auth frame, in time order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if auth_filter is None:
+        auth_filter = AuthFilter(since=since, until=until)
+    since, until = auth_filter.since, auth_filter.until
+    paths = overlapping_files(find_log_files(pattern), since, until)
+    tasks = plan_tasks(paths, workers, since, until)
+    if not tasks:
+        return concat_auth_frames([])
+    if workers == 1 or len(tasks) == 1:
+        return concat_auth_frames(parse_range(path, start, end, auth_filter) for path, start, end in tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = pool.map(parse_range, *zip(*tasks), [auth_filter] * len(tasks))
+        return concat_auth_frames(list(frames))
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Sidecar index of the lines of each user and NAS in radius.log
+
+Every log file gets an index file next to it (radius.log.idx, or in an
+index directory) mapping each username and NAS seen on its Auth: lines to
+the byte offsets of those lines:
+
+    header      magic, version, metadata length
+    metadata    JSON: the indexed file's inode, size and first bytes, the
+                offset indexing has reached, and per kind ('user', 'nas')
+                the bounds of its three sections (relative to the end of
+                the metadata)
+    names       the kind's names, each followed by a newline
+    table       per name: postings offset, postings length, line count and
+                last line offset, as little-endian int64
+    postings    per name: its sorted line offsets, delta-encoded and
+                written as LEB128 varints (two or three bytes a line)
+
+update() only scans what was appended since the index was written (a file
+that was rotated away or truncated in place is indexed again from the
+start) and rewrites the index atomically.  A lookup maps the index and
+decodes only the postings of the names asked for, then seeks to each
+line, so a user's history comes back without parsing the log.
+Compressed archives are indexed on their decompressed content; reading
+their lines seeks through the decompressed stream.
+
+    python log_index.py update "./logs/radius.log*"
+    python log_index.py lookup "./logs/radius.log*" --user alice
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+import pandas as pd
+
+from log_archive import CHUNK_BYTES, INDEX_SUFFIX, find_log_files, is_compressed, open_log, overlapping_files
+
+MAGIC = b'RLIX'
+VERSION = 1
+HEADER = struct.Struct('<4sIQ')  # magic, version, metadata length
+ROW = struct.Struct('<qqqq')  # postings offset, postings length, lines, last line offset
+KINDS = ('user', 'nas')
+HEAD_BYTES = 64
+# The Auth: lines parse_lines accepts, with the username and (if logged) the NAS
+INDEX_PATTERN = re.compile(
+    rb'Auth:\s*\(\d+\)[^\n]*?:\s*\[([^\]\n]+)\](?:[^\n]*?\(from client ([^\s)]+))?'
+)
+
+
+def encode_varints(values):
+    """Return (LEB128 bytes of every value, bytes used per value) for an array of non-negative ints."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+    width = int(lengths.max()) if len(values) else 1
+    groups = ((values[:, None] >> (np.arange(width, dtype=np.uint64) * np.uint64(7))) & np.uint64(0x7F))
+    groups = groups.astype(np.uint8)
+    position = np.arange(width)
+    groups[position < (lengths - 1)[:, None]] |= 0x80
+    return groups[position < lengths[:, None]].tobytes(), lengths
+
+
+def decode_varints(data):
+    """Return the uint64 values of a run of LEB128 varints."""
+    data = np.frombuffer(data, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.r_[0, ends[:-1] + 1]
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (position.astype(np.uint64) * np.uint64(7))
+    return np.add.reduceat(parts, starts)
+
+
+def index_path(log_path, index_dir=None):
+    """Return where the index of log_path is kept."""
+    if index_dir:
+        return os.path.join(index_dir, os.path.basename(log_path) + INDEX_SUFFIX)
+    return log_path + INDEX_SUFFIX
+
+
+def _complete_lines(f, offset):
+    """Yield (offset, data) blocks of the complete lines read from f, which is at offset."""
+    carry = b''
+    while True:
+        block = f.read(CHUNK_BYTES)
+        if not block:
+            return
+        data = carry + block
+        end = data.rfind(b'\n') + 1
+        carry = data[end:]
+        if end:
+            yield offset, data[:end]
+            offset += end
+
+
+def scan(f, offset):
+    """Index the complete lines of f from offset on.
+
+    Returns (offset reached, line offsets, usernames, NAS names); a line
+    without a NAS has None for it.
+    """
+    offsets = []
+    users = []
+    nases = []
+    for start, data in _complete_lines(f, offset):
+        for match in INDEX_PATTERN.finditer(data):
+            offsets.append(start + data.rfind(b'\n', 0, match.start()) + 1)
+            users.append(match.group(1))
+            nases.append(match.group(2))
+        offset = start + len(data)
+    return offset, np.array(offsets, dtype=np.int64), users, nases
+
+
+class _Postings:
+    """The names, table and postings of one kind, as read from or written to an index."""
+
+    def __init__(self, names=(), table=None, postings=b''):
+        self.names = list(names)
+        self.table = table if table is not None else np.zeros((0, 4), dtype=np.int64)
+        self.postings = postings
+
+    def merge(self, offsets, keys):
+        """Return new _Postings with the lines at offsets (ascending) added under keys."""
+        known = [key is not None for key in keys]
+        offsets = offsets[known]
+        codes, uniques = pd.factorize(pd.Series([key for key in keys if key is not None], dtype=object))
+        ids = {name: i for i, name in enumerate(self.names)}
+        names = list(self.names)
+        for name in uniques:
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+        name_ids = np.array([ids[name] for name in uniques], dtype=np.int64)[codes]
+
+        order = np.argsort(name_ids, kind='stable')
+        offsets = offsets[order]
+        name_ids = name_ids[order]
+        last = np.zeros(len(names), dtype=np.int64)
+        last[:len(self.table)] = self.table[:, 3]
+        first = np.r_[True, name_ids[1:] != name_ids[:-1]] if len(name_ids) else np.zeros(0, dtype=bool)
+        previous = np.empty_like(offsets)
+        previous[1:] = offsets[:-1]
+        previous[first] = last[name_ids[first]]
+        encoded, lengths = encode_varints(offsets - previous)
+
+        # Bytes, lines and last offset of each name's new postings
+        starts = np.flatnonzero(first)
+        added_bytes = np.zeros(len(names), dtype=np.int64)
+        added_lines = np.zeros(len(names), dtype=np.int64)
+        added_at = np.zeros(len(names), dtype=np.int64)
+        if len(starts):
+            ends = np.r_[starts[1:], len(offsets)]
+            group = name_ids[starts]
+            added_bytes[group] = np.add.reduceat(lengths, starts)
+            added_lines[group] = ends - starts
+            added_at[group] = np.r_[0, np.cumsum(added_bytes[group])[:-1]]
+            last[group] = offsets[ends - 1]
+
+        table = np.zeros((len(names), 4), dtype=np.int64)
+        table[:len(self.table)] = self.table
+        pieces = []
+        position = 0
+        for i in range(len(names)):
+            old_at, old_bytes = table[i, 0], table[i, 1]
+            pieces.append(self.postings[old_at:old_at + old_bytes])
+            if added_bytes[i]:
+                pieces.append(encoded[added_at[i]:added_at[i] + added_bytes[i]])
+            table[i] = (position, old_bytes + added_bytes[i], table[i, 2] + added_lines[i], last[i])
+            position += table[i, 1]
+        return _Postings(names, table, b''.join(pieces))
+
+    def sections(self):
+        return [b''.join(name + b'\n' for name in self.names), self.table.tobytes(), self.postings]
+
+
+class LogIndex:
+    """The sidecar index of one log file."""
+
+    def __init__(self, log_path, index_dir=None):
+        self.log_path = log_path
+        self.path = index_path(log_path, index_dir)
+
+    def _read(self):
+        """Return (metadata, mapped index), or (None, None) if there is no valid index."""
+        try:
+            with open(self.path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None, None
+        magic, version, metadata_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            buffer.close()
+            return None, None
+        metadata = json.loads(buffer[HEADER.size:HEADER.size + metadata_length])
+        base = HEADER.size + metadata_length
+        metadata['kinds'] = {kind: [(base + start, base + end) for start, end in bounds]
+                             for kind, bounds in metadata['kinds'].items()}
+        return metadata, buffer
+
+    def _postings(self, metadata, buffer, kind):
+        names, table, postings = metadata['kinds'][kind]
+        return _Postings(
+            buffer[names[0]:names[1]].split(b'\n')[:-1],
+            np.frombuffer(buffer[table[0]:table[1]], dtype=np.int64).reshape(-1, 4).copy(),
+            buffer[postings[0]:postings[1]],
+        )
+
+    def update(self):
+        """Index what was appended to the log since the last update; return the lines added."""
+        st = os.stat(self.log_path)
+        with open(self.log_path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+        metadata, buffer = self._read()
+        same_file = (
+            metadata is not None
+            and metadata['inode'] == st.st_ino
+            and head.startswith(bytes.fromhex(metadata['head']))
+        )
+        if same_file and metadata['size'] == st.st_size:
+            buffer.close()
+            return 0
+        # A plain file that only grew is indexed from where the last update stopped
+        resume = same_file and not metadata['compressed'] and st.st_size > metadata['size']
+
+        compressed = is_compressed(self.log_path)
+        offset = metadata['offset'] if resume else 0
+        with open_log(self.log_path) as f:
+            if offset:
+                f.seek(offset)
+            offset, lines, users, nases = scan(f, offset)
+        if resume:
+            kinds = {kind: self._postings(metadata, buffer, kind) for kind in KINDS}
+        else:
+            kinds = {kind: _Postings() for kind in KINDS}
+        if buffer is not None:
+            buffer.close()
+        kinds = {'user': kinds['user'].merge(lines, users), 'nas': kinds['nas'].merge(lines, nases)}
+        self._write(kinds, {
+            'log': os.path.abspath(self.log_path),
+            'inode': st.st_ino,
+            'size': st.st_size,
+            'head': head.hex(),
+            'compressed': compressed,
+            'offset': offset,
+        })
+        return len(lines)
+
+    def _write(self, kinds, metadata):
+        sections = {kind: postings.sections() for kind, postings in kinds.items()}
+        position = 0
+        metadata['kinds'] = {}
+        for kind, parts in sections.items():
+            bounds = []
+            for part in parts:
+                bounds.append((position, position + len(part)))
+                position += len(part)
+            metadata['kinds'][kind] = bounds
+        encoded = json.dumps(metadata).encode()
+
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as out:
+                out.write(HEADER.pack(MAGIC, VERSION, len(encoded)))
+                out.write(encoded)
+                for parts in sections.values():
+                    for part in parts:
+                        out.write(part)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def lookup(self, kind, names):
+        """Return the sorted offsets of the lines of any of names (a kind of 'user' or 'nas')."""
+        metadata, buffer = self._read()
+        if metadata is None:
+            return np.zeros(0, dtype=np.int64)
+        try:
+            names_at, table_at, postings_at = metadata['kinds'][kind]
+            block = b'\n' + buffer[names_at[0]:names_at[1]]
+            found = []
+            for name in names:
+                position = block.find(b'\n' + name.encode('utf-8') + b'\n')
+                if position < 0:
+                    continue
+                row = block.count(b'\n', 0, position)
+                start, length, _, _ = ROW.unpack_from(buffer, table_at[0] + row * ROW.size)
+                data = buffer[postings_at[0] + start:postings_at[0] + start + length]
+                found.append(np.cumsum(decode_varints(data)).astype(np.int64))
+        finally:
+            buffer.close()
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+
+def read_lines(path, offsets):
+    """Yield the lines of path starting at offsets (ascending), without their newline."""
+    with open_log(path) as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield f.readline().rstrip(b'\n').decode('utf-8', errors='replace')
+
+
+def update_indexes(pattern, index_dir=None):
+    """Bring the index of every log file matching pattern up to date; return {path: lines added}."""
+    return {path: LogIndex(path, index_dir).update() for path in find_log_files(pattern)}
+
+
+def find_lines(pattern, users=(), nases=(), index_dir=None, update=True, since=None, until=None):
+    """Yield (path, line) for the log lines of any of users, of any of nases, oldest file first.
+
+    Given both, only lines matching a user and a NAS are returned.  Only
+    files overlapping [since, until] are looked at.  With update=True the
+    indexes are brought up to date first.
+    """
+    for path in overlapping_files(find_log_files(pattern), since, until):
+        index = LogIndex(path, index_dir)
+        if update:
+            index.update()
+        offsets = None
+        for kind, names in (('user', users), ('nas', nases)):
+            if names:
+                found = index.lookup(kind, names)
+                offsets = found if offsets is None else np.intersect1d(offsets, found)
+        if offsets is None or not len(offsets):
+            continue
+        for line in read_lines(path, offsets):
+            yield path, line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query per-user/NAS line indexes of radius.log')
+    commands = parser.add_subparsers(dest='command', required=True)
+    update = commands.add_parser('update', help='Index what was appended to the log files')
+    lookup = commands.add_parser('lookup', help='Print the lines of users or NASes')
+    for command in (update, lookup):
+        command.add_argument('log', help='Log file, or a directory or glob of rotated logs')
+        command.add_argument('--index-dir', help='Keep the indexes here instead of next to the logs')
+    lookup.add_argument('--user', action='append', default=[], help='Username (repeatable)')
+    lookup.add_argument('--nas', action='append', default=[], help='NAS name or address (repeatable)')
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        for path, added in update_indexes(args.log, args.index_dir).items():
+            print(f"{path}: indexed {added} new lines")
+    else:
+        if not args.user and not args.nas:
+            print("Error: give --user or --nas")
+            sys.exit(2)
+        for _, line in find_lines(args.log, args.user, args.nas, args.index_dir):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
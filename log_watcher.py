@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Event-driven tailing of radius.log with asyncio
+
+LogWatcher wakes a coroutine as soon as the log changes.  On Linux it
+watches the log's directory through inotify (via ctypes, no extra
+package), so appends, a rename-style rotation and the new file's creation
+all arrive within milliseconds and an idle log costs no wakeups at all.
+Elsewhere, or if inotify can't be set up, it falls back to comparing the
+file's stat every poll_interval.
+
+follow() reads what was appended on every change (IncrementalLogReader
+takes care of rotation and truncation) and hands it on at once, but
+throttles the refreshes: after a quiet period the first change is
+refreshed immediately, and a burst of writes then gets at most one
+refresh per refresh_interval.  With nothing written, a refresh still
+happens every idle_interval so time windows keep sliding.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import math
+import os
+import struct
+
+from radius_log_monitor import IncrementalLogReader
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+# Events that aren't about one file in the directory
+DIRECTORY_EVENTS = IN_DELETE_SELF | IN_MOVE_SELF | IN_Q_OVERFLOW
+EVENT_HEADER = struct.Struct('iIII')  # watch descriptor, mask, cookie, name length
+
+
+def _inotify_watch(directory):
+    """Return a non-blocking inotify descriptor watching directory, or None if inotify is unavailable."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        init = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        logger.info("inotify_init1 failed: %s", os.strerror(ctypes.get_errno()))
+        return None
+    if add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        logger.info("Can't watch %s with inotify: %s", directory, os.strerror(ctypes.get_errno()))
+        os.close(fd)
+        return None
+    return fd
+
+
+class LogWatcher:
+    """Wait for changes to a log file: inotify on its directory, or stat polling."""
+
+    def __init__(self, path, poll_interval=1.0, use_inotify=True):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.name = os.fsencode(os.path.basename(path))
+        self._fd = _inotify_watch(os.path.dirname(os.path.abspath(path))) if use_inotify else None
+        self._changed = None
+        self._loop = None
+        self._stat = self._signature()
+
+    @property
+    def mode(self):
+        return 'inotify' if self._fd is not None else 'polling'
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        position = 0
+        while position < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, position)
+            name = data[position + EVENT_HEADER.size:position + EVENT_HEADER.size + length].rstrip(b'\0')
+            position += EVENT_HEADER.size + length
+            if name == self.name or mask & DIRECTORY_EVENTS:
+                self._changed.set()
+
+    async def changed(self, timeout=None):
+        """Wait until the log changes or timeout seconds pass; return whether it changed."""
+        if self._fd is None:
+            return await self._poll(timeout)
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+            self._loop.add_reader(self._fd, self._on_readable)
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._changed.clear()
+        return True
+
+    async def _poll(self, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            delay = self.poll_interval if deadline is None else min(self.poll_interval, deadline - loop.time())
+            if delay > 0:
+                await asyncio.sleep(delay)
+            signature = self._signature()
+            if signature != self._stat:
+                self._stat = signature
+                return True
+            if deadline is not None and loop.time() >= deadline:
+                return False
+
+    def close(self):
+        if self._fd is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+
+async def follow(path, on_lines, on_refresh, refresh_interval=1.0, idle_interval=60.0,
+                 poll_interval=1.0, watcher=None):
+    """Pass the lines appended to path to on_lines as they are written; call on_refresh throttled.
+
+    on_refresh runs after the first read, then at most once per
+    refresh_interval while lines keep coming, and every idle_interval when
+    none do.  Runs until cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    watcher = watcher or LogWatcher(path, poll_interval)
+    reader = IncrementalLogReader(path)
+    last_refresh = -math.inf
+    pending = True
+    try:
+        while True:
+            lines = reader.read_new_lines()
+            if lines:
+                on_lines(lines)
+                pending = True
+            now = loop.time()
+            if (pending and now - last_refresh >= refresh_interval) or now - last_refresh >= idle_interval:
+                on_refresh()
+                last_refresh = loop.time()
+                pending = False
+            due = last_refresh + (refresh_interval if pending else idle_interval)
+            await watcher.changed(max(due - loop.time(), 0))
+    finally:
+        watcher.close()
+        reader.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics endpoint for radius.log
+
+A MetricsCollector tails the log with an IncrementalLogReader and folds
+every new Auth: line into in-memory counters and histograms: attempts by
+result and by NAS (the "from client ..." name), the users with the most
+failures (a SpaceSaving top-k), unparseable lines, and how far behind the
+log the collector is.  After each poll it renders the Prometheus text
+exposition once; a scrape only returns those bytes, so it costs the same
+whatever the traffic and never touches the log file.
+
+    python radius_log_monitor.py --serve 9812
+    curl localhost:9812/metrics
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from radius_log_monitor import AUTH_PATTERN, TIMESTAMP_FORMAT, IncrementalLogReader
+from sketches import SpaceSaving
+
+logger = logging.getLogger(__name__)
+
+CLIENT_PATTERN = re.compile(AUTH_PATTERN + r'(?:[^(]*\(from client (?P<nas>[^\s)]+))?')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DELAY_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 300, 900)
+POLL_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets):
+        self.bounds = np.asarray(buckets, dtype=np.float64)
+        self.counts = np.zeros(len(buckets) + 1, dtype=np.int64)
+        self.sum = 0.0
+
+    def observe(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.counts += np.bincount(np.searchsorted(self.bounds, values), minlength=len(self.counts))
+        self.sum += float(values.sum())
+
+    def lines(self, name):
+        cumulative = np.cumsum(self.counts)
+        lines = [f'{name}_bucket{{le="{bound:g}"}} {count}' for bound, count in zip(self.bounds, cumulative)]
+        lines.append(f'{name}_bucket{{le="+Inf"}} {cumulative[-1]}')
+        lines.append(f'{name}_sum {self.sum}')
+        lines.append(f'{name}_count {cumulative[-1]}')
+        return lines
+
+
+class MetricsCollector:
+    # Distinct timestamp strings cached before the cache is reset
+    TIMESTAMP_CACHE_SIZE = 4096
+
+    def __init__(self, log_file_path, top_k=100, top_n=10, from_start=False):
+        self.log_file_path = log_file_path
+        self.top_n = top_n
+        self.reader = IncrementalLogReader(log_file_path)
+        if not from_start:
+            self.reader.skip_existing()
+        self.results = Counter()
+        self.nas_results = Counter()
+        self.failures = SpaceSaving(top_k)
+        self.lines = 0
+        self.bytes = 0
+        self.parse_errors = 0
+        self.polls = 0
+        self.last_event = None
+        self.lag_seconds = 0.0
+        self.delays = Histogram(DELAY_BUCKETS)
+        self.poll_seconds = Histogram(POLL_BUCKETS)
+        self._epochs = {}
+        self.exposition = self.render().encode()
+
+    def _epoch(self, timestamp_str):
+        epoch = self._epochs.get(timestamp_str)
+        if epoch is None:
+            if len(self._epochs) >= self.TIMESTAMP_CACHE_SIZE:
+                self._epochs.clear()
+            epoch = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT).timestamp()
+            self._epochs[timestamp_str] = epoch
+        return epoch
+
+    def feed_lines(self, lines, now=None):
+        """Count a batch of raw log lines."""
+        now = time.time() if now is None else now
+        search = CLIENT_PATTERN.search
+        epochs = []
+        failed = []
+        for line in lines:
+            self.lines += 1
+            self.bytes += len(line) + 1
+            if 'Auth:' not in line:
+                continue
+            match = search(line)
+            if match is None:
+                self.parse_errors += 1
+                logger.debug("No match for line: %s", line.strip())
+                continue
+            try:
+                epoch = self._epoch(match.group('timestamp'))
+            except ValueError:
+                self.parse_errors += 1
+                continue
+            status = match.group('status')
+            result = 'success' if ('Login OK' in status or 'Access-Accept' in status) else 'failed'
+            self.results[result] += 1
+            self.nas_results[match.group('nas') or 'unknown', result] += 1
+            if result == 'failed':
+                failed.append(match.group('username'))
+            epochs.append(epoch)
+
+        if epochs:
+            epochs = np.asarray(epochs)
+            self.delays.observe(np.maximum(now - epochs, 0))
+            self.last_event = max(self.last_event or 0, float(epochs.max()))
+        if failed:
+            self.failures.update(Counter(failed))
+
+    def poll(self):
+        """Read and count what was appended to the log, then re-render the exposition."""
+        started = time.perf_counter()
+        self.feed_lines(self.reader.read_new_lines())
+        self.polls += 1
+        self.poll_seconds.observe([time.perf_counter() - started])
+        if self.last_event is not None:
+            self.lag_seconds = max(time.time() - self.last_event, 0.0)
+        # One reference swap: a concurrent scrape gets the old or the new text
+        self.exposition = self.render().encode()
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        out = [
+            '# HELP freeradius_auth_total Authentication attempts by result.',
+            '# TYPE freeradius_auth_total counter',
+        ]
+        for result in ('success', 'failed'):
+            out.append(f'freeradius_auth_total{{result="{result}"}} {self.results[result]}')
+
+        out += [
+            '# HELP freeradius_nas_auth_total Authentication attempts by NAS and result.',
+            '# TYPE freeradius_nas_auth_total counter',
+        ]
+        for (nas, result), count in sorted(self.nas_results.items()):
+            out.append(f'freeradius_nas_auth_total{{nas="{escape_label(nas)}",result="{result}"}} {count}')
+
+        out += [
+            f'# HELP freeradius_user_failures Failed logins of the {self.top_n} users with the most '
+            f'(SpaceSaving estimate, may overcount).',
+            '# TYPE freeradius_user_failures gauge',
+        ]
+        for username, count in self.failures.top(self.top_n):
+            out.append(f'freeradius_user_failures{{username="{escape_label(username)}"}} {count}')
+
+        out += [
+            '# HELP freeradius_log_parse_errors_total Auth: lines that could not be parsed.',
+            '# TYPE freeradius_log_parse_errors_total counter',
+            f'freeradius_log_parse_errors_total {self.parse_errors}',
+            '# HELP freeradius_log_lines_total Log lines read.',
+            '# TYPE freeradius_log_lines_total counter',
+            f'freeradius_log_lines_total {self.lines}',
+            '# HELP freeradius_log_read_bytes_total Log bytes read.',
+            '# TYPE freeradius_log_read_bytes_total counter',
+            f'freeradius_log_read_bytes_total {self.bytes}',
+            '# HELP freeradius_log_polls_total Polls of the log for new lines.',
+            '# TYPE freeradius_log_polls_total counter',
+            f'freeradius_log_polls_total {self.polls}',
+            '# HELP freeradius_log_lag_seconds Age of the newest event at the last poll.',
+            '# TYPE freeradius_log_lag_seconds gauge',
+            f'freeradius_log_lag_seconds {self.lag_seconds:.3f}',
+        ]
+        if self.last_event is not None:
+            out += [
+                '# HELP freeradius_log_last_event_timestamp_seconds Log timestamp of the newest event.',
+                '# TYPE freeradius_log_last_event_timestamp_seconds gauge',
+                f'freeradius_log_last_event_timestamp_seconds {self.last_event:.0f}',
+            ]
+        out += [
+            '# HELP freeradius_event_delay_seconds Delay between an event being logged and counted.',
+            '# TYPE freeradius_event_delay_seconds histogram',
+            *self.delays.lines('freeradius_event_delay_seconds'),
+            '# HELP freeradius_log_poll_duration_seconds Time taken to read and count one poll.',
+            '# TYPE freeradius_log_poll_duration_seconds histogram',
+            *self.poll_seconds.lines('freeradius_log_poll_duration_seconds'),
+        ]
+        return '\n'.join(out) + '\n'
+
+    def close(self):
+        self.reader.close()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    collector = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.collector.exposition
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def parse_address(address):
+    """Split "[host:]port" into a (host, port) pair; the host defaults to all interfaces."""
+    host, _, port = str(address).rpartition(':')
+    return host, int(port)
+
+
+def serve(log_file_path, address, poll_interval=1.0):
+    """Tail log_file_path and serve its metrics on address until interrupted."""
+    collector = MetricsCollector(log_file_path)
+    handler = type('Handler', (MetricsHandler,), {'collector': collector})
+    server = ThreadingHTTPServer(parse_address(address), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    print(f"Serving metrics of {log_file_path} on http://{host}:{port}/metrics. Press Ctrl+C to stop.")
+    try:
+        while True:
+            collector.poll()
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("\nStopping metrics server...")
+    finally:
+        server.shutdown()
+        server.server_close()
+        collector.close()
@@ -0,0 +1,184 @@
+#! /usr/bin/env python3
+"""
+Batched, asynchronous accounting writer for the python3 accounting() hook
+
+submit() only appends the request tuple to a bounded deque (an atomic
+operation under the GIL, no lock), so the FreeRADIUS worker thread gets
+back to its packet in about a microsecond.  A background thread drains the
+deque and writes the records to SQLite in WAL mode with executemany(), one
+transaction per batch of up to `batch_size` records, at least every
+`flush_interval` seconds.
+
+When the writer falls behind and the deque is full, new records are
+dropped and counted rather than blocking the server; stats() reports the
+queue depth, its high-water mark, drops and write timings.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounting (
+    received REAL NOT NULL,
+    status TEXT,
+    session_id TEXT,
+    username TEXT,
+    nas TEXT,
+    session_time INTEGER,
+    input_octets INTEGER,
+    output_octets INTEGER,
+    terminate_cause TEXT
+)
+"""
+INSERT = "INSERT INTO accounting VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _value(value):
+    if value[:1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def accounting_row(received, request):
+    """Map one request tuple ((attribute, value), ...) to an accounting table row."""
+    attributes = {item[0]: _value(item[-1]) for item in request}
+    input_octets = _integer(attributes.get('Acct-Input-Octets'))
+    output_octets = _integer(attributes.get('Acct-Output-Octets'))
+    if input_octets is not None:
+        input_octets += (_integer(attributes.get('Acct-Input-Gigawords')) or 0) << 32
+    if output_octets is not None:
+        output_octets += (_integer(attributes.get('Acct-Output-Gigawords')) or 0) << 32
+    return (
+        received,
+        attributes.get('Acct-Status-Type'),
+        attributes.get('Acct-Session-Id'),
+        attributes.get('User-Name'),
+        attributes.get('NAS-IP-Address') or attributes.get('NAS-Identifier'),
+        _integer(attributes.get('Acct-Session-Time')),
+        input_octets,
+        output_octets,
+        attributes.get('Acct-Terminate-Cause'),
+    )
+
+
+class AccountingWriter:
+    """Queue accounting requests from hook threads and write them to SQLite in batches.
+
+    The counters are updated without a lock, so under heavy contention
+    they may be off by a few; they are metrics, not accounting data.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=0.2, queue_size=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.pending = deque()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.high_water = 0
+        self.write_seconds = 0.0
+        self.slowest_batch = 0.0
+        self.thread = None
+
+    def start(self):
+        # Create the table up front so a bad path fails instantiate()
+        connection = self._connect()
+        connection.close()
+        self.thread = threading.Thread(target=self._run, name='accounting-writer', daemon=True)
+        self.thread.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(SCHEMA)
+        connection.commit()
+        return connection
+
+    def submit(self, request):
+        """Queue one accounting request tuple; return False if it was dropped."""
+        pending = self.pending
+        depth = len(pending)
+        if depth >= self.queue_size:
+            self.dropped += 1
+            return False
+        pending.append((time.time(), request))
+        self.submitted += 1
+        if depth >= self.high_water:
+            self.high_water = depth + 1
+        # >=, not ==: with several threads submitting, the depth one of them
+        # sees can skip the exact batch size
+        if depth + 1 >= self.batch_size and not self.wakeup.is_set():
+            self.wakeup.set()
+        return True
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while True:
+                self.wakeup.wait(self.flush_interval)
+                self.wakeup.clear()
+                stopping = self.stopping
+                while self.pending:
+                    self._write_batch(connection)
+                    if len(self.pending) < self.batch_size and not stopping:
+                        break
+                if stopping and not self.pending:
+                    break
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection):
+        pending = self.pending
+        batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+        started = time.perf_counter()
+        try:
+            with connection:
+                connection.executemany(INSERT, [accounting_row(received, request) for received, request in batch])
+        except (sqlite3.Error, ValueError):
+            # A failed batch is lost, not retried: the server keeps running
+            self.failed += len(batch)
+            return
+        elapsed = time.perf_counter() - started
+        self.written += len(batch)
+        self.batches += 1
+        self.write_seconds += elapsed
+        self.slowest_batch = max(self.slowest_batch, elapsed)
+
+    def stats(self):
+        """Return the writer's backpressure and throughput counters."""
+        return {
+            'queued': len(self.pending),
+            'high_water': self.high_water,
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'mean_batch_ms': self.write_seconds / self.batches * 1000 if self.batches else 0.0,
+            'slowest_batch_ms': self.slowest_batch * 1000,
+        }
+
+    def close(self, timeout=10.0):
+        """Flush what is queued and stop the writer thread."""
+        if self.thread is None:
+            return
+        self.stopping = True
+        self.wakeup.set()
+        self.thread.join(timeout)
+        self.thread = None
@@ -0,0 +1,335 @@
+#! /usr/bin/env python3
+"""
+rlm_python3 policy module
+
+Drop-in replacement for example.py on the same hook API.  The users file
+is parsed into a UserPolicy index once in instantiate() (or a compiled
+index is mapped); authorize() answers from an LRU cache with a TTL in
+front of it, keyed by the user and the request attributes the policy
+compares.  A background thread reloads the policy when its file changes
+and swaps it in with a fresh cache, without pausing traffic.  A compiled
+index whose users file was edited since it was compiled is recompiled
+first (or, if that fails, kept with a warning).  Nothing on the packet
+path prints or calls radlog directly: log records go through a
+QueueHandler and a background QueueListener thread hands them to
+radiusd.radlog.
+
+Settings come from the module's `config { ... }` section (radiusd.config):
+
+    users_file   users file to load (default: ../files/authorize)
+    users_index  compiled index (users_index.py) to use instead of
+                 users_file, mapped rather than parsed; recompiled from
+                 its users file when that changes
+    reload_interval
+                 seconds between checks of the users file or index for
+                 changes; 0 disables reloading (default: 5)
+    cache_size   cached decisions (default: 100000)
+    cache_ttl    seconds a cached decision is valid (default: 300)
+    log_level    DEBUG, INFO, WARNING or ERROR (default: WARNING)
+
+    accounting_db              SQLite database accounting() records go to
+                               (default: none, accounting() is a no-op)
+    accounting_batch_size      records per write transaction (default: 500)
+    accounting_flush_interval  seconds between writes (default: 0.2)
+    accounting_queue_size      queued records before new ones are dropped
+                               (default: 100000)
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import radiusd
+
+from accounting_writer import AccountingWriter
+from users_file import UserPolicy
+from users_index import CompiledUserPolicy, compile_users_file, file_signature
+
+DEFAULT_USERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'files', 'authorize')
+LOG_QUEUE_SIZE = 10000
+
+logger = logging.getLogger('rlm_python3.policy')
+
+RADLOG_LEVELS = {
+    logging.DEBUG: radiusd.L_DBG,
+    logging.INFO: radiusd.L_INFO,
+    logging.WARNING: radiusd.L_WARN,
+    logging.ERROR: radiusd.L_ERR,
+    logging.CRITICAL: radiusd.L_ERR,
+}
+
+
+class RadlogHandler(logging.Handler):
+    """Forward log records to FreeRADIUS' log (runs on the listener thread)."""
+
+    def emit(self, record):
+        try:
+            radiusd.radlog(RADLOG_LEVELS.get(record.levelno, radiusd.L_INFO), self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ttl seconds after insertion."""
+
+    def __init__(self, maxsize=100000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires > time.monotonic():
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.ttl)
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+class PolicyModule:
+    """State shared by the hooks, created by instantiate()."""
+
+    def __init__(self, config):
+        self.users_file = config.get('users_file', DEFAULT_USERS_FILE)
+        self.users_index = config.get('users_index')
+        self.cache_size = int(config.get('cache_size', 100000))
+        self.cache_ttl = float(config.get('cache_ttl', 300))
+        # Users file signature a recompile of the index last failed for
+        self.failed_source = None
+        self.reloads = 0
+        self.stopped = threading.Event()
+        self.watcher = None
+        reload_interval = float(config.get('reload_interval', 5))
+        self.log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.log_handler = DroppingQueueHandler(self.log_queue)
+        self.listener = logging.handlers.QueueListener(self.log_queue, RadlogHandler())
+        logger.handlers = [self.log_handler]
+        logger.propagate = False
+        logger.setLevel(config.get('log_level', 'WARNING').upper())
+        self.listener.start()
+        try:
+            # (policy, cache), replaced as a whole on reload so that no thread
+            # mixes a new policy with decisions cached from the old one
+            self.state = (self.load_policy(), TTLCache(self.cache_size, self.cache_ttl))
+        except Exception:
+            self.listener.stop()
+            logger.handlers = []
+            raise
+        self.writer = None
+        if config.get('accounting_db'):
+            self.writer = AccountingWriter(
+                config['accounting_db'],
+                batch_size=int(config.get('accounting_batch_size', 500)),
+                flush_interval=float(config.get('accounting_flush_interval', 0.2)),
+                queue_size=int(config.get('accounting_queue_size', 100000)),
+            )
+            self.writer.start()
+        if reload_interval > 0:
+            self.watcher = threading.Thread(target=self._watch, args=(reload_interval,),
+                                            name='policy-reload', daemon=True)
+            self.watcher.start()
+
+    @property
+    def policy(self):
+        return self.state[0]
+
+    @property
+    def cache(self):
+        return self.state[1]
+
+    def load_policy(self):
+        if self.users_index:
+            policy = CompiledUserPolicy(self.users_index)
+            if policy.source_changed():
+                policy = self.recompile(policy)
+            return policy
+        return UserPolicy.from_file(self.users_file)
+
+    def recompile(self, policy):
+        """Recompile a compiled index whose users file changed; return the policy to serve."""
+        signature = file_signature(policy.source)
+        try:
+            users = compile_users_file(policy.source, self.users_index)
+        except (OSError, ValueError) as e:
+            if signature != self.failed_source:
+                logger.warning("policy: %s changed but %s could not be recompiled, "
+                               "serving the stale index: %s", policy.source, self.users_index, e)
+            self.failed_source = signature
+            return policy
+        self.failed_source = None
+        logger.info("policy: recompiled %d users from %s into %s", users, policy.source, self.users_index)
+        return CompiledUserPolicy(self.users_index)
+
+    def is_current(self):
+        """Whether the policy's file, and a compiled index's users file, are unchanged."""
+        policy = self.policy
+        if not policy.is_current():
+            return False
+        if isinstance(policy, CompiledUserPolicy) and policy.source_changed():
+            # Don't retry a failed recompile until the users file changes again
+            return file_signature(policy.source) == self.failed_source
+        return True
+
+    def reload_policy(self):
+        """Return the policy to serve next: newly loaded, or the current one if nothing new loaded."""
+        current = self.policy
+        if current.is_current():
+            # Only the users file of a compiled index changed
+            return self.recompile(current)
+        return self.load_policy()
+
+    def _watch(self, interval):
+        while not self.stopped.wait(interval):
+            if self.is_current():
+                continue
+            started = time.perf_counter()
+            try:
+                policy = self.reload_policy()
+            except (OSError, ValueError) as e:
+                logger.error("policy: reload failed, keeping the current policy: %s", e)
+                continue
+            if policy is self.policy:
+                continue
+            self.state = (policy, TTLCache(self.cache_size, self.cache_ttl))
+            self.reloads += 1
+            logger.info("policy: reloaded %d users in %.3f s", len(policy), time.perf_counter() - started)
+
+    def decide(self, request):
+        """Return the authorize() result for a request {attribute: value}."""
+        username = request.get('User-Name')
+        if username is None:
+            return radiusd.RLM_MODULE_NOOP
+        policy, cache = self.state
+        key = (username,) + tuple(request.get(attr) for attr in policy.compare_attributes)
+        result = cache.get(key)
+        if result is None:
+            matched, reply, config = policy.lookup(username, request)
+            if not matched:
+                # Like rlm_files: no matching entry is a no-op
+                result = radiusd.RLM_MODULE_NOOP
+            elif reply or config:
+                result = (radiusd.RLM_MODULE_UPDATED, reply, config)
+            else:
+                result = radiusd.RLM_MODULE_OK
+            cache.put(key, result)
+        return result
+
+    def close(self):
+        self.stopped.set()
+        if self.watcher is not None:
+            self.watcher.join()
+        if self.writer is not None:
+            self.writer.close()
+            logger.info("policy: accounting writer %s", self.writer.stats())
+        self.listener.stop()
+        logger.handlers = []
+
+
+module = None
+
+
+def request_list(p):
+    """Return the request tuple of a hook argument.
+
+    Handles the plain request tuple, the pass_all_vps 6-tuple and the
+    pass_all_vps_dict dictionary.
+    """
+    if isinstance(p, dict):
+        return p.get('request') or ()
+    if p and isinstance(p[0], tuple) and p[0] and isinstance(p[0][0], tuple):
+        return p[0]
+    return p or ()
+
+
+def request_attributes(p):
+    """Return the request list of a hook argument as {attribute: value}."""
+    return {item[0]: item[-1][1:-1] if item[-1][:1] == '"' else item[-1] for item in request_list(p)}
+
+
+def instantiate(p):
+    global module
+    try:
+        module = PolicyModule(getattr(radiusd, 'config', None) or {})
+    except (OSError, ValueError) as e:
+        radiusd.radlog(radiusd.L_ERR, f"policy: cannot load users policy: {e}")
+        return -1
+    except sqlite3.Error as e:
+        radiusd.radlog(radiusd.L_ERR, f"policy: cannot open accounting database: {e}")
+        return -1
+    logger.info("policy: %d users loaded from %s", len(module.policy), module.policy.path)
+    return 0
+
+
+def authorize(p):
+    request = request_attributes(p)
+    result = module.decide(request)
+    logger.debug("policy: authorize %s -> %s", request.get('User-Name'), result)
+    return result
+
+
+def post_auth(p):
+    if logger.isEnabledFor(logging.INFO):
+        request = request_attributes(p)
+        logger.info("policy: post_auth %s", request.get('User-Name'))
+    return radiusd.RLM_MODULE_OK
+
+
+def accounting(p):
+    writer = module.writer
+    if writer is not None:
+        # The request tuple is immutable: hand it over as is and let the
+        # writer thread pick the attributes out
+        if not writer.submit(request_list(p)):
+            logger.debug("policy: accounting queue full, record dropped")
+    elif logger.isEnabledFor(logging.DEBUG):
+        request = request_attributes(p)
+        logger.debug("policy: accounting %s %s", request.get('Acct-Status-Type'), request.get('Acct-Session-Id'))
+    return radiusd.RLM_MODULE_OK
+
+
+def detach(p):
+    global module
+    if module is not None:
+        logger.info("policy: cache hits %d, misses %d, log records dropped %d",
+                    module.cache.hits, module.cache.misses, module.log_handler.dropped)
+        module.close()
+        module = None
+    return radiusd.RLM_MODULE_OK
@@ -0,0 +1,207 @@
+#! /usr/bin/env python3
+"""
+FreeRADIUS `users` file parsing and matching for python3 hook modules
+
+Parses the format read by the `files` module (mods-config/files/authorize):
+
+    admin Cleartext-Password := "1234"
+        Reply-Message := "Welcome admin",
+        Service-Type := Administrative-User
+
+    DEFAULT Service-Type != Administrative-User
+        Auth-Type := Reject
+
+and applies it the way rlm_files does: the entries for the user and the
+DEFAULT entries are tried in file order, comparison check items are
+matched against the request, assignment check items go to the control
+(config) list, reply items to the reply, and processing stops at the
+first matching entry without `Fall-Through = Yes`.
+"""
+
+import heapq
+import os
+import re
+from collections import namedtuple
+from operator import itemgetter
+
+UserEntry = namedtuple('UserEntry', ['name', 'check', 'reply', 'fall_through'])
+
+ITEM_PATTERN = re.compile(
+    r'\s*(?P<attr>[\w.:-]+)\s*(?P<op>:=|==|!=|>=|<=|=~|!~|=\*|!\*|\+=|=|>|<)\s*'
+    r'(?P<value>"(?:[^"\\]|\\.)*"|[^,\s]*)\s*(?:,|$)'
+)
+TRAILING_COMMENT = re.compile(r'\s+#[^"]*$')
+COMPARISON_OPERATORS = frozenset(['==', '!=', '>', '<', '>=', '<=', '=~', '!~', '=*', '!*'])
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return value
+
+
+def parse_items(text):
+    """Parse 'Attr op value, Attr op value' into (attr, op, value) tuples."""
+    items = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = ITEM_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"cannot parse attribute list at: {text[position:]!r}")
+        attr, op, value = match.groups()
+        items.append((attr, op, _unquote(value)))
+        position = match.end()
+    return tuple(items)
+
+
+def iter_users_file(lines):
+    """Yield a UserEntry for every entry of a users file, in order."""
+    name = None
+    check = ()
+    reply = []
+    expect_more = False
+    for number, raw in enumerate(lines, 1):
+        line = raw.rstrip()
+        if '#' in line:
+            line = TRAILING_COMMENT.sub('', line)
+            if line.lstrip().startswith('#'):
+                continue
+        if not line.strip():
+            continue
+        if line[0] not in ' \t':
+            if name is not None:
+                yield _entry(name, check, reply)
+            # The name is separated from the check items by spaces or tabs
+            name, *rest = line.split(None, 1)
+            check = parse_items(rest[0]) if rest else ()
+            reply = []
+            expect_more = True
+        elif name is not None and expect_more:
+            reply.extend(parse_items(line))
+            expect_more = line.rstrip().endswith(',')
+        else:
+            raise ValueError(f"line {number}: reply item outside an entry: {raw.strip()!r}")
+    if name is not None:
+        yield _entry(name, check, reply)
+
+
+def _entry(name, check, reply):
+    fall_through = any(attr == 'Fall-Through' and value.lower() in ('yes', '1')
+                       for attr, _, value in reply)
+    reply = tuple(item for item in reply if item[0] != 'Fall-Through')
+    return UserEntry(name, tuple(check), reply, fall_through)
+
+
+def parse_users_file(path):
+    """Return the UserEntry list of a users file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_users_file(f))
+
+
+def _compare(op, actual, expected):
+    if op == '=*':
+        return actual is not None
+    if op == '!*':
+        return actual is None
+    if actual is None:
+        # rlm_files: a comparison with a missing attribute never matches
+        return False
+    if op == '=~':
+        return re.search(expected, actual) is not None
+    if op == '!~':
+        return re.search(expected, actual) is None
+    if actual.isdigit() and expected.isdigit():
+        actual, expected = int(actual), int(expected)
+    if op == '==':
+        return actual == expected
+    if op == '!=':
+        return actual != expected
+    if op == '>':
+        return actual > expected
+    if op == '<':
+        return actual < expected
+    if op == '>=':
+        return actual >= expected
+    return actual <= expected
+
+
+def compare_attributes(entries):
+    """Return the request attributes the check items of entries look at.
+
+    The policy decision for a user only depends on these.
+    """
+    return tuple(sorted({
+        attr for entry in entries for attr, op, _ in entry.check if op in COMPARISON_OPERATORS
+    }))
+
+
+class UserPolicy:
+    """Indexed users-file policy: username -> entries, plus DEFAULT entries in order."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.by_name = {}
+        # (file position, entry) of every DEFAULT entry, in order
+        self.defaults = []
+        for position, entry in enumerate(self.entries):
+            if entry.name == 'DEFAULT':
+                self.defaults.append((position, entry))
+            else:
+                self.by_name.setdefault(entry.name, []).append(position)
+        self.compare_attributes = compare_attributes(self.entries)
+        self.path = None
+        self.stat = None
+
+    @classmethod
+    def from_file(cls, path):
+        st = os.stat(path)
+        policy = cls(parse_users_file(path))
+        policy.path, policy.stat = path, st
+        return policy
+
+    def is_current(self):
+        """Return False once the file the policy was loaded from has been replaced or modified."""
+        if self.path is None:
+            return True
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # Keep serving the loaded policy while the file is being replaced
+            return True
+        return (st.st_ino, st.st_mtime_ns, st.st_size) == \
+            (self.stat.st_ino, self.stat.st_mtime_ns, self.stat.st_size)
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def user_entries(self, username):
+        """Return the (file position, entry) pairs of username's own entries."""
+        return [(position, self.entries[position]) for position in self.by_name.get(username, ())]
+
+    def candidates(self, username):
+        """Return the entries that apply to username, in file order."""
+        own = self.user_entries(username)
+        if not own:
+            return [entry for _, entry in self.defaults]
+        return [entry for _, entry in heapq.merge(own, self.defaults, key=itemgetter(0))]
+
+    def lookup(self, username, request):
+        """Apply the policy to one request ({attribute: value}).
+
+        Returns (matched, reply items, config items), items being
+        (attribute, operator, value) tuples.
+        """
+        reply = []
+        config = []
+        matched = False
+        for entry in self.candidates(username):
+            if not all(_compare(op, request.get(attr), value)
+                       for attr, op, value in entry.check if op in COMPARISON_OPERATORS):
+                continue
+            matched = True
+            config.extend(item for item in entry.check if item[1] not in COMPARISON_OPERATORS)
+            reply.extend(entry.reply)
+            if not entry.fall_through:
+                break
+        return matched, tuple(reply), tuple(config)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Stage timings and throughput counters for RadiusLogMonitor
+
+A PipelineStats object given to RadiusLogMonitor(stats=...) collects:
+
+    stages    cumulative seconds of each parse step (file read, the
+              'Auth:' prefilter, regex, timestamp conversion, DataFrame
+              construction, window filter), timed per chunk, not per line
+    counters  lines, bytes, Auth: lines and regex matches
+    phases    wall time and RSS of each top-level step (reading, the
+              summary, each figure)
+
+report() formats them with lines/s, bytes/s and the match rate;
+as_dict() returns the same numbers for comparing runs.  Monitors built
+without stats use NULL_STATS, whose timers do nothing.
+"""
+
+import os
+import resource
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+
+def peak_rss():
+    """Peak resident set size of this process so far, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss():
+    """Current resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PipelineStats:
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.phases = []
+        self.lines = 0
+        self.bytes = 0
+        self.auth_lines = 0
+        self.matched = 0
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        rss_before = current_rss()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'phase': name,
+                'seconds': time.perf_counter() - started,
+                'rss_before': rss_before,
+                'rss_after': current_rss(),
+                'peak_rss': peak_rss(),
+            })
+
+    def count(self, lines=0, bytes=0, auth_lines=0, matched=0):
+        self.lines += lines
+        self.bytes += bytes
+        self.auth_lines += auth_lines
+        self.matched += matched
+
+    @property
+    def parse_seconds(self):
+        return sum(self.stages.values())
+
+    def as_dict(self):
+        seconds = self.parse_seconds
+        return {
+            'stages': dict(self.stages),
+            'phases': list(self.phases),
+            'lines': self.lines,
+            'bytes': self.bytes,
+            'auth_lines': self.auth_lines,
+            'matched': self.matched,
+            'match_rate': self.matched / self.auth_lines if self.auth_lines else None,
+            'lines_per_second': self.lines / seconds if seconds else None,
+            'bytes_per_second': self.bytes / seconds if seconds else None,
+        }
+
+    def report(self):
+        """Return the stage, throughput and phase figures as printable text."""
+        out = ["=" * 50, "PROFILE", "=" * 50]
+        seconds = self.parse_seconds
+        if self.stages:
+            out.append("Parse stages:")
+            for name, elapsed in self.stages.items():
+                share = elapsed / seconds * 100 if seconds else 0.0
+                out.append(f"  {name:<22} {elapsed:9.3f} s  {share:5.1f}%")
+            out.append(f"  {'total':<22} {seconds:9.3f} s")
+        if self.lines and seconds:
+            out.append(f"Throughput: {self.lines / seconds:,.0f} lines/s, "
+                       f"{self.bytes / seconds / 1e6:,.1f} MB/s "
+                       f"({self.lines:,} lines, {self.bytes / 1e6:,.1f} MB)")
+        if self.auth_lines:
+            out.append(f"Auth: lines: {self.auth_lines:,} of {self.lines:,}, "
+                       f"regex match rate {self.matched / self.auth_lines * 100:.1f}%")
+        if self.phases:
+            out.append("Phases:")
+            for phase in self.phases:
+                rss = ''
+                if phase['rss_after'] is not None:
+                    rss = (f"  RSS {phase['rss_after'] / 1e6:8.1f} MB "
+                           f"({(phase['rss_after'] - phase['rss_before']) / 1e6:+.1f})")
+                out.append(f"  {phase['phase']:<22} {phase['seconds']:9.3f} s{rss}"
+                           f"  peak {phase['peak_rss'] / 1e6:8.1f} MB")
+        return '\n'.join(out)
+
+
+class _NullStats:
+    """Stand-in for PipelineStats that records nothing."""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def phase(self, name):
+        return nullcontext()
+
+    def count(self, lines=0, bytes=0, auth_lines=0, matched=0):
+        pass
+
+
+NULL_STATS = _NullStats()
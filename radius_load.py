@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Concurrent asyncio RADIUS load generator
+
+Keeps many Access-Requests in flight over UDP (up to 256 per socket, one
+RADIUS identifier each) instead of sending them one at a time, in one of
+two modes:
+
+  closed loop  --concurrency N workers, each sending its next request as
+               soon as the previous one is answered or times out
+  open loop    --rate R requests/s on a fixed schedule, whatever the
+               server's response times (--concurrency caps the in-flight
+               requests; requests over the cap are counted as dropped)
+
+Throughput and p50/p95/p99/p99.9 latency are reported per outcome
+(Accept, Reject, Timeout, and Dropped/Error).  --mock starts a local
+responder that knows the users of the repo's `users` file (admin, user1,
+user2), to try it without FreeRADIUS.
+
+    python radius_load.py --mock --requests 20000 --concurrency 128
+    python radius_load.py --server 10.0.0.5 --rate 2000 --duration 30 --user alice:alice123
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import socket
+import time
+from collections import Counter
+
+import pyrad.packet
+from pyrad.packet import AuthPacket
+
+from radius_packets import AccessRequestTemplate, load_dictionary
+
+DEFAULT_USERS = [("admin", "1234"), ("user1", "1234"), ("user2", "1234")]
+
+OUTCOMES = {
+    pyrad.packet.AccessAccept: 'Accept',
+    pyrad.packet.AccessReject: 'Reject',
+    pyrad.packet.AccessChallenge: 'Challenge',
+    pyrad.packet.AccountingResponse: 'Response',
+}
+TIMEOUT = 'Timeout'
+DROPPED = 'Dropped'
+ERROR = 'Error'
+
+# Room for a few thousand queued datagrams; the kernel default drops
+# replies once a few hundred requests are in flight on one socket
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+def _enlarge_buffers(transport):
+    sock = transport.get_extra_info('socket')
+    for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+        except OSError:
+            pass
+
+
+def reply_matches(request_authenticator, secret, data):
+    """Check a reply's Response Authenticator against the request it answers."""
+    expected = hashlib.md5(data[:4] + request_authenticator + data[20:] + secret).digest()
+    return expected == data[4:20]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with about 1% resolution.
+
+    Memory is fixed whatever the number of samples, and histograms from
+    several workers can be merged.
+    """
+
+    BUCKETS_PER_DOUBLING = 64
+    # 1 us .. 2**30 us (~18 minutes)
+    BUCKETS = 30 * BUCKETS_PER_DOUBLING
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log2(micros) * self.BUCKETS_PER_DOUBLING)
+        self.counts[min(index, self.BUCKETS - 1)] += 1
+        self.total += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def percentile(self, q):
+        """Return the q-th percentile (0-100) in seconds."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(q / 100 * self.total)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return 2 ** ((index + 0.5) / self.BUCKETS_PER_DOUBLING) / 1e6
+        return 2 ** (self.BUCKETS / self.BUCKETS_PER_DOUBLING) / 1e6
+
+
+class LoadStats:
+    """Per-outcome request counts and latency histograms."""
+
+    PERCENTILES = (50, 95, 99, 99.9)
+
+    def __init__(self):
+        self.histograms = {}
+        self.counts = Counter()
+        self.started = None
+        self.finished = None
+
+    def record(self, outcome, seconds=None):
+        self.counts[outcome] += 1
+        if seconds is not None:
+            self.histograms.setdefault(outcome, LatencyHistogram()).record(seconds)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        for outcome, histogram in other.histograms.items():
+            self.histograms.setdefault(outcome, LatencyHistogram()).merge(histogram)
+        if other.started is not None:
+            self.started = other.started if self.started is None else min(self.started, other.started)
+        if other.finished is not None:
+            self.finished = other.finished if self.finished is None else max(self.finished, other.finished)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - (self.started or 0)
+
+    def print_report(self, title="RADIUS LOAD TEST"):
+        total = sum(self.counts.values())
+        answered = sum(count for outcome, count in self.counts.items() if outcome not in (TIMEOUT, DROPPED, ERROR))
+        elapsed = self.elapsed or float('nan')
+        print("=" * 66)
+        print(title)
+        print("=" * 66)
+        print(f"Requests: {total} in {elapsed:.2f} s")
+        print(f"Throughput: {total / elapsed:,.0f} req/s sent, {answered / elapsed:,.0f} replies/s")
+        width = max([len('Outcome')] + [len(outcome) for outcome in self.counts]) + 2
+        header = "".join(f"{'p' + format(q, 'g'):>10}" for q in self.PERCENTILES)
+        print(f"{'Outcome':<{width}}{'count':>10}{header}   (ms)")
+        for outcome, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+            histogram = self.histograms.get(outcome)
+            if histogram is None:
+                values = "".join(f"{'-':>10}" for _ in self.PERCENTILES)
+            else:
+                values = "".join(f"{histogram.percentile(q) * 1000:>10.2f}" for q in self.PERCENTILES)
+            print(f"{outcome:<{width}}{count:>10}{values}")
+
+
+class RadiusSocket(asyncio.DatagramProtocol):
+    """One UDP socket with its own 256 RADIUS identifiers.
+
+    id_wait records how long each exchange queued for a free identifier.
+    """
+
+    def __init__(self, secret):
+        self.secret = secret
+        self.transport = None
+        self.free_ids = asyncio.Queue()
+        for ident in range(256):
+            self.free_ids.put_nowait(ident)
+        self.pending = {}
+        self.id_wait = LatencyHistogram()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        _enlarge_buffers(transport)
+
+    def datagram_received(self, data, addr):
+        if len(data) < 20:
+            return
+        entry = self.pending.get(data[1])
+        if entry is None:
+            return
+        authenticator, future = entry
+        # A late reply to an earlier request that reused this identifier
+        # does not verify against the current authenticator: ignore it
+        if not future.done() and reply_matches(authenticator, self.secret, data):
+            future.set_result(data)
+
+    def error_received(self, exc):
+        for _, future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    @classmethod
+    async def connect(cls, server, port, secret):
+        _, protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: cls(secret), remote_addr=(server, port)
+        )
+        return protocol
+
+    def close(self):
+        self.transport.close()
+
+    async def exchange(self, build, timeout):
+        """Send the packet build(ident) returns and wait for its reply.
+
+        Returns (outcome, seconds): the outcome is the reply's name from
+        OUTCOMES, TIMEOUT or ERROR, and seconds is None unless answered.
+        seconds includes the time spent waiting for a free identifier.
+        """
+        start = time.perf_counter()
+        ident = await self.free_ids.get()
+        self.id_wait.record(time.perf_counter() - start)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            raw = build(ident)
+            self.pending[ident] = (raw[4:20], future)
+            self.transport.sendto(raw)
+            try:
+                data = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                return TIMEOUT, None
+            except OSError:
+                # e.g. ICMP port unreachable reported on the socket
+                return ERROR, None
+            return OUTCOMES.get(data[0], f"Code-{data[0]}"), time.perf_counter() - start
+        finally:
+            self.pending.pop(ident, None)
+            self.free_ids.put_nowait(ident)
+
+
+class SocketPool:
+    """RadiusSockets to one server, another one (source port) opened whenever all identifiers are in flight.
+
+    Up to max_sockets are opened; past that, exchanges queue for an
+    identifier on the sockets in turn.
+    """
+
+    def __init__(self, server, port, secret, max_sockets=64):
+        self.server = server
+        self.port = port
+        self.secret = secret
+        self.max_sockets = max_sockets
+        self.sockets = []
+        self._turn = itertools.count()
+        self._opening = asyncio.Lock()
+
+    def _free_socket(self):
+        for sock in self.sockets:
+            if not sock.free_ids.empty():
+                return sock
+        return None
+
+    async def _socket(self):
+        sock = self._free_socket()
+        if sock is not None:
+            return sock
+        # One caller opens the next socket while the others wait for it
+        async with self._opening:
+            sock = self._free_socket()
+            if sock is None and len(self.sockets) < self.max_sockets:
+                sock = await RadiusSocket.connect(self.server, self.port, self.secret)
+                self.sockets.append(sock)
+        return sock or self.sockets[next(self._turn) % len(self.sockets)]
+
+    async def exchange(self, build, timeout):
+        """RadiusSocket.exchange() on a socket with a free identifier."""
+        return await (await self._socket()).exchange(build, timeout)
+
+    @property
+    def id_wait(self):
+        merged = LatencyHistogram()
+        for sock in self.sockets:
+            merged.merge(sock.id_wait)
+        return merged
+
+    def close(self):
+        for sock in self.sockets:
+            sock.close()
+
+
+class RadiusLoadGenerator:
+    """Drive a RADIUS server with concurrent Access-Requests."""
+
+    def __init__(self, server="127.0.0.1", port=1812, secret=b"testing123",
+                 dictionary="dictionary", users=None, concurrency=64, timeout=2.0):
+        self.server = server
+        self.port = port
+        self.secret = secret
+        self.dict = load_dictionary(dictionary)
+        self.template = AccessRequestTemplate(secret, self.dict)
+        self.users = users or DEFAULT_USERS
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.stats = LoadStats()
+        self._sockets = []
+        self._next_user = itertools.cycle(self.users)
+
+    async def _open(self):
+        for _ in range(max(1, math.ceil(self.concurrency / 256))):
+            self._sockets.append(await RadiusSocket.connect(self.server, self.port, self.secret))
+
+    def _close(self):
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+
+    def build_request(self, ident, username, password):
+        """Return the raw Access-Request packet for one login."""
+        return self.template.encode(ident, username, password)[0]
+
+    async def send_one(self, sock):
+        username, password = next(self._next_user)
+        outcome, seconds = await sock.exchange(
+            lambda ident: self.build_request(ident, username, password), self.timeout
+        )
+        self.stats.record(outcome, seconds)
+
+    async def run_closed_loop(self, requests=None, duration=None):
+        """Keep `concurrency` requests in flight until `requests` are sent or `duration` elapses."""
+        await self._open()
+        counter = itertools.count()
+        deadline = time.perf_counter() + duration if duration else None
+
+        async def worker(sock):
+            while True:
+                if requests is not None and next(counter) >= requests:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                await self.send_one(sock)
+
+        self.stats.started = time.perf_counter()
+        try:
+            await asyncio.gather(*(
+                worker(self._sockets[i % len(self._sockets)]) for i in range(self.concurrency)
+            ))
+        finally:
+            self.stats.finished = time.perf_counter()
+            self._close()
+        return self.stats
+
+    async def run_open_loop(self, rate, duration):
+        """Send `rate` requests per second for `duration` seconds."""
+        await self._open()
+        in_flight = set()
+        sockets = itertools.cycle(self._sockets)
+        total = int(rate * duration)
+        self.stats.started = start = time.perf_counter()
+        try:
+            sent = 0
+            while sent < total:
+                # Send every request that is due, then sleep until the next one
+                due = min(total, int((time.perf_counter() - start) * rate) + 1)
+                while sent < due:
+                    sent += 1
+                    if len(in_flight) >= self.concurrency:
+                        self.stats.record(DROPPED)
+                        continue
+                    task = asyncio.ensure_future(self.send_one(next(sockets)))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            self.stats.finished = time.perf_counter()
+            self._close()
+        return self.stats
+
+
+class MockRadiusResponder(asyncio.DatagramProtocol):
+    """Minimal RADIUS server for offline load tests.
+
+    Accepts Access-Requests whose password matches `users`, rejects the
+    rest, and acknowledges every Accounting-Request.  `delay` adds a fixed
+    service time per request.
+    """
+
+    def __init__(self, secret=b"testing123", dictionary="dictionary", users=None, delay=0.0):
+        self.secret = secret
+        self.dict = load_dictionary(dictionary)
+        self.users = dict(users or DEFAULT_USERS)
+        self.delay = delay
+        self.transport = None
+        self.requests = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        _enlarge_buffers(transport)
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        reply = self.reply_to(data)
+        if reply is None:
+            return
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, reply, addr)
+        else:
+            self.transport.sendto(reply, addr)
+
+    def reply_to(self, data):
+        try:
+            if data[0] == pyrad.packet.AccountingRequest:
+                request = pyrad.packet.AcctPacket(packet=data, secret=self.secret, dict=self.dict)
+                reply = request.CreateReply()
+                reply.code = pyrad.packet.AccountingResponse
+                return reply.ReplyPacket()
+            request = AuthPacket(packet=data, secret=self.secret, dict=self.dict)
+            username = request[1][0].decode() if 1 in request else ''
+            password = request.PwDecrypt(request[2][0]) if 2 in request else ''
+        except Exception:
+            return None
+        reply = request.CreateReply()
+        accepted = username in self.users and self.users[username] == password
+        reply.code = pyrad.packet.AccessAccept if accepted else pyrad.packet.AccessReject
+        return reply.ReplyPacket()
+
+
+async def start_mock_responder(host="127.0.0.1", port=0, **kwargs):
+    """Start a MockRadiusResponder; returns (transport, protocol, bound port)."""
+    transport, protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: MockRadiusResponder(**kwargs), local_addr=(host, port)
+    )
+    return transport, protocol, transport.get_extra_info('sockname')[1]
+
+
+async def run_load(args):
+    secret = args.secret.encode()
+    users = [tuple(user.split(':', 1)) for user in args.user] if args.user else None
+    mock = None
+    port = args.port
+    if args.mock:
+        mock, _, port = await start_mock_responder(
+            args.server, 0, secret=secret, dictionary=args.dictionary, delay=args.mock_delay / 1000
+        )
+        print(f"Mock RADIUS responder listening on {args.server}:{port}")
+
+    generator = RadiusLoadGenerator(
+        server=args.server, port=port, secret=secret, dictionary=args.dictionary,
+        users=users, concurrency=args.concurrency, timeout=args.timeout,
+    )
+    try:
+        if args.rate:
+            stats = await generator.run_open_loop(args.rate, args.duration or 10)
+        else:
+            stats = await generator.run_closed_loop(
+                requests=args.requests if not args.duration else None, duration=args.duration
+            )
+    finally:
+        if mock:
+            mock.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent RADIUS load generator')
+    parser.add_argument('--server', default='127.0.0.1', help='RADIUS server address')
+    parser.add_argument('--port', type=int, default=1812, help='Authentication port (default: 1812)')
+    parser.add_argument('--secret', default='testing123', help='Shared secret')
+    parser.add_argument('--dictionary', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dictionary'),
+                       help='RADIUS dictionary file')
+    parser.add_argument('--user', action='append', metavar='NAME:PASSWORD',
+                       help='Credentials to cycle through (repeatable; default: users from the users file)')
+    parser.add_argument('--concurrency', type=int, default=64,
+                       help='Requests kept in flight (closed loop) or in-flight cap (open loop)')
+    parser.add_argument('--requests', type=int, default=10000,
+                       help='Closed loop: number of requests to send (default: 10000)')
+    parser.add_argument('--duration', type=float,
+                       help='Seconds to run (closed loop: instead of --requests; open loop default: 10)')
+    parser.add_argument('--rate', type=float,
+                       help='Open loop: target requests per second')
+    parser.add_argument('--timeout', type=float, default=2.0, help='Reply timeout in seconds (default: 2)')
+    parser.add_argument('--mock', action='store_true', help='Start a local mock responder and test against it')
+    parser.add_argument('--mock-delay', type=float, default=0.0,
+                       help='Mock responder service time in milliseconds')
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load(args))
+    stats.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,237 @@
 import re
+import logging
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from pandas.api.types import union_categoricals
 from datetime import datetime
-import seaborn as sns
-from collections import Counter
 import argparse
-import time
+import cProfile
 import os
+import glob
+import json
+from itertools import islice
+
+from auth_filter import AuthFilter
+from profiling import NULL_STATS, PipelineStats
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%a %b %d %H:%M:%S %Y'
+AUTH_PATTERN = (
+    r'(?P<timestamp>\w+\s+\w+\s+\d+\s+\d+:\d+:\d+\s+\d+)\s*:\s*Auth:\s*\(\d+\)\s*(?P<status>.*?):\s*\[(?P<username>[^\]]+)\]'
+)
+# --result values and the auth_result they select
+RESULT_NAMES = {'success': 'Success', 'failed': 'Failed'}
+AUTH_COLUMNS = ['timestamp', 'username', 'status', 'auth_result', 'request_type']
+CATEGORY_COLUMNS = ['username', 'status', 'auth_result', 'request_type']
+
+
+def compact_auth_frame(df):
+    """Convert an auth event frame to the compact schema.
+
+    The string columns become categoricals (for usernames this interns every
+    distinct name once behind integer codes), the timestamp is stored with
+    second resolution, and a boolean `success` column is added.
+    """
+    if df.empty:
+        return df
+    df = df.astype({column: 'category' for column in CATEGORY_COLUMNS})
+    df['timestamp'] = df['timestamp'].astype('datetime64[s]')
+    df['success'] = (df['auth_result'] == 'Success').to_numpy()
+    return df
+
+
+def expand_auth_frame(df):
+    """Convert a compact auth event frame back to plain object columns."""
+    if df.empty or 'success' not in df:
+        return df
+    df = df.drop(columns='success')
+    return df.astype({column: object for column in CATEGORY_COLUMNS})
+
+
+def concat_auth_frames(frames):
+    """Concatenate compact auth event frames, merging their categories."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for column in frames[0].columns:
+        if column in CATEGORY_COLUMNS:
+            columns[column] = union_categoricals([frame[column] for frame in frames])
+        else:
+            columns[column] = np.concatenate([frame[column].to_numpy() for frame in frames])
+    return pd.DataFrame(columns)
+
+
+def drop_unused_categories(df):
+    """Forget categories no longer used after rows have been filtered out."""
+    if df.empty:
+        return df
+    return df.assign(**{column: df[column].cat.remove_unused_categories()
+                        for column in CATEGORY_COLUMNS})
+
+
+def bytes_per_event(df):
+    """Return the deep in-memory size of df divided by its row count."""
+    if df.empty:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / len(df)
+
+
+class IncrementalLogReader:
+    """Read only the bytes appended to a log file since the previous call.
+
+    The reader keeps the file open between calls and remembers the byte
+    offset and inode of the last read.  A rename-style rotation is detected
+    by an inode change (the rest of the old file is drained first), and a
+    truncate/copytruncate rotation by the file shrinking below the offset
+    or by its first bytes changing.
+
+    With autosave=False the checkpoint is only written by save_checkpoint(),
+    so a caller can persist it once the lines it got have been stored.
+    """
+
+    HEAD_BYTES = 64
+
+    def __init__(self, path, checkpoint_path=None, autosave=True):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.autosave = autosave
+        self.inode = None
+        self.offset = 0
+        self._file = None
+        self._partial = b''
+        self._head = b''
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'r') as fh:
+                state = json.load(fh)
+            self.inode = state.get('inode')
+            self.offset = state.get('offset', 0)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.checkpoint_path, e)
+
+    @property
+    def committed_offset(self):
+        """Offset of the first line not yet returned, as save_checkpoint records it."""
+        return max(self.offset - len(self._partial), 0)
+
+    def save_checkpoint(self):
+        """Persist the offset of the first line not yet returned."""
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump({'inode': self.inode, 'offset': self.committed_offset}, fh)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _open(self, st):
+        if self._file:
+            self._file.close()
+        self._file = open(self.path, 'rb')
+        if self.inode != st.st_ino or st.st_size < self.offset:
+            # New file, or a checkpoint that no longer matches it
+            self.offset = 0
+        self.inode = st.st_ino
+        self._file.seek(self.offset)
+        self._partial = b''
+        self._head = self._read_head()
+
+    def skip_existing(self):
+        """Start after the file's current content, as `tail -f` does."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        self.inode = st.st_ino
+        self.offset = st.st_size
+        self._open(st)
+
+    def _read_head(self):
+        return os.pread(self._file.fileno(), self.HEAD_BYTES, 0)
+
+    def _was_truncated(self, st):
+        if st.st_size < self.offset:
+            return True
+        # A copytruncate followed by enough new writes hides the shrink;
+        # a changed first line still gives it away.
+        head = self._read_head()
+        if head[:len(self._head)] != self._head:
+            return True
+        self._head = head
+        return False
+
+    def _drain(self, max_bytes=-1):
+        data = self._file.read(max_bytes)
+        self.offset += len(data)
+        return data
+
+    def read_new_lines(self, max_bytes=None):
+        """Return the complete lines appended since the last call.
+
+        max_bytes caps how much of the file one call reads, so a large
+        backlog can be consumed in bounded-memory batches.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            # Between logrotate's rename and the daemon reopening its log
+            return []
+
+        lines = []
+        if self._file is None:
+            self._open(st)
+        elif st.st_ino != self.inode:
+            # Renamed away: finish the old file before following the new one.
+            # Its last line ends with the file, terminated or not.
+            lines = (self._partial + self._drain()).split(b'\n')
+            if not lines[-1]:
+                lines.pop()
+            self.offset = 0
+            self._open(st)
+        elif self._was_truncated(st):
+            # Truncated in place (copytruncate)
+            self.offset = 0
+            self._file.seek(0)
+            self._partial = b''
+            self._head = self._read_head()
+
+        new_lines = (self._partial + self._drain(max_bytes or -1)).split(b'\n')
+        # Keep an unterminated last line until the writer finishes it
+        self._partial = new_lines.pop()
+        lines.extend(new_lines)
+        if self.autosave:
+            self.save_checkpoint()
+        return [line.decode('utf-8', errors='replace') for line in lines]
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
 
 class RadiusLogMonitor:
-    def __init__(self, log_file_path="./logs/radius.log"):
+    CHUNK_LINES = 500_000
+
+    def __init__(self, log_file_path="./logs/radius.log", store_path=None, workers=1, stats=None):
+        # A file, or a directory or glob of rotated/compressed logs
         self.log_file_path = log_file_path
-        self.auth_pattern = re.compile(
-            r'(?P<timestamp>\w+\s+\w+\s+\d+\s+\d+:\d+:\d+\s+\d+)\s*:\s*Auth:\s*\(\d+\)\s*(?P<status>.*?):\s*\[(?P<username>[^\]]+)\]'
-        )
+        # Directory of an EventStore to read from instead of the text log
+        self.store_path = store_path
+        # Processes read_logs may use (see log_archive); None uses them all
+        # for a directory, glob or compressed log, and none for a plain file
+        self.workers = workers
+        # A profiling.PipelineStats collecting stage timings, if profiling
+        self.stats = stats or NULL_STATS
+        self.auth_pattern = re.compile(AUTH_PATTERN)
+        self._reader = None
+        self._aggregator = None
         
     def parse_log_line(self, line):
         """Parse a single log line and extract relevant information."""
@@ -26,9 +243,9 @@ class RadiusLogMonitor:
             
             # Parse timestamp
             try:
-                timestamp = datetime.strptime(timestamp_str, '%a %b %d %H:%M:%S %Y')
+                timestamp = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
             except ValueError:
-                print(f"Failed to parse timestamp: {timestamp_str}")
+                logger.debug("Failed to parse timestamp: %s", timestamp_str)
                 return None
                 
             # Determine if login was successful or failed
@@ -42,223 +259,582 @@ class RadiusLogMonitor:
                 'request_type': 'Auth'
             }
         else:
-            print(f"No match for line: {line.strip()}")
+            logger.debug("No match for line: %s", line.strip())
         return None
-    
-    def read_logs(self, since_hours=24):
-        """Read and parse log file for authentication entries."""
-        auth_logs = []
-        if not os.path.exists(self.log_file_path):
+
+    def parse_lines(self, lines):
+        """Parse a batch of log lines into a DataFrame in one columnar pass.
+
+        Equivalent to calling parse_log_line on every line, but the regex
+        groups go straight into three column tuples and the timestamps are
+        converted with one to_datetime call, without building a dict per row.
+        (Series.str.extract does the same but is about twice as slow on
+        object strings.)
+        """
+        stats = self.stats
+        search = self.auth_pattern.search
+        with stats.stage('Auth: prefilter'):
+            auth_lines = [line for line in lines if 'Auth:' in line]
+        with stats.stage('regex'):
+            matches = [search(line) for line in auth_lines]
+            if logger.isEnabledFor(logging.DEBUG):
+                for line, match in zip(auth_lines, matches):
+                    if match is None:
+                        logger.debug("No match for line: %s", line.strip())
+            rows = [match.groups() for match in matches if match is not None]
+        stats.count(auth_lines=len(auth_lines), matched=len(rows))
+        if not rows:
+            return pd.DataFrame(columns=AUTH_COLUMNS)
+        ts_strings, statuses, usernames = zip(*rows)
+
+        # A busy log repeats the same second and the same status text many
+        # times, so convert each distinct value once and broadcast back.
+        with stats.stage('timestamps'):
+            ts_codes, ts_values = pd.factorize(np.asarray(ts_strings, dtype=object))
+            timestamps = pd.to_datetime(pd.Series(ts_values), format=TIMESTAMP_FORMAT, errors='coerce')
+            timestamps = timestamps.take(ts_codes).reset_index(drop=True)
+
+        with stats.stage('DataFrame'):
+            status_codes, status_values = pd.factorize(np.asarray(statuses, dtype=object))
+            status_values = pd.Series(status_values).str.strip()
+            success = status_values.str.contains('Login OK|Access-Accept', regex=True).to_numpy()
+
+            df = pd.DataFrame({
+                'timestamp': timestamps,
+                'username': np.asarray(usernames, dtype=object),
+                'status': status_values.take(status_codes).to_numpy(),
+                'auth_result': np.where(success[status_codes], 'Success', 'Failed').astype(object),
+                'request_type': 'Auth',
+            })
+            valid = df['timestamp'].notna()
+            if not valid.all():
+                logger.debug("Failed to parse %d timestamps", (~valid).sum())
+                df = df[valid]
+            return compact_auth_frame(df.reset_index(drop=True))
+
+    def _read_parsed_lines(self, file):
+        """Yield the parsed dict of every Auth: line, one line at a time."""
+        for line in file:
+            if 'Auth:' in line:
+                parsed = self.parse_log_line(line)
+                logger.debug("%s --------", parsed)
+                if parsed:
+                    yield parsed
+
+    def _read_parsed_chunks(self, file):
+        """Yield one parsed DataFrame per CHUNK_LINES lines of the file."""
+        while True:
+            with self.stats.stage('file read'):
+                chunk = list(islice(file, self.CHUNK_LINES))
+            if not chunk:
+                break
+            self.stats.count(lines=len(chunk))
+            yield self.parse_lines(chunk)
+
+    def read_logs(self, since_hours=24, vectorized=True, compact=True, usernames=None, seek=True,
+                  nases=None, results=None, statuses=None, since=None, until=None):
+        """Read and parse log file for authentication entries.
+
+        With vectorized=True (the default) the file is parsed in chunks by
+        parse_lines; vectorized=False keeps the original line-by-line path.
+        With seek=True and since_hours, parsing starts at the first line of
+        the window, found by a binary search on the memory-mapped log
+        (log_archive.seek_time); seek=False parses the whole file.
+        compact=True returns the memory-compact schema (see
+        compact_auth_frame), compact=False plain object columns.
+
+        usernames, nases, results ('Success', 'Failed') and statuses (texts
+        the status contains), if given, keep only the matching events, and
+        since / until (datetimes; since replaces since_hours) bound the
+        window.  With any of these but since, the log is read as bytes and
+        lines that can't match are dropped before they are decoded or
+        parsed (see auth_filter), and a plain file is only read up to the
+        end of the window.
+
+        When the monitor has a store_path, events come from that EventStore
+        instead and only the partitions inside the window are read.  When
+        log_file_path is a directory or glob, or the log is compressed, or
+        workers > 1, the files overlapping the window are parsed in
+        parallel by log_archive.read_log_files; a single plain file is only
+        split across processes when workers > 1 asks for it.
+        """
+        stats = self.stats
+        if since is None and since_hours:
+            since = datetime.now() - pd.Timedelta(hours=since_hours)
+        auth_filter = AuthFilter(usernames, nases, results, statuses, since, until)
+        if self.store_path:
+            from event_store import EventStore
+            if nases is not None:
+                logger.warning("The event store doesn't record NASes; ignoring the NAS filter")
+            with stats.stage('event store read'):
+                df = EventStore(self.store_path).read(start=since, end=until, usernames=usernames)
+                kept = auth_filter.apply(df)
+                if kept is not df:
+                    df = drop_unused_categories(kept)
+            return df if compact else expand_auth_frame(df)
+
+        single_file = os.path.isfile(self.log_file_path) and not self.log_file_path.endswith(('.gz', '.bz2', '.xz'))
+        if not single_file and not glob.glob(self.log_file_path):
             print(f"Log file not found: {self.log_file_path}")
             return pd.DataFrame()
-        
+
         try:
-            with open(self.log_file_path, 'r') as file:
-                for line in file:
-                    if 'Auth:' in line:
-                        parsed = self.parse_log_line(line)
-                        print(f'{parsed} --------')
-                        if parsed:
-                            auth_logs.append(parsed)
+            if vectorized and (not single_file or (self.workers or 1) > 1):
+                from log_archive import read_log_files
+                # The stages run in the worker processes and are not broken down
+                with stats.stage('parallel parse'):
+                    df = read_log_files(self.log_file_path, workers=self.workers, auth_filter=auth_filter)
+            elif vectorized and (auth_filter.selective or until is not None):
+                from log_archive import read_log_files
+                with stats.stage('filtered scan'):
+                    df = read_log_files(self.log_file_path, workers=1, auth_filter=auth_filter)
+            else:
+                offset = 0
+                if seek and since is not None:
+                    from log_archive import seek_time
+                    with stats.stage('seek'):
+                        offset = seek_time(self.log_file_path, since)
+                stats.count(bytes=os.path.getsize(self.log_file_path) - offset)
+                with open(self.log_file_path, 'r') as file:
+                    file.seek(offset)
+                    if vectorized:
+                        chunks = list(self._read_parsed_chunks(file))
+                        with stats.stage('DataFrame'):
+                            df = concat_auth_frames(chunks)
+                    else:
+                        if nases is not None:
+                            # The NAS is only on the raw line
+                            file = (line for line in file if auth_filter.lines(line.encode('utf-8')))
+                        with stats.stage('line-by-line parse'):
+                            df = compact_auth_frame(pd.DataFrame(list(self._read_parsed_lines(file))))
         except Exception as e:
             print(f"Error reading log file: {e}")
             return pd.DataFrame()
-            
-        df = pd.DataFrame(auth_logs)
         
         if not df.empty:
-            # Filter by time if specified
-            if since_hours:
-                cutoff_time = datetime.now() - pd.Timedelta(hours=since_hours)
-                df = df[df['timestamp'] >= cutoff_time]
-                
+            # Filter by time and the other criteria, if specified
+            with stats.stage('window filter'):
+                kept = auth_filter.apply(df)
+                if kept is not df:
+                    df = drop_unused_categories(kept)
+
+        if not compact:
+            df = expand_auth_frame(df)
         return df
-    
-    def create_timeline_plot(self, df):
-        """Create a timeline plot of authentication attempts."""
+
+    def read_new_logs(self, since_hours=1, checkpoint_path=None):
+        """Fold newly appended lines into a rolling window and return it.
+
+        The window is a StreamingAggregator over the last since_hours.  The
+        first call reads the file from the start (or from the checkpoint);
+        later calls cost time proportional to the new traffic only.
+        """
+        if self._reader is None:
+            from stream_aggregator import StreamingAggregator
+
+            self._reader = IncrementalLogReader(self.log_file_path, checkpoint_path)
+            self._aggregator = StreamingAggregator(window_minutes=since_hours * 60)
+
+        try:
+            self._aggregator.update(self.parse_lines(self._reader.read_new_lines()))
+        except OSError as e:
+            print(f"Error reading log file: {e}")
+        self._aggregator.expire(datetime.now())
+        return self._aggregator
+
+    def read_lines(self, usernames=None, nases=None, results=None, statuses=None,
+                   since_hours=24, since=None, until=None, index_dir=None):
+        """Yield the raw log lines of usernames and/or nases that pass the other filters.
+
+        The lines are found through the per-file line indexes (see
+        log_index), which are brought up to date first, so only the
+        matching lines are read and parsed.  The filters are read_logs'.
+        """
+        from log_index import find_lines
+
+        if since is None and since_hours:
+            since = datetime.now() - pd.Timedelta(hours=since_hours)
+        auth_filter = AuthFilter(usernames, nases, results, statuses, since, until)
+        for _, line in find_lines(self.log_file_path, usernames or (), nases or (), index_dir,
+                                  since=since, until=until):
+            event = self.parse_log_line(line)
+            if event and auth_filter.matches(event):
+                yield line
+
+    def events(self):
+        """Return the events of radius.log merged in time order with the linelog files next to it.
+
+        The timestamped linelog files (linelog-events*,
+        linelog-accounting-events*) in the log's directory are merged in
+        lazily (see event_stream); sources without a file are left out.
+        """
+        from event_stream import PARSERS, log_dir_sources, merge_events
+
+        log_dir = (self.log_file_path if os.path.isdir(self.log_file_path)
+                   else os.path.dirname(self.log_file_path) or '.')
+        sources = {self.log_file_path: PARSERS['radius']}
+        sources.update(log_dir_sources(log_dir, ['linelog', 'linelog-accounting']))
+        return merge_events(sources)
+
+    def aggregate(self, df):
+        """Return the AuthAggregates every report of df is built from (see auth_aggregates)."""
+        from auth_aggregates import aggregate_auth_events
+        with self.stats.phase('aggregate'):
+            return aggregate_auth_events(df)
+
+    def create_timeline_plot(self, df, aggregates=None):
+        """Create a timeline plot of authentication attempts.
+
+        aggregates, if given, are self.aggregate(df), shared with the other
+        reports of df; the same goes for the other create_* methods and
+        print_summary.
+        """
         if df.empty:
             print("No data to plot")
             return
-            
-        plt.figure(figsize=(15, 8))
-        
-        # Separate successful and failed attempts
-        success_df = df[df['auth_result'] == 'Success']
-        failed_df = df[df['auth_result'] == 'Failed']
-        
-        plt.subplot(2, 1, 1)
-        if not success_df.empty:
-            plt.scatter(success_df['timestamp'], success_df['username'], 
-                       color='green', alpha=0.7, label='Successful', s=50)
-        if not failed_df.empty:
-            plt.scatter(failed_df['timestamp'], failed_df['username'], 
-                       color='red', alpha=0.7, label='Failed', s=50)
-        
-        plt.title('FreeRADIUS Authentication Timeline')
-        plt.xlabel('Time')
-        plt.ylabel('Username')
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.grid(True, alpha=0.3)
-        
-        # Authentication attempts over time
-        plt.subplot(2, 1, 2)
-        df_hourly = df.set_index('timestamp').resample('H').size()
-        plt.plot(df_hourly.index, df_hourly.values, marker='o', linewidth=2)
-        plt.title('Authentication Attempts per Hour')
-        plt.xlabel('Time')
-        plt.ylabel('Number of Attempts')
-        plt.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
+
+        import matplotlib.pyplot as plt
+        from auth_report import draw_timeline, timeline_data
+        aggregates = aggregates or self.aggregate(df)
+        with self.stats.phase('timeline plot'):
+            draw_timeline(plt.figure(figsize=(15, 8)), timeline_data(aggregates))
         plt.show()
     
-    def create_user_analysis(self, df):
+    def create_user_analysis(self, df, aggregates=None):
         """Create user-based analysis plots."""
         if df.empty:
             print("No data to analyze")
             return
-            
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-        
-        # Most active users
-        user_counts = df['username'].value_counts().head(10)
-        axes[0, 0].bar(user_counts.index, user_counts.values)
-        axes[0, 0].set_title('Top 10 Most Active Users')
-        axes[0, 0].set_xlabel('Username')
-        axes[0, 0].set_ylabel('Authentication Attempts')
-        axes[0, 0].tick_params(axis='x', rotation=45)
-        
-        # Success vs Failed ratio
-        auth_results = df['auth_result'].value_counts()
-        colors = ['green' if x == 'Success' else 'red' for x in auth_results.index]
-        axes[0, 1].pie(auth_results.values, labels=auth_results.index, 
-                       autopct='%1.1f%%', colors=colors)
-        axes[0, 1].set_title('Authentication Success Rate')
-        
-        # Failed attempts by user
-        failed_users = df[df['auth_result'] == 'Failed']['username'].value_counts().head(10)
-        if not failed_users.empty:
-            axes[1, 0].bar(failed_users.index, failed_users.values, color='red', alpha=0.7)
-            axes[1, 0].set_title('Top 10 Users with Failed Attempts')
-            axes[1, 0].set_xlabel('Username')
-            axes[1, 0].set_ylabel('Failed Attempts')
-            axes[1, 0].tick_params(axis='x', rotation=45)
-        
-        # Authentication attempts by hour of day
-        df['hour'] = df['timestamp'].dt.hour
-        hourly_attempts = df['hour'].value_counts().sort_index()
-        axes[1, 1].plot(hourly_attempts.index, hourly_attempts.values, marker='o')
-        axes[1, 1].set_title('Authentication Attempts by Hour of Day')
-        axes[1, 1].set_xlabel('Hour')
-        axes[1, 1].set_ylabel('Number of Attempts')
-        axes[1, 1].grid(True, alpha=0.3)
-        
-        plt.tight_layout()
+
+        import matplotlib.pyplot as plt
+        from auth_report import draw_users, users_data
+        aggregates = aggregates or self.aggregate(df)
+        with self.stats.phase('user analysis'):
+            draw_users(plt.figure(figsize=(15, 10)), users_data(aggregates))
         plt.show()
     
-    def create_heatmap(self, df):
+    def create_heatmap(self, df, aggregates=None):
         """Create a heatmap of authentication attempts."""
         if df.empty:
             print("No data for heatmap")
             return
-            
-        # Create hour and day columns
-        df['hour'] = df['timestamp'].dt.hour
-        df['day'] = df['timestamp'].dt.day_name()
-        
-        # Create pivot table for heatmap
-        heatmap_data = df.groupby(['day', 'hour']).size().unstack(fill_value=0)
-        
-        # Reorder days
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = heatmap_data.reindex([day for day in day_order if day in heatmap_data.index])
-        
-        plt.figure(figsize=(15, 6))
-        sns.heatmap(heatmap_data, cmap='YlOrRd', annot=True, fmt='d', cbar_kws={'label': 'Authentication Attempts'})
-        plt.title('Authentication Attempts Heatmap (Day vs Hour)')
-        plt.xlabel('Hour of Day')
-        plt.ylabel('Day of Week')
-        plt.tight_layout()
+
+        import matplotlib.pyplot as plt
+        from auth_report import draw_heatmap, heatmap_data
+        aggregates = aggregates or self.aggregate(df)
+        with self.stats.phase('heatmap'):
+            draw_heatmap(plt.figure(figsize=(15, 6)), heatmap_data(aggregates))
         plt.show()
     
-    def print_summary(self, df):
+    def print_summary(self, df, aggregates=None):
         """Print a summary of the authentication logs."""
         if df.empty:
             print("No authentication data found")
             return
-            
+
+        aggregates = aggregates or self.aggregate(df)
         print("=" * 50)
         print("FREERADIUS AUTHENTICATION LOG SUMMARY")
         print("=" * 50)
-        print(f"Total authentication attempts: {len(df)}")
-        print(f"Successful authentications: {len(df[df['auth_result'] == 'Success'])}")
-        print(f"Failed authentications: {len(df[df['auth_result'] == 'Failed'])}")
-        print(f"Success rate: {len(df[df['auth_result'] == 'Success']) / len(df) * 100:.1f}%")
-        print(f"Unique users: {df['username'].nunique()}")
-        print(f"Time range: {df['timestamp'].min()} to {df['timestamp'].max()}")
+        print(f"Total authentication attempts: {aggregates.total}")
+        print(f"Successful authentications: {aggregates.successful}")
+        print(f"Failed authentications: {aggregates.failed}")
+        print(f"Success rate: {aggregates.success_rate * 100:.1f}%")
+        print(f"Unique users: {aggregates.unique_users}")
+        print(f"Time range: {aggregates.start} to {aggregates.end}")
         print()
         
         print("Top 5 most active users:")
-        print(df['username'].value_counts().head().to_string())
+        print(aggregates.top_users().to_string())
         print()
         
         print("Top 5 users with failed attempts:")
-        failed_users = df[df['auth_result'] == 'Failed']['username'].value_counts()
+        failed_users = aggregates.top_failed_users()
         if not failed_users.empty:
-            print(failed_users.head().to_string())
+            print(failed_users.to_string())
         else:
             print("No failed attempts found")
     
-    def monitor_live(self, interval=60):
-        """Monitor logs in real-time and update visualizations."""
-        print(f"Starting live monitoring of {self.log_file_path}")
-        print(f"Updating every {interval} seconds. Press Ctrl+C to stop.")
-        
+    def summary(self, df, top=5, aggregates=None):
+        """Return the figures of print_summary as a JSON-serializable dict."""
+        if df.empty:
+            return {'total': 0, 'successful': 0, 'failed': 0, 'success_rate': None, 'unique_users': 0,
+                    'time_range': None, 'top_users': {}, 'top_failed_users': {}}
+        aggregates = aggregates or self.aggregate(df)
+        return {
+            'total': aggregates.total,
+            'successful': aggregates.successful,
+            'failed': aggregates.failed,
+            'success_rate': aggregates.success_rate,
+            'unique_users': aggregates.unique_users,
+            'time_range': [aggregates.start.isoformat(), aggregates.end.isoformat()],
+            'top_users': {user: int(count) for user, count in aggregates.top_users(top).items()},
+            'top_failed_users': {user: int(count) for user, count in aggregates.top_failed_users(top).items()},
+        }
+
+    def print_memory_report(self, df):
+        """Print the in-memory cost per event of the compact and the plain schema."""
+        if df.empty:
+            print("No authentication data found")
+            return
+
+        compact_size = bytes_per_event(df)
+        plain_size = bytes_per_event(expand_auth_frame(df))
+        print("Memory per event:")
+        print(f"  object schema:  {plain_size:8.1f} bytes")
+        print(f"  compact schema: {compact_size:8.1f} bytes ({plain_size / compact_size:.1f}x smaller)")
+
+    def create_rate_plot(self, aggregator, show=True):
+        """Plot per-minute and per-hour attempt counts kept by a StreamingAggregator."""
+        if not aggregator.total:
+            print("No data to plot")
+            return
+
+        import matplotlib.pyplot as plt
+        plt.figure('FreeRADIUS live', figsize=(15, 8))
+        plt.clf()
+
+        per_minute = aggregator.minute_counts()
+        plt.subplot(2, 1, 1)
+        plt.plot(per_minute.index, per_minute['success'], color='green', label='Successful')
+        plt.plot(per_minute.index, per_minute['failed'], color='red', label='Failed')
+        plt.title('Authentication Attempts per Minute')
+        plt.xlabel('Time')
+        plt.ylabel('Number of Attempts')
+        plt.legend()
+        plt.xticks(rotation=45)
+        plt.grid(True, alpha=0.3)
+
+        per_hour = aggregator.hourly_counts()
+        plt.subplot(2, 1, 2)
+        plt.plot(per_hour.index, per_hour.values, marker='o', linewidth=2)
+        plt.title('Authentication Attempts per Hour')
+        plt.xlabel('Time')
+        plt.ylabel('Number of Attempts')
+        plt.grid(True, alpha=0.3)
+        plt.xticks(rotation=45)
+
+        plt.tight_layout()
+        if show:
+            plt.show()
+
+    def monitor_live(self, interval=60, refresh_interval=1.0, poll_interval=1.0):
+        """Monitor logs in real-time and update visualizations.
+
+        New lines are parsed as soon as they are written (see
+        log_watcher.follow: inotify, or polling every poll_interval where
+        it isn't available) and folded into a StreamingAggregator over the
+        last hour instead of a raw DataFrame.  The summary and plot are
+        refreshed at most once per refresh_interval while lines arrive, and
+        every `interval` seconds while the log is idle.
+        """
+        import asyncio
+
+        import matplotlib.pyplot as plt
+        from log_watcher import LogWatcher, follow
+        from stream_aggregator import StreamingAggregator
+
+        aggregator = StreamingAggregator(window_minutes=60)  # Last hour
+
+        def on_lines(lines):
+            aggregator.update(self.parse_lines(lines))
+
+        def on_refresh():
+            aggregator.expire(datetime.now())
+            if aggregator.total:
+                aggregator.print_summary()
+                self.create_rate_plot(aggregator, show=False)
+                # Draw without blocking the event loop
+                plt.pause(0.001)
+
+        watcher = LogWatcher(self.log_file_path, poll_interval)
+        print(f"Starting live monitoring of {self.log_file_path} ({watcher.mode})")
+        print(f"Refreshing on new lines (at most every {refresh_interval:g} s) and every "
+              f"{interval} seconds when idle. Press Ctrl+C to stop.")
         try:
-            while True:
-                df = self.read_logs(since_hours=1)  # Last hour
-                if not df.empty:
-                    plt.clf()
-                    self.create_timeline_plot(df)
-                    plt.pause(1)
-                
-                time.sleep(interval)
+            asyncio.run(follow(self.log_file_path, on_lines, on_refresh, refresh_interval,
+                               interval, poll_interval, watcher))
         except KeyboardInterrupt:
             print("\nStopping live monitoring...")
 
+    def serve_metrics(self, address, poll_interval=1.0):
+        """Serve Prometheus metrics of the newly logged lines over HTTP (see metrics_exporter)."""
+        from metrics_exporter import serve
+
+        serve(self.log_file_path, address, poll_interval)
+
+def event_filters(args):
+    """Return the read_logs filter arguments given on the command line."""
+    return {
+        'usernames': args.user or None,
+        'nases': args.nas or None,
+        'results': [RESULT_NAMES[args.result]] if args.result else None,
+        'statuses': args.status or None,
+        'since': args.since,
+        'until': args.until,
+    }
+
+def analyze(monitor, args):
+    """Read the logs and print the summary and figures (or write the report)."""
+    stats = monitor.stats
+    with stats.phase('read_logs'):
+        df = monitor.read_logs(since_hours=args.hours, **event_filters(args))
+
+    # Every report below is built from these, computed in one pass over df
+    aggregates = monitor.aggregate(df) if not df.empty else None
+    if args.json:
+        with stats.phase('summary'):
+            print(json.dumps(monitor.summary(df, aggregates=aggregates), indent=2))
+        return
+
+    with stats.phase('summary'):
+        monitor.print_summary(df, aggregates)
+    if args.memory_report:
+        monitor.print_memory_report(df)
+
+    if df.empty:
+        print("No authentication data found in the specified time range.")
+    elif args.summary_only:
+        return
+    elif args.report:
+        from auth_report import write_report
+        with stats.phase('report'):
+            rendered, skipped = write_report(df, args.report, args.report_format, args.workers, aggregates)
+        print(f"Report written to {args.report}: rendered {', '.join(rendered) or 'nothing'}"
+              + (f", unchanged {', '.join(skipped)}" if skipped else ''))
+    else:
+        # Create visualizations
+        monitor.create_timeline_plot(df, aggregates)
+        monitor.create_user_analysis(df, aggregates)
+        monitor.create_heatmap(df, aggregates)
+
 def main():
     parser = argparse.ArgumentParser(description='FreeRADIUS Log Monitor and Visualizer')
     parser.add_argument('--log-file', default='./logs/radius.log', 
-                       help='Path to FreeRADIUS log file')
+                       help='Path to FreeRADIUS log file, or a directory or glob of rotated '
+                            '(and .gz/.bz2/.xz compressed) logs, e.g. "./logs/radius.log*"')
+    parser.add_argument('--workers', type=int,
+                       help='Processes used to parse the logs (default: CPU count for a directory, '
+                            'glob or compressed log, one for a single plain file)')
     parser.add_argument('--hours', type=int, default=24, 
                        help='Number of hours to analyze (default: 24)')
     parser.add_argument('--live', action='store_true', 
                        help='Enable live monitoring mode')
     parser.add_argument('--interval', type=int, default=60, 
-                       help='Update interval for live monitoring in seconds (default: 60)')
+                       help='Seconds between live refreshes while the log is idle (default: 60)')
+    parser.add_argument('--refresh-interval', type=float, default=1.0,
+                       help='Minimum seconds between live refreshes while lines arrive (default: 1)')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                       help='Tail the log and serve Prometheus metrics on /metrics')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                       help='Seconds between log polls in --serve mode, and in --live mode '
+                            'where inotify is unavailable (default: 1)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Report parse stage timings, throughput and memory of each phase; '
+                            'with several or compressed logs, use --workers 1 for a per-stage '
+                            'breakdown of the parse')
+    parser.add_argument('--profile-output', metavar='FILE',
+                       help='Also run under cProfile and write pstats data to FILE (implies --profile)')
+    parser.add_argument('--log-level', default='WARNING',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Diagnostic logging level; DEBUG shows unmatched lines (default: WARNING)')
+    parser.add_argument('--ingest', metavar='STORE_DIR',
+                       help='Append new log events to a Parquet event store and exit')
+    parser.add_argument('--store', metavar='STORE_DIR',
+                       help='Analyze events from a Parquet event store instead of the text log')
+    parser.add_argument('--memory-report', action='store_true',
+                       help='Report bytes per event of the compact vs. object DataFrame schema')
+    parser.add_argument('--summary-only', action='store_true',
+                       help='Print the summary without figures (matplotlib is not loaded)')
+    parser.add_argument('--json', action='store_true',
+                       help='Print the summary as JSON instead of text, without figures')
+    parser.add_argument('--report', metavar='OUTPUT_DIR',
+                       help='Render the figures headlessly into OUTPUT_DIR (with an index.html) '
+                            'instead of showing them; unchanged figures are not redrawn')
+    parser.add_argument('--report-format', default='png', choices=['png', 'svg'],
+                       help='Image format of --report figures (default: png)')
+    parser.add_argument('--user', action='append', default=[], metavar='USERNAME',
+                       help='Only events of this user (repeatable); lines that can\'t match are '
+                            'skipped before parsing, as for the filters below')
+    parser.add_argument('--nas', action='append', default=[], metavar='NAS',
+                       help='Only events from this NAS (repeatable)')
+    parser.add_argument('--result', choices=sorted(RESULT_NAMES),
+                       help='Only successful or only failed authentications')
+    parser.add_argument('--status', action='append', metavar='TEXT',
+                       help='Only events whose status contains TEXT (repeatable), '
+                            'e.g. "Login incorrect"')
+    parser.add_argument('--since', type=datetime.fromisoformat, metavar='TIME',
+                       help='Only events at or after TIME (YYYY-MM-DD[ HH:MM[:SS]]); overrides --hours')
+    parser.add_argument('--until', type=datetime.fromisoformat, metavar='TIME',
+                       help='Only events at or before TIME (YYYY-MM-DD[ HH:MM[:SS]])')
+    parser.add_argument('--lines', action='store_true',
+                       help='Print the raw log lines of the --user/--nas events instead of the '
+                            'summary, found through the per-file line indexes without parsing the logs')
+    parser.add_argument('--index', action='store_true',
+                       help='Bring the line indexes of the log files up to date and exit '
+                            '(with --ingest, after ingesting)')
+    parser.add_argument('--index-dir', metavar='DIR',
+                       help='Keep the line indexes in DIR instead of next to the log files')
+    parser.add_argument('--correlate', action='store_true',
+                       help='Merge the log with the timestamped linelog files next to it '
+                            'and report how logins and accounting sessions match up')
     
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='%(levelname)s %(name)s: %(message)s')
     
-    monitor = RadiusLogMonitor(args.log_file)
+    stats = PipelineStats() if args.profile or args.profile_output else None
+    monitor = RadiusLogMonitor(args.log_file, store_path=args.store, workers=args.workers, stats=stats)
+
+    if args.ingest:
+        from event_store import EventStore
+        written = EventStore(args.ingest).ingest(args.log_file, monitor)
+        print(f"Ingested {written} authentication events into {args.ingest}")
+        if not args.index:
+            return
+
+    if args.index:
+        from log_index import update_indexes
+        added = update_indexes(args.log_file, args.index_dir)
+        print(f"Indexed {sum(added.values())} new lines in {len(added)} log file(s)")
+        return
+
+    if args.lines:
+        if not args.user and not args.nas:
+            print("Error: --lines needs --user or --nas")
+            return
+        found = 0
+        for line in monitor.read_lines(since_hours=args.hours, index_dir=args.index_dir,
+                                       **event_filters(args)):
+            print(line)
+            found += 1
+        if not found:
+            print("No matching log lines found.")
+        return
+
+    if args.correlate:
+        from event_stream import AuthAccountingCorrelator
+        AuthAccountingCorrelator().feed_all(monitor.events()).print_summary()
+        return
     
-    if args.live:
-        monitor.monitor_live(args.interval)
+    if args.serve:
+        monitor.serve_metrics(args.serve, args.poll_interval)
+    elif args.live:
+        monitor.monitor_live(args.interval, args.refresh_interval, args.poll_interval)
     else:
-        # Read and analyze logs
-        df = monitor.read_logs(since_hours=args.hours)
-        
-        # Print summary
-        monitor.print_summary(df)
-        
-        if not df.empty:
-            # Create visualizations
-            monitor.create_timeline_plot(df)
-            monitor.create_user_analysis(df)
-            monitor.create_heatmap(df)
-        else:
-            print("No authentication data found in the specified time range.")
+        profiler = cProfile.Profile() if args.profile_output else None
+        if profiler:
+            profiler.enable()
+        try:
+            analyze(monitor, args)
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(args.profile_output)
+        if stats:
+            print(stats.report())
+        if profiler:
+            print(f"cProfile data written to {args.profile_output} "
+                  f"(view with: python -m pstats {args.profile_output})")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Shared RADIUS dictionary and pre-encoded request templates
+
+load_dictionary() parses a dictionary file once per process and hands the
+same pyrad Dictionary to every caller.
+
+AccessRequestTemplate and AccountingRequestTemplate encode the attributes
+that never change between requests (NAS-IP-Address, Service-Type, ...)
+once, with pyrad, and then build each packet by patching only the varying
+fields (identifier, authenticator, User-Name, password, session id,
+counters) into a reused bytearray.  The output is byte-for-byte what pyrad
+would send, at a few microseconds per packet instead of a full pyrad
+encode.
+"""
+
+import hashlib
+import os
+import random
+import struct
+from functools import lru_cache
+
+import pyrad.packet
+from pyrad.dictionary import Dictionary
+
+HEADER = struct.Struct('!BBH16s')
+INTEGER_ATTRIBUTE = struct.Struct('!BBI')
+MAX_PACKET_SIZE = 4096
+
+
+@lru_cache(maxsize=None)
+def _load_dictionary(path):
+    return Dictionary(path)
+
+
+def load_dictionary(path="dictionary"):
+    """Return the parsed Dictionary for path, parsing it only on first use."""
+    if isinstance(path, Dictionary):
+        return path
+    return _load_dictionary(os.path.abspath(path))
+
+
+class _RequestTemplate:
+    code = None
+
+    def __init__(self, secret, dictionary="dictionary", static_attributes=None):
+        self.secret = secret if isinstance(secret, bytes) else secret.encode()
+        self.dict = load_dictionary(dictionary)
+        self.static = self.encode_attributes(static_attributes or {})
+        self.buffer = bytearray(MAX_PACKET_SIZE)
+        # Authenticators only need to be unpredictable per request, not
+        # cryptographically strong, for load generation
+        self._random = random.Random(os.urandom(16))
+
+    def encode_attributes(self, attributes):
+        """Encode {name: value} with pyrad, in the given order."""
+        packet = pyrad.packet.Packet(dict=self.dict, secret=self.secret)
+        for name, value in attributes.items():
+            packet[name] = value
+        return packet._PktEncodeAttributes()
+
+    def attribute_code(self, name):
+        return self.dict.attributes[name].code
+
+    def integer_value(self, name, value):
+        """Map a dictionary VALUE name (e.g. 'Start') to its integer."""
+        if isinstance(value, int):
+            return value
+        value = self.dict.attributes[name].values.GetForward(value)
+        # pyrad stores VALUE entries already encoded
+        return int.from_bytes(value, 'big') if isinstance(value, bytes) else value
+
+    def _put_string(self, offset, code, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        end = offset + 2 + len(value)
+        self.buffer[offset] = code
+        self.buffer[offset + 1] = 2 + len(value)
+        self.buffer[offset + 2:end] = value
+        return end
+
+    def _put_static(self, offset):
+        end = offset + len(self.static)
+        self.buffer[offset:end] = self.static
+        return end
+
+
+class AccessRequestTemplate(_RequestTemplate):
+    """Access-Request with User-Name and PAP User-Password as the varying fields."""
+
+    code = pyrad.packet.AccessRequest
+
+    def __init__(self, secret, dictionary="dictionary", static_attributes=None):
+        super().__init__(secret, dictionary, static_attributes)
+        self.user_name = self.attribute_code("User-Name")
+        self.user_password = self.attribute_code("User-Password")
+
+    def hide_password(self, password, authenticator):
+        """RFC 2865 User-Password hiding (what pyrad's PwCrypt does)."""
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        padded = password + b'\x00' * (-len(password) % 16)
+        result = bytearray()
+        last = authenticator
+        for start in range(0, len(padded), 16):
+            key = int.from_bytes(hashlib.md5(self.secret + last).digest(), 'big')
+            block = (int.from_bytes(padded[start:start + 16], 'big') ^ key).to_bytes(16, 'big')
+            result += block
+            last = block
+        return bytes(result)
+
+    def encode(self, ident, username, password):
+        """Return (raw packet, request authenticator)."""
+        authenticator = self._random.getrandbits(128).to_bytes(16, 'big')
+        offset = self._put_string(HEADER.size, self.user_name, username)
+        offset = self._put_string(offset, self.user_password, self.hide_password(password, authenticator))
+        offset = self._put_static(offset)
+        HEADER.pack_into(self.buffer, 0, self.code, ident, offset, authenticator)
+        return bytes(self.buffer[:offset]), authenticator
+
+
+class AccountingRequestTemplate(_RequestTemplate):
+    """Accounting-Request with status, counters, session id and user as the varying fields.
+
+    The integer attributes sit at fixed offsets right after the header, so
+    only their values are rewritten; the strings and the static attributes
+    follow.
+    """
+
+    code = pyrad.packet.AccountingRequest
+    COUNTERS = ("Acct-Session-Time", "Acct-Input-Octets", "Acct-Output-Octets", "Acct-Delay-Time")
+    WITH_COUNTERS = (2, 3)  # Stop, Interim-Update
+
+    def __init__(self, secret, dictionary="dictionary", static_attributes=None):
+        super().__init__(secret, dictionary, static_attributes)
+        self.status_type = self.attribute_code("Acct-Status-Type")
+        self.counter_codes = [self.attribute_code(name) for name in self.COUNTERS]
+        self.terminate_cause = self.attribute_code("Acct-Terminate-Cause")
+        self.user_name = self.attribute_code("User-Name")
+        self.session_id = self.attribute_code("Acct-Session-Id")
+        self.statuses = {}
+        self.causes = {}
+
+    def encode(self, ident, status, session_id, username, session_time=0,
+               input_octets=0, output_octets=0, delay_time=0, terminate_cause=None,
+               session_attributes=b''):
+        """Return (raw packet, request authenticator).
+
+        status and terminate_cause take dictionary value names ('Start',
+        'User-Request') or integers.  Counters are only sent with Stop and
+        Interim-Update, and User-Name is left out when username is None.
+        session_attributes are extra attributes pre-encoded with
+        encode_attributes(), e.g. once per session.
+        """
+        status_value = self.statuses.get(status)
+        if status_value is None:
+            status_value = self.statuses[status] = self.integer_value("Acct-Status-Type", status)
+
+        buffer = self.buffer
+        offset = HEADER.size
+        INTEGER_ATTRIBUTE.pack_into(buffer, offset, self.status_type, 6, status_value)
+        offset += 6
+        if status_value in self.WITH_COUNTERS:
+            for code, value in zip(self.counter_codes, (session_time, input_octets, output_octets, delay_time)):
+                INTEGER_ATTRIBUTE.pack_into(buffer, offset, code, 6, value & 0xFFFFFFFF)
+                offset += 6
+        if terminate_cause is not None:
+            cause = self.causes.get(terminate_cause)
+            if cause is None:
+                cause = self.causes[terminate_cause] = self.integer_value("Acct-Terminate-Cause", terminate_cause)
+            INTEGER_ATTRIBUTE.pack_into(buffer, offset, self.terminate_cause, 6, cause)
+            offset += 6
+        if username is not None:
+            offset = self._put_string(offset, self.user_name, username)
+        offset = self._put_string(offset, self.session_id, session_id)
+        end = offset + len(session_attributes)
+        buffer[offset:end] = session_attributes
+        offset = self._put_static(end)
+
+        # Accounting authenticator: MD5 over the packet with a zero authenticator
+        HEADER.pack_into(buffer, 0, self.code, ident, offset, b'\x00' * 16)
+        authenticator = hashlib.md5(bytes(buffer[:offset]) + self.secret).digest()
+        buffer[4:20] = authenticator
+        return bytes(buffer[:offset]), authenticator
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Fixed-memory probabilistic counters for streaming log analysis
+
+All sketches take batches of values (a list, array, Series or Categorical of
+strings) and hash them with pandas' vectorized hash_array, so their update
+cost stays low per event.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values):
+    """Return a uint64 hash for every value of a batch.
+
+    A Categorical (or categorical Series) is hashed once per category and
+    the hashes are broadcast through its codes.
+    """
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        category_hashes = pd.util.hash_array(np.asarray(values.categories, dtype=object))
+        return category_hashes[values.codes]
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class HyperLogLog:
+    """Approximate distinct counter (Flajolet et al.) with 2**precision registers.
+
+    The standard error is about 1.04 / sqrt(2**precision), 1.6% for the
+    default precision of 12 (4 KiB of registers).
+    """
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        """Add a batch of values."""
+        self.add_hashes(hash_values(values))
+
+    def add_hashes(self, hashes):
+        """Add a batch of values already hashed with hash_values."""
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes << np.uint64(p)
+        # The top 53 bits convert to float exactly, so frexp gives their bit length
+        _, bit_length = np.frexp((rest >> np.uint64(11)).astype(np.float64))
+        rank = np.minimum(54 - bit_length, 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def copy(self):
+        clone = HyperLogLog(self.precision)
+        clone.registers[:] = self.registers
+        return clone
+
+    def count(self):
+        """Return the estimated number of distinct values added."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+def _row_indexes(hashes, depth, width):
+    """Map each hash to one column per row (Kirsch-Mitzenmacher double hashing)."""
+    h1 = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    h2 = (hashes >> np.uint64(32)).astype(np.int64) | 1
+    rows = np.arange(depth, dtype=np.int64)[:, None]
+    return (h1[None, :] + rows * h2[None, :]) % width
+
+
+class SlidingCountMin:
+    """Count-min sketch over a sliding time window.
+
+    The window is split into `slots` sub-windows, each with its own
+    depth x width table; a running total of the live slots answers queries,
+    and a slot is subtracted and cleared when it falls out of the window.
+    Estimates never undercount; with width w they overcount by at most
+    e/w of the window's total with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, window_seconds=60, slots=6, width=1 << 16, depth=4):
+        self.slot_seconds = window_seconds / slots
+        self.width = width
+        self.depth = depth
+        self.tables = np.zeros((slots, depth, width), dtype=np.uint32)
+        self.total = np.zeros((depth, width), dtype=np.uint32)
+        self.current_slot = None
+
+    def advance(self, now):
+        """Expire the slots older than the window ending at `now` (epoch seconds)."""
+        slot = int(now // self.slot_seconds)
+        if self.current_slot is None:
+            self.current_slot = slot
+            return
+        slots = len(self.tables)
+        for expired in range(self.current_slot + 1, min(slot, self.current_slot + slots) + 1):
+            table = self.tables[expired % slots]
+            self.total -= table
+            table[:] = 0
+        self.current_slot = max(self.current_slot, slot)
+
+    def add(self, hashes, now):
+        """Count one occurrence of every hash at time `now`."""
+        self.advance(now)
+        if len(hashes) == 0:
+            return
+        columns = _row_indexes(hashes, self.depth, self.width)
+        table = self.tables[self.current_slot % len(self.tables)]
+        for row in range(self.depth):
+            np.add.at(table[row], columns[row], 1)
+            np.add.at(self.total[row], columns[row], 1)
+
+    def estimate(self, hashes):
+        """Return the windowed count estimate of every hash."""
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=np.uint32)
+        columns = _row_indexes(hashes, self.depth, self.width)
+        rows = np.arange(self.depth)[:, None]
+        return self.total[rows, columns].min(axis=0)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in k counters (Metwally et al.).
+
+    Any key with true count above total/k is guaranteed to be tracked; a
+    tracked key's count overestimates its true count by at most errors[key].
+    """
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+
+    def update(self, counts):
+        """Add a {key: count} batch."""
+        for key, count in counts.items():
+            if key in self.counts:
+                self.counts[key] += count
+            elif len(self.counts) < self.k:
+                self.counts[key] = count
+                self.errors[key] = 0
+            else:
+                victim = min(self.counts, key=self.counts.get)
+                floor = self.counts.pop(victim)
+                del self.errors[victim]
+                self.counts[key] = floor + count
+                self.errors[key] = floor
+
+    def top(self, n=10):
+        """Return the n keys with the highest counts as (key, count) pairs."""
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
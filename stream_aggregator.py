@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Streaming time-window aggregation of FreeRADIUS auth events
+
+StreamingAggregator keeps rolling per-minute and per-hour counters instead
+of the raw events, so a live refresh costs O(new events) however much
+traffic the window holds.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, hash_values
+
+
+def count_codes(codes, categories):
+    """Return {category: count} for an array of categorical codes."""
+    codes = codes[codes >= 0]
+    present, counts = np.unique(codes, return_counts=True)
+    return dict(zip(categories[present], counts.tolist()))
+
+
+class _MinuteBucket:
+    __slots__ = ('success', 'failed', 'attempts', 'failures', 'users', 'first', 'last')
+
+    def __init__(self, precision):
+        self.success = 0
+        self.failed = 0
+        self.attempts = Counter()
+        self.failures = Counter()
+        self.users = HyperLogLog(precision)
+        self.first = None
+        self.last = None
+
+
+class StreamingAggregator:
+    """Rolling auth counters over the newest window_minutes of events.
+
+    update() takes the compact frames produced by
+    RadiusLogMonitor.parse_lines.  Window totals and per-user counters are
+    adjusted incrementally as minute buckets enter and leave the window;
+    unique users are estimated by merging the buckets' HyperLogLogs.  Hourly
+    success/fail totals are kept for history_hours.
+    """
+
+    def __init__(self, window_minutes=60, history_hours=24, hll_precision=12):
+        self.window = timedelta(minutes=window_minutes)
+        self.history = timedelta(hours=history_hours)
+        self.hll_precision = hll_precision
+        self.minutes = {}
+        self.hours = {}
+        self.success = 0
+        self.failed = 0
+        self.attempts = Counter()
+        self.failures = Counter()
+        self.newest = None
+        self.late_events = 0
+
+    @property
+    def total(self):
+        return self.success + self.failed
+
+    def update(self, df):
+        """Add a batch of parsed events."""
+        if df.empty:
+            return
+        newest = df['timestamp'].max()
+        if self.newest is None or newest > self.newest:
+            self.newest = newest
+        cutoff = (self.newest - self.window).floor('min')
+
+        # Work on plain arrays: split the batch into per-minute slices once
+        # and hash each distinct username once for the whole batch.
+        minutes = df['timestamp'].to_numpy().astype('datetime64[m]')
+        order = np.argsort(minutes, kind='stable')
+        minutes = minutes[order]
+        timestamps = df['timestamp'].to_numpy()[order]
+        codes = df['username'].cat.codes.to_numpy()[order]
+        successes = df['success'].to_numpy()[order]
+        categories = df['username'].cat.categories
+        user_hashes = hash_values(categories)
+        bounds = np.flatnonzero(minutes[1:] != minutes[:-1]) + 1
+
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(minutes)]):
+            minute = pd.Timestamp(minutes[start])
+            if minute < cutoff:
+                self.late_events += int(end - start)
+                continue
+            bucket = self.minutes.get(minute)
+            if bucket is None:
+                bucket = self.minutes[minute] = _MinuteBucket(self.hll_precision)
+
+            minute_codes = codes[start:end]
+            minute_success = successes[start:end]
+            success = int(minute_success.sum())
+            failed = len(minute_codes) - success
+            attempts = count_codes(minute_codes, categories)
+            failures = count_codes(minute_codes[~minute_success], categories)
+
+            bucket.success += success
+            bucket.failed += failed
+            bucket.attempts.update(attempts)
+            bucket.failures.update(failures)
+            valid = minute_codes[minute_codes >= 0]
+            bucket.users.add_hashes(user_hashes[valid])
+            first = pd.Timestamp(timestamps[start:end].min())
+            last = pd.Timestamp(timestamps[start:end].max())
+            bucket.first = first if bucket.first is None else min(bucket.first, first)
+            bucket.last = last if bucket.last is None else max(bucket.last, last)
+
+            self.success += success
+            self.failed += failed
+            self.attempts.update(attempts)
+            self.failures.update(failures)
+
+            hourly = self.hours.setdefault(minute.floor('h'), [0, 0])
+            hourly[0] += success
+            hourly[1] += failed
+
+        self.expire()
+
+    def expire(self, now=None):
+        """Drop minute buckets older than the window (relative to now or the newest event)."""
+        now = pd.Timestamp(now) if now is not None else self.newest
+        if now is None:
+            return
+        cutoff = (now - self.window).floor('min')
+        for minute in sorted(self.minutes):
+            if minute >= cutoff:
+                break
+            bucket = self.minutes.pop(minute)
+            self.success -= bucket.success
+            self.failed -= bucket.failed
+            self._subtract(self.attempts, bucket.attempts)
+            self._subtract(self.failures, bucket.failures)
+
+        history_cutoff = (now - self.history).floor('h')
+        for hour in [hour for hour in self.hours if hour < history_cutoff]:
+            del self.hours[hour]
+
+    @staticmethod
+    def _subtract(totals, counts):
+        for key, value in counts.items():
+            remaining = totals[key] - value
+            if remaining > 0:
+                totals[key] = remaining
+            else:
+                del totals[key]
+
+    def unique_users(self):
+        """Estimated number of distinct users in the window."""
+        if not self.minutes:
+            return 0
+        merged = HyperLogLog(self.hll_precision)
+        for bucket in self.minutes.values():
+            merged.merge(bucket.users)
+        return merged.count()
+
+    def time_range(self):
+        if not self.minutes:
+            return None, None
+        buckets = [self.minutes[minute] for minute in sorted(self.minutes)]
+        return buckets[0].first, buckets[-1].last
+
+    def top_users(self, n=5):
+        return self._as_series(self.attempts.most_common(n))
+
+    def top_failed_users(self, n=5):
+        return self._as_series(self.failures.most_common(n))
+
+    @staticmethod
+    def _as_series(pairs):
+        index = pd.Index([user for user, _ in pairs], name='username')
+        return pd.Series([count for _, count in pairs], index=index, name='count', dtype='int64')
+
+    def minute_counts(self):
+        """Per-minute success/failed counts in the window, as a DataFrame."""
+        minutes = sorted(self.minutes)
+        return pd.DataFrame({
+            'success': [self.minutes[minute].success for minute in minutes],
+            'failed': [self.minutes[minute].failed for minute in minutes],
+        }, index=pd.DatetimeIndex(minutes, name='timestamp'))
+
+    def hourly_counts(self):
+        """Attempts per hour over the history, as a Series."""
+        hours = sorted(self.hours)
+        return pd.Series([sum(self.hours[hour]) for hour in hours],
+                         index=pd.DatetimeIndex(hours, name='timestamp'), dtype='int64')
+
+    def print_summary(self):
+        """Print the same summary as RadiusLogMonitor.print_summary for the window."""
+        if not self.total:
+            print("No authentication data found")
+            return
+
+        first, last = self.time_range()
+        print("=" * 50)
+        print("FREERADIUS AUTHENTICATION LOG SUMMARY")
+        print("=" * 50)
+        print(f"Total authentication attempts: {self.total}")
+        print(f"Successful authentications: {self.success}")
+        print(f"Failed authentications: {self.failed}")
+        print(f"Success rate: {self.success / self.total * 100:.1f}%")
+        print(f"Unique users: ~{self.unique_users()}")
+        print(f"Time range: {first} to {last}")
+        print()
+
+        print("Top 5 most active users:")
+        print(self.top_users().to_string())
+        print()
+
+        print("Top 5 users with failed attempts:")
+        failed_users = self.top_failed_users()
+        if not failed_users.empty:
+            print(failed_users.to_string())
+        else:
+            print("No failed attempts found")
@@ -4,45 +4,61 @@ FreeRADIUS Test Scenarios
 Generate various authentication attempts for log analysis testing
 """
 
-from pyrad.client import Client
-from pyrad.dictionary import Dictionary
+import pyrad.client
 import pyrad.packet
+import asyncio
+import socket
 import time
 import random
 
+from radius_load import RadiusLoadGenerator, reply_matches
+from radius_packets import AccessRequestTemplate, load_dictionary
+
 class RadiusTestSuite:
-    def __init__(self, server="127.0.0.1", secret=b"testing123", port=1812):
+    def __init__(self, server="127.0.0.1", secret=b"testing123", port=1812, timeout=5, retries=3):
         self.server = server
         self.secret = secret
         self.port = port
+        self.timeout = timeout
+        self.retries = retries
         self.client = None
+        self.ident = 0
         self.setup_client()
     
     def setup_client(self):
         """Initialize RADIUS client"""
         try:
-            self.client = Client(
-                server=self.server, 
-                secret=self.secret, 
-                dict=Dictionary("dictionary")
-            )
+            self.template = AccessRequestTemplate(self.secret, load_dictionary("dictionary"))
+            self.client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.client.settimeout(self.timeout)
             print(f"✅ RADIUS client initialized for {self.server}:{self.port}")
         except Exception as e:
             print(f"❌ Failed to initialize RADIUS client: {e}")
     
+    def send_access_request(self, username, password):
+        """Send an Access-Request encoded from the template and return the reply code"""
+        self.ident = (self.ident + 1) & 0xFF
+        raw, authenticator = self.template.encode(self.ident, username, password)
+        for _ in range(self.retries):
+            self.client.sendto(raw, (self.server, self.port))
+            try:
+                while True:
+                    data = self.client.recv(4096)
+                    # Skip late replies to earlier requests
+                    if len(data) >= 20 and data[1] == self.ident and \
+                            reply_matches(authenticator, self.secret, data):
+                        return data[0]
+            except socket.timeout:
+                continue
+        raise pyrad.client.Timeout("RADIUS server does not reply")
+    
     def test_successful_auth(self, username, password):
         """Test successful authentication"""
         print(f"\n🔐 Testing successful auth: {username}")
         try:
-            req = self.client.CreateAuthPacket(
-                code=pyrad.packet.AccessRequest, 
-                User_Name=username
-            )
-            req["User-Password"] = req.PwCrypt(password)
+            code = self.send_access_request(username, password)
             
-            reply = self.client.SendPacket(req)
-            
-            if reply.code == pyrad.packet.AccessAccept:
+            if code == pyrad.packet.AccessAccept:
                 print(f"✅ {username}: Authentication SUCCESSFUL")
                 return True
             else:
@@ -56,15 +72,9 @@ class RadiusTestSuite:
         """Test failed authentication with wrong password"""
         print(f"\n🔒 Testing failed auth: {username} (wrong password)")
         try:
-            req = self.client.CreateAuthPacket(
-                code=pyrad.packet.AccessRequest, 
-                User_Name=username
-            )
-            req["User-Password"] = req.PwCrypt(wrong_password)
-            
-            reply = self.client.SendPacket(req)
+            code = self.send_access_request(username, wrong_password)
             
-            if reply.code == pyrad.packet.AccessReject:
+            if code == pyrad.packet.AccessReject:
                 print(f"✅ {username}: Authentication correctly REJECTED")
                 return True
             else:
@@ -78,15 +88,9 @@ class RadiusTestSuite:
         """Test authentication with non-existent user"""
         print(f"\n👻 Testing non-existent user: {fake_username}")
         try:
-            req = self.client.CreateAuthPacket(
-                code=pyrad.packet.AccessRequest, 
-                User_Name=fake_username
-            )
-            req["User-Password"] = req.PwCrypt("anypassword")
+            code = self.send_access_request(fake_username, "anypassword")
             
-            reply = self.client.SendPacket(req)
-            
-            if reply.code == pyrad.packet.AccessReject:
+            if code == pyrad.packet.AccessReject:
                 print(f"✅ {fake_username}: Non-existent user correctly REJECTED")
                 return True
             else:
@@ -100,15 +104,9 @@ class RadiusTestSuite:
         """Test with empty username/password"""
         print(f"\n🔄 Testing empty credentials")
         try:
-            req = self.client.CreateAuthPacket(
-                code=pyrad.packet.AccessRequest, 
-                User_Name=""
-            )
-            req["User-Password"] = req.PwCrypt("")
-            
-            reply = self.client.SendPacket(req)
+            code = self.send_access_request("", "")
             
-            if reply.code == pyrad.packet.AccessReject:
+            if code == pyrad.packet.AccessReject:
                 print(f"✅ Empty credentials correctly REJECTED")
                 return True
             else:
@@ -129,17 +127,21 @@ class RadiusTestSuite:
             self.test_failed_auth(username, wrong_password)
             time.sleep(0.5)  # Small delay between attempts
     
-    def load_test(self, username, password, count=10):
-        """Generate multiple rapid authentication requests"""
+    def load_test(self, username, password, count=10, concurrency=16):
+        """Generate multiple rapid authentication requests, `concurrency` at a time"""
         print(f"\n⚡ Load testing: {count} rapid authentications for {username}")
-        success_count = 0
-        
-        for i in range(count):
-            if self.test_successful_auth(f"{username}_{i:02d}", password):
-                success_count += 1
-            time.sleep(0.1)  # Very short delay
-        
-        print(f"📊 Load test results: {success_count}/{count} successful")
+        users = [(f"{username}_{i:02d}", password) for i in range(count)]
+        generator = RadiusLoadGenerator(
+            server=self.server,
+            port=self.port,
+            secret=self.secret,
+            dictionary=self.template.dict,
+            users=users,
+            concurrency=min(concurrency, count),
+        )
+        stats = asyncio.run(generator.run_closed_loop(requests=count))
+        stats.print_report("LOAD TEST RESULTS")
+        print(f"📊 Load test results: {stats.counts['Accept']}/{count} successful")
     
     def mixed_scenario_test(self):
         """Run a mixed scenario with various users and outcomes"""
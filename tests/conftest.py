@@ -0,0 +1,11 @@
+import pytest
+
+from generators import write_auth_log
+
+
+@pytest.fixture(scope='session')
+def auth_log(tmp_path_factory):
+    """A synthetic radius.log of 20k lines: noise, malformed lines, failures and bursts over 200 users."""
+    path = tmp_path_factory.mktemp('logs') / 'radius.log'
+    write_auth_log(str(path), 20000, users=200, bursts=3, malformed_ratio=0.01)
+    return str(path)
@@ -0,0 +1,54 @@
+"""AccountingWriter: batching, wakeups and the written rows."""
+
+import sqlite3
+import time
+
+from accounting_writer import AccountingWriter, accounting_row
+
+REQUEST = (
+    ('Acct-Status-Type', 'Stop'),
+    ('Acct-Session-Id', '"abc123"'),
+    ('User-Name', '"bob"'),
+    ('NAS-IP-Address', '10.0.0.1'),
+    ('Acct-Session-Time', '60'),
+    ('Acct-Input-Octets', '10'),
+    ('Acct-Input-Gigawords', '1'),
+    ('Acct-Output-Octets', '20'),
+)
+
+
+def test_accounting_row():
+    assert accounting_row(1.0, REQUEST) == (1.0, 'Stop', 'abc123', 'bob', '10.0.0.1', 60, (1 << 32) + 10, 20, None)
+
+
+def test_wakes_the_writer_past_a_skipped_batch_size(tmp_path):
+    writer = AccountingWriter(str(tmp_path / 'acct.sqlite'), batch_size=10)
+    # As if concurrent submitters had skipped the exact batch size
+    for _ in range(11):
+        writer.pending.append((time.time(), REQUEST))
+    assert not writer.wakeup.is_set()
+    assert writer.submit(REQUEST)
+    assert writer.wakeup.is_set()
+
+
+def test_full_batch_is_written_before_the_flush_interval(tmp_path):
+    path = str(tmp_path / 'acct.sqlite')
+    writer = AccountingWriter(path, batch_size=5, flush_interval=60)
+    writer.start()
+    try:
+        for _ in range(5):
+            writer.submit(REQUEST)
+        deadline = time.monotonic() + 5
+        while writer.written < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.written == 5
+    finally:
+        writer.close()
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*), MIN(username) FROM accounting").fetchone() == (5, 'bob')
+
+
+def test_drops_when_full(tmp_path):
+    writer = AccountingWriter(str(tmp_path / 'acct.sqlite'), queue_size=3)
+    assert [writer.submit(REQUEST) for _ in range(4)] == [True, True, True, False]
+    assert writer.stats()['dropped'] == 1
@@ -0,0 +1,73 @@
+"""auth_aggregates: the single-pass aggregates equal plain pandas recounts."""
+
+import pandas as pd
+import pytest
+
+from auth_aggregates import DAY_NAMES, aggregate_auth_events
+from radius_log_monitor import RadiusLogMonitor
+
+
+@pytest.fixture(scope='module', params=['compact', 'plain'])
+def frame(request, auth_log):
+    return RadiusLogMonitor(auth_log).read_logs(since_hours=None, compact=request.param == 'compact')
+
+
+@pytest.fixture(scope='module')
+def plain(auth_log):
+    df = RadiusLogMonitor(auth_log).read_logs(since_hours=None, compact=False)
+    return df.assign(username=df['username'].astype(str))
+
+
+def test_totals_and_users(frame, plain):
+    aggregates = aggregate_auth_events(frame)
+    success = plain['auth_result'] == 'Success'
+    assert (aggregates.total, aggregates.successful, aggregates.failed) == \
+        (len(plain), success.sum(), (~success).sum())
+    assert (aggregates.start, aggregates.end) == (plain['timestamp'].min(), plain['timestamp'].max())
+    assert aggregates.unique_users == plain['username'].nunique()
+    counts = aggregates.user_counts
+    assert counts['total'].to_dict() == plain['username'].value_counts().to_dict()
+    assert counts['failed'][counts['failed'] > 0].to_dict() == \
+        plain.loc[~success, 'username'].value_counts().to_dict()
+    assert counts['total'].is_monotonic_decreasing
+    assert aggregates.top_users(5).tolist() == plain['username'].value_counts().head(5).tolist()
+    assert aggregates.top_failed_users(5).tolist() == \
+        plain.loc[~success, 'username'].value_counts().head(5).tolist()
+    assert aggregates.results.to_dict() == plain['auth_result'].value_counts().to_dict()
+
+
+def test_hourly_and_heatmap(frame, plain):
+    aggregates = aggregate_auth_events(frame)
+    hourly = plain.set_index('timestamp').resample('h').size()
+    assert aggregates.hourly.tolist() == hourly.tolist()
+    assert (aggregates.hourly.index == hourly.index).all()
+    assert aggregates.hour_of_day.to_dict() == plain['timestamp'].dt.hour.value_counts().sort_index().to_dict()
+    day_hour = pd.crosstab(plain['timestamp'].dt.day_name(), plain['timestamp'].dt.hour)
+    day_hour = day_hour.reindex([day for day in DAY_NAMES if day in day_hour.index])
+    assert aggregates.day_hour.values.tolist() == day_hour.values.tolist()
+    assert list(aggregates.day_hour.index) == list(day_hour.index)
+
+
+def test_timeline(frame, plain):
+    aggregates = aggregate_auth_events(frame, timeline_bins=50, timeline_users=7)
+    timeline = aggregates.timeline
+    users = aggregates.timeline_users
+    assert users == plain['username'].value_counts().index[:7].tolist()
+    shown = plain[plain['username'].isin(users)]
+    assert timeline['count'].sum() == len(shown)
+    assert timeline['timestamp'].nunique() <= 51
+    assert timeline.groupby('username')['count'].sum().to_dict() == shown['username'].value_counts().to_dict()
+    first = plain['timestamp'].min()
+    bins = (shown['timestamp'] - first).dt.total_seconds() // aggregates.bin_seconds
+    expected = shown.groupby([bins, shown['username'], shown['auth_result'] == 'Success']).size()
+    got = timeline.set_index([(timeline['timestamp'] - first).dt.total_seconds() // aggregates.bin_seconds,
+                              'username', 'success'])['count']
+    assert got.sort_index().tolist() == expected.sort_index().tolist()
+
+
+def test_summary_uses_the_aggregates(auth_log, plain):
+    monitor = RadiusLogMonitor(auth_log)
+    summary = monitor.summary(monitor.read_logs(since_hours=None))
+    assert summary['total'] == len(plain)
+    assert list(summary['top_users'].values()) == plain['username'].value_counts().head(5).tolist()
+    assert monitor.summary(pd.DataFrame())['total'] == 0
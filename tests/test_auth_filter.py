@@ -0,0 +1,145 @@
+"""AuthFilter: the byte prefilter never drops a matching line, and filtered reads equal filtering."""
+
+import re
+
+import pandas as pd
+import pytest
+
+from auth_filter import AuthFilter
+from radius_log_monitor import RadiusLogMonitor
+
+NAS_PATTERN = re.compile(r'\(from client (\S+) ')
+COLUMNS = ['timestamp', 'username', 'status', 'auth_result']
+
+
+def parse(monitor, line):
+    """The parsed event of a line with its NAS, or None."""
+    event = monitor.parse_log_line(line) if 'Auth:' in line else None
+    if event is None:
+        return None
+    match = NAS_PATTERN.search(line)
+    event['nas'] = match.group(1) if match else None
+    return event
+
+
+def reference_match(event, usernames=None, nases=None, results=None, statuses=None, since=None, until=None):
+    return ((usernames is None or event['username'] in usernames)
+            and (nases is None or event['nas'] in nases)
+            and (results is None or event['auth_result'] in results)
+            and (statuses is None or any(status in event['status'] for status in statuses))
+            and (since is None or event['timestamp'] >= since)
+            and (until is None or event['timestamp'] <= until))
+
+
+@pytest.fixture(scope='module')
+def events(auth_log):
+    monitor = RadiusLogMonitor(auth_log)
+    with open(auth_log) as f:
+        parsed = [parse(monitor, line) for line in f]
+    return pd.DataFrame([event for event in parsed if event])
+
+
+def reference_mask(events, usernames=None, nases=None, results=None, statuses=None, since=None, until=None):
+    """reference_match over a frame of events."""
+    keep = pd.Series(True, index=events.index)
+    if usernames is not None:
+        keep &= events['username'].isin(usernames)
+    if nases is not None:
+        keep &= events['nas'].isin(nases)
+    if results is not None:
+        keep &= events['auth_result'].isin(results)
+    if statuses is not None:
+        keep &= events['status'].map(lambda text: any(status in text for status in statuses))
+    if since is not None:
+        keep &= events['timestamp'] >= since
+    if until is not None:
+        keep &= events['timestamp'] <= until
+    return keep
+
+
+def filter_cases(events):
+    users = events['username'].value_counts().index
+    middle = events['timestamp'].iloc[len(events) // 2]
+    late = events['timestamp'].iloc[3 * len(events) // 4]
+    return [
+        {'usernames': [users[0]]},
+        {'usernames': [users[0], users[-1], 'nobody']},
+        {'nases': ['nas03']},
+        {'nases': ['nas00', 'nas07']},
+        {'results': ['Failed']},
+        {'results': ['Success']},
+        {'results': ['Success', 'Failed']},
+        {'statuses': ['Invalid user']},
+        {'statuses': ['password', 'Post-Auth-Type']},
+        {'usernames': [users[0]], 'results': ['Failed'], 'statuses': ['incorrect']},
+        {'usernames': [users[1]], 'nases': ['nas01', 'nas02']},
+        {'nases': ['nas05'], 'results': ['Failed']},
+        {'since': middle},
+        {'until': middle},
+        {'since': middle, 'until': late, 'results': ['Success']},
+        {'usernames': [users[2]], 'since': middle},
+    ]
+
+
+@pytest.mark.parametrize('options', [
+    {'workers': 1},
+    {'workers': 2},
+    {'workers': 1, 'vectorized': False},
+], ids=['filtered-scan', 'parallel', 'per-line'])
+def test_filtered_reads_equal_filtering(auth_log, events, options):
+    for filters in filter_cases(events):
+        expected = events[reference_mask(events, **filters)][COLUMNS].astype(object).reset_index(drop=True)
+        assert len(expected), filters
+        monitor = RadiusLogMonitor(auth_log, workers=options['workers'])
+        df = monitor.read_logs(since_hours=None, compact=False, vectorized=options.get('vectorized', True),
+                               **filters)
+        pd.testing.assert_frame_equal(df[COLUMNS].astype(object).reset_index(drop=True), expected,
+                                      obj=str(filters))
+
+
+TRICKY_LINES = [
+    # A username that looks like a status marker
+    "Mon Jun  2 10:00:00 2025 : Auth: (1) Login incorrect: [Login OK] (from client nas1 port 0)",
+    "Mon Jun  2 10:00:01 2025 : Auth: (2) Login OK: [Access-Accept] (from client nas10 port 0)",
+    # A status text inside a username
+    "Mon Jun  2 10:00:02 2025 : Auth: (3) Login OK: [Invalid user] (from client nas1 port 0)",
+    "Mon Jun  2 10:00:03 2025 : Auth: (4) Invalid user (rlm_pap: no password): [bob] (from client nas2 port 0)",
+    # Names that are prefixes of each other
+    "Mon Jun  2 10:00:04 2025 : Auth: (5) Login OK: [bob] (from client nas10 port 1)",
+    "Mon Jun  2 10:00:05 2025 : Auth: (6) Login OK: [bobby] (from client nas1 port 1)",
+    "Mon Jun  2 10:00:06 2025 : Info: [bob] (from client nas1 port 0) is not an Auth: line (7)",
+    # Last line, without a newline
+    "Mon Jun  2 10:00:07 2025 : Auth: (8) Login incorrect (pap: bad password): [bob] (from client nas1 port 2)",
+]
+
+
+@pytest.mark.parametrize('filters', [
+    {'usernames': ['bob']},
+    {'usernames': ['Login OK', 'Access-Accept']},
+    {'usernames': ['Invalid user']},
+    {'nases': ['nas1']},
+    {'nases': ['nas10', 'nas2']},
+    {'results': ['Failed']},
+    {'results': ['Success']},
+    {'statuses': ['Invalid user']},
+    {'statuses': ['Login OK'], 'results': ['Success']},
+    {'usernames': ['bob'], 'statuses': ['incorrect'], 'nases': ['nas1']},
+])
+def test_prefilter_keeps_every_matching_line(filters):
+    monitor = RadiusLogMonitor()
+    auth_filter = AuthFilter(**filters)
+    kept = auth_filter.lines('\n'.join(TRICKY_LINES).encode())
+    expected = [line for line in TRICKY_LINES
+                if (event := parse(monitor, line)) and reference_match(event, **filters)]
+    assert expected
+    assert set(expected) <= set(kept)
+    # What the prefilter lets through in excess, matches() and apply() drop
+    parsed = [parse(monitor, line) for line in kept]
+    exact = [line for line, event in zip(kept, parsed)
+             if event and auth_filter.matches(event) and (event['nas'] in filters.get('nases', [event['nas']]))]
+    assert exact == expected
+
+
+def test_unknown_result():
+    with pytest.raises(ValueError):
+        AuthFilter(results=['Maybe'])
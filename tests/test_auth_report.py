@@ -0,0 +1,49 @@
+"""auth_report: headless rendering, and figures redrawn only when their data changes."""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('matplotlib')
+
+from auth_report import HASH_FILE, write_report  # noqa: E402
+from radius_log_monitor import RadiusLogMonitor  # noqa: E402
+
+FIGURES = ['timeline', 'users', 'heatmap']
+
+
+@pytest.fixture(scope='module')
+def events(auth_log):
+    return RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+
+
+def test_report_is_rendered_once(events, tmp_path):
+    output = str(tmp_path / 'report')
+    assert write_report(events, output, 'svg', workers=1) == (FIGURES, [])
+    for name in FIGURES:
+        with open(os.path.join(output, f"{name}.svg")) as f:
+            assert f.read(200).lstrip().startswith('<?xml')
+    with open(os.path.join(output, 'index.html')) as f:
+        index = f.read()
+    assert f"<td>{len(events)}</td>" in index and 'src="heatmap.svg"' in index
+    with open(os.path.join(output, HASH_FILE)) as f:
+        assert sorted(json.load(f)) == sorted(FIGURES)
+
+    # Unchanged data: nothing is redrawn
+    assert write_report(events, output, 'svg', workers=1) == ([], FIGURES)
+    # A deleted figure is redrawn, and so is every figure when the data changes
+    os.remove(os.path.join(output, 'users.svg'))
+    assert write_report(events, output, 'svg', workers=1) == (['users'], ['timeline', 'heatmap'])
+    rendered, skipped = write_report(events.iloc[:len(events) // 2], output, 'svg', workers=2)
+    assert sorted(rendered) == sorted(FIGURES) and skipped == []
+
+
+def test_formats_are_cached_separately(events, tmp_path):
+    output = str(tmp_path / 'report')
+    write_report(events, output, 'svg', workers=1)
+    assert write_report(events, output, 'png', workers=1) == (FIGURES, [])
+    with open(os.path.join(output, 'timeline.png'), 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    with pytest.raises(ValueError):
+        write_report(events, output, 'pdf')
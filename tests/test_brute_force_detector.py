@@ -0,0 +1,55 @@
+"""BruteForceDetector: failure parsing, windowed thresholds and cooldown."""
+
+from datetime import datetime, timedelta
+
+from brute_force_detector import BruteForceDetector
+from radius_log_monitor import RadiusLogMonitor
+
+START = datetime(2025, 6, 2, 10, 0, 0)
+BAD = 'Login incorrect (pap: Cleartext password does not match "known good" password)'
+
+
+def line(seconds, user, nas='nas01', status=BAD):
+    stamp = (START + timedelta(seconds=seconds)).ctime()
+    return f"{stamp} : Auth: (0) {status}: [{user}] (from client {nas} port 0 cli 02-00-00-00-00-01)"
+
+
+def test_parse_failures_matches_the_parser(auth_log):
+    with open(auth_log) as f:
+        lines = f.read().splitlines()
+    detector = BruteForceDetector()
+    epochs, usernames, nas = detector.parse_failures(lines)
+    events = RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+    failed = events[~events['success']]
+    assert sorted(usernames.tolist()) == sorted(failed['username'].astype(str))
+    assert sorted(epochs.tolist()) == sorted(ts.timestamp() for ts in failed['timestamp'])
+    assert all(name.startswith('nas') for name in nas)
+    assert detector.events >= len(events)
+
+
+def test_user_alert_at_threshold():
+    detector = BruteForceDetector(user_threshold=5, nas_threshold=1000, window_seconds=60)
+    assert detector.feed_lines([line(i, 'victim') for i in range(4)]) == []
+    assert detector.feed_lines([line(5, 'victim', status='Login OK')]) == []
+    alerts = detector.feed_lines([line(6, 'victim')])
+    assert [(alert.kind, alert.key, alert.failures) for alert in alerts] == [('user', 'victim', 5)]
+    assert alerts[0].timestamp == START + timedelta(seconds=6)
+    # Within the cooldown the same user doesn't alert again
+    assert detector.feed_lines([line(7, 'victim')]) == []
+    assert detector.top_offenders('user') == [('victim', 6)]
+
+
+def test_failures_spread_beyond_the_window_do_not_alert():
+    detector = BruteForceDetector(user_threshold=5, window_seconds=60)
+    assert detector.feed_lines([line(i * 30, 'slow') for i in range(20)]) == []
+    assert detector.failures == 20
+
+
+def test_nas_alert_and_cooldown():
+    detector = BruteForceDetector(user_threshold=1000, nas_threshold=10, window_seconds=60,
+                                  cooldown_seconds=30)
+    lines = [line(second, f"user{second:03d}", nas='stuffing') for second in range(100)]
+    alerts = detector.feed_lines(lines)
+    assert [(alert.kind, alert.key) for alert in alerts] == [('nas', 'stuffing')] * 4
+    assert [alert.timestamp for alert in alerts] == \
+        [START + timedelta(seconds=second) for second in (9, 39, 69, 99)]
@@ -0,0 +1,107 @@
+"""detail_analyzer: record parsing, session joins across files and rollups."""
+
+import os
+from collections import Counter, defaultdict
+
+import pytest
+
+from detail_analyzer import analyze, analyze_file, find_detail_files, read_detail_records
+from generators import write_detail_file
+
+
+def record(header, **attributes):
+    lines = [header]
+    for name, value in attributes.items():
+        name = name.replace('_', '-')
+        lines.append(f'\t{name} = "{value}"' if isinstance(value, str) else f'\t{name} = {value}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def start(session, user, when='Mon Jun  2 10:00:00 2025'):
+    return record(when, Acct_Status_Type='Start', User_Name=user, Acct_Session_Id=session)
+
+
+def update(session, user, seconds, octets, status='Interim-Update', when='Mon Jun  2 11:00:00 2025', **extra):
+    return record(when, Acct_Status_Type=status, User_Name=user, Acct_Session_Id=session,
+                  Acct_Session_Time=seconds, Acct_Input_Octets=octets, Acct_Output_Octets=octets * 2, **extra)
+
+
+def write(path, *records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.writelines(records)
+    return path
+
+
+def test_read_detail_records(tmp_path):
+    path = write(str(tmp_path / 'detail'), update('a', 'bob', 60, 5, Acct_Input_Gigawords=2, NAS_Port=3),
+                 record('Mon Jun  2 11:00:01 2025', Acct_Status_Type='Stop', Timestamp=1234))
+    first, second = read_detail_records(path)
+    assert first['User-Name'] == 'bob' and first['Acct-Input-Gigawords'] == '2'
+    assert 'NAS-Port' not in first
+    assert isinstance(first['Timestamp'], float)
+    assert second['Timestamp'] == '1234'
+
+
+def test_rollup_equals_the_stop_records(tmp_path):
+    path = str(tmp_path / '192.168.1.1' / 'detail-20250602')
+    os.makedirs(os.path.dirname(path))
+    write_detail_file(path, 20000, users=50)
+    expected = defaultdict(lambda: [0, 0, 0, 0])
+    causes = Counter()
+    for stop in read_detail_records(path):
+        if stop['Acct-Status-Type'] != 'Stop':
+            continue
+        usage = expected[stop['User-Name']]
+        usage[0] += 1
+        usage[1] += int(stop['Acct-Session-Time'])
+        usage[2] += (int(stop['Acct-Input-Gigawords']) << 32) + int(stop['Acct-Input-Octets'])
+        usage[3] += (int(stop['Acct-Output-Gigawords']) << 32) + int(stop['Acct-Output-Octets'])
+        causes[stop['Acct-Terminate-Cause']] += 1
+
+    rollup = analyze([path], workers=1)
+    assert rollup.users == dict(expected)
+    assert rollup.terminate_causes() == causes
+    assert list(rollup.nas) == ['192.168.1.1']
+    assert rollup.open_sessions == 0 and rollup.evicted == 0
+    df = rollup.frame()
+    assert df['total_octets'].is_monotonic_decreasing
+    assert df[sorted(causes)].sum(axis=1).tolist() == df['sessions'].tolist()
+
+
+def test_session_spanning_two_files(tmp_path):
+    first = write(str(tmp_path / 'nas1' / 'detail-20250601'),
+                  start('s1', 'alice'), update('s1', 'alice', 60, 100),
+                  start('s2', 'bob'), update('s2', 'bob', 30, 10))
+    second = write(str(tmp_path / 'nas1' / 'detail-20250602'),
+                   update('s1', 'alice', 120, 300, status='Stop', Acct_Terminate_Cause='User-Request'))
+    rollup = analyze(find_detail_files([str(tmp_path)]), workers=2)
+    # alice's Stop in the second file closes the session; bob's is still open
+    assert rollup.users == {'alice': [1, 120, 300, 600], 'bob': [1, 30, 10, 20]}
+    assert dict(rollup.user_causes['alice']) == {'User-Request': 1}
+    assert dict(rollup.user_causes['bob']) == {'Open': 1}
+    assert rollup.open_sessions == 1
+    assert find_detail_files([str(tmp_path)], date='20250602') == [second]
+    assert find_detail_files([first]) == [first]
+
+
+def test_accounting_on_closes_the_nas_sessions(tmp_path):
+    path = write(str(tmp_path / 'nas1' / 'detail-20250602'),
+                 start('s1', 'alice'), update('s1', 'alice', 60, 100), start('s2', 'bob'),
+                 record('Mon Jun  2 12:00:00 2025', Acct_Status_Type='Accounting-On', NAS_IP_Address='nas1'))
+    rollup, still_open, _ = analyze_file(path)
+    assert still_open == {}
+    assert rollup.users == {'alice': [1, 60, 100, 200], 'bob': [1, 0, 0, 0]}
+    assert rollup.terminate_causes() == {'NAS-Reboot': 2}
+    assert rollup.records['Accounting-On'] == 1
+
+
+@pytest.mark.parametrize('max_sessions, evicted', [(10, 0), (2, 1)])
+def test_session_table_is_bounded(tmp_path, max_sessions, evicted):
+    path = write(str(tmp_path / 'nas1' / 'detail-20250602'),
+                 start('s1', 'alice'), start('s2', 'bob'), start('s3', 'carol'))
+    rollup, still_open, _ = analyze_file(path, max_sessions=max_sessions)
+    assert rollup.evicted == evicted
+    assert len(still_open) == 3 - evicted
+    if evicted:
+        assert dict(rollup.user_causes) == {'alice': {'Evicted': 1}}
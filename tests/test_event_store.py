@@ -0,0 +1,80 @@
+"""EventStore: incremental ingest, crash recovery and pushed-down reads."""
+
+import glob
+import os
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from event_store import EventStore  # noqa: E402
+from radius_log_monitor import IncrementalLogReader, RadiusLogMonitor  # noqa: E402
+
+
+def events(df):
+    return sorted(zip(df['timestamp'], df['username'].astype(str), df['auth_result'].astype(str)))
+
+
+def parts(root):
+    return sorted(glob.glob(os.path.join(root, 'date=*', 'hour=*', '*.parquet')))
+
+
+@pytest.fixture
+def log(tmp_path, auth_log):
+    # Copied without its last newline, so the final line stays pending
+    path = str(tmp_path / 'radius.log')
+    with open(auth_log, 'rb') as f, open(path, 'wb') as out:
+        out.write(f.read()[:-1])
+    return path
+
+
+def test_incremental_ingest(tmp_path, log, auth_log):
+    store = EventStore(str(tmp_path / 'store'))
+    written = store.ingest(log)
+    assert store.ingest(log) == 0
+    with open(log, 'a') as f:
+        f.write('\n')
+    written += store.ingest(log)
+    expected = RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+    assert written == len(expected)
+    assert events(store.read()) == events(expected)
+
+
+def test_rerun_after_a_crash_does_not_duplicate_events(tmp_path, log, monkeypatch):
+    root = str(tmp_path / 'store')
+    store = EventStore(root)
+    store.BATCH_BYTES = 100000
+    save_checkpoint = IncrementalLogReader.save_checkpoint
+    saved = []
+
+    def crash_on_third_batch(reader):
+        if len(saved) == 2:
+            raise KeyboardInterrupt
+        saved.append(reader.committed_offset)
+        save_checkpoint(reader)
+
+    monkeypatch.setattr(IncrementalLogReader, 'save_checkpoint', crash_on_third_batch)
+    with pytest.raises(KeyboardInterrupt):
+        store.ingest(log)
+    crashed_parts = parts(root)
+    monkeypatch.setattr(IncrementalLogReader, 'save_checkpoint', save_checkpoint)
+    with open(log, 'a') as f:
+        f.write('\n')
+    store.ingest(log)
+
+    expected = RadiusLogMonitor(log).read_logs(since_hours=None)
+    assert events(store.read()) == events(expected)
+    assert set(crashed_parts) <= set(parts(root))
+
+
+def test_read_pushes_down_window_and_users(tmp_path, auth_log):
+    store = EventStore(str(tmp_path / 'store'))
+    store.ingest(auth_log)
+    df = RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+    start = df['timestamp'].iloc[len(df) // 2]
+    end = start + timedelta(minutes=30)
+    users = ['user00007', 'user00042']
+    window = df[(df['timestamp'] >= start) & (df['timestamp'] <= end) & df['username'].isin(users)]
+    assert events(store.read(start=start, end=end, usernames=users)) == events(window)
+    assert store.read(start=end + timedelta(days=365)).empty
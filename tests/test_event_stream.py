@@ -0,0 +1,106 @@
+"""event_stream: merging rotated sources in time order, and the correlation."""
+
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta
+
+from event_stream import (
+    AUTH, SESSION_START, SESSION_STOP, AuthAccountingCorrelator, log_dir_sources, merge_events,
+)
+
+START = datetime(2025, 6, 2, 10, 0, 0)
+
+
+def stamp(seconds):
+    # radius.log and %t use the ctime() format
+    return (START + timedelta(seconds=seconds)).ctime()
+
+
+def radius_line(seconds, user, ok=True):
+    status = 'Login OK' if ok else 'Login incorrect'
+    return f"{stamp(seconds)} : Auth: (0) {status}: [{user}] (from client nas01 port 0)\n"
+
+
+def linelog_line(seconds, user, ok=True):
+    return f"{stamp(seconds)} : {'Accepted' if ok else 'Rejected'} user: {user}\n"
+
+
+def accounting_line(seconds, user, address, stop_after=None):
+    fields = f"did a cli b port 1 ip {address}"
+    if stop_after is None:
+        return f"{stamp(seconds)} : Connect: [{user}] ({fields})\n"
+    return f"{stamp(seconds)} : Disconnect: [{user}] ({fields}) {stop_after} seconds\n"
+
+
+def write(path, lines, compress=False):
+    opener = gzip.open if compress else open
+    with opener(path, 'wt') as f:
+        f.writelines(lines)
+
+
+def test_stamp_matches_radius_log():
+    assert stamp(0) == 'Mon Jun  2 10:00:00 2025'
+
+
+def test_merges_rotated_and_compressed_files_in_order(tmp_path):
+    log_dir = str(tmp_path)
+    write(os.path.join(log_dir, 'radius.log.1.gz'), [radius_line(0, 'alice'), radius_line(10, 'bob')], compress=True)
+    write(os.path.join(log_dir, 'radius.log'), [radius_line(100, 'carol')])
+    write(os.path.join(log_dir, 'linelog-events.1'), [linelog_line(0, 'alice'), linelog_line(10, 'bob')])
+    write(os.path.join(log_dir, 'linelog-events'), [linelog_line(100, 'carol')])
+    write(os.path.join(log_dir, 'linelog-accounting-events'),
+          [accounting_line(2, 'alice', '10.0.0.1'), accounting_line(50, 'alice', '10.0.0.1', 48)])
+
+    events = list(merge_events(log_dir_sources(log_dir)))
+    assert [event.timestamp for event in events] == sorted(event.timestamp for event in events)
+    assert [(event.source, event.username) for event in events] == [
+        ('radius', 'alice'), ('linelog', 'alice'),
+        ('linelog-accounting', 'alice'),
+        ('radius', 'bob'), ('linelog', 'bob'),
+        ('linelog-accounting', 'alice'),
+        ('radius', 'carol'), ('linelog', 'carol'),
+    ]
+    assert events[2].kind == SESSION_START and events[5].kind == SESSION_STOP
+    assert events[5].session_time == 48 and events[5].address == '10.0.0.1'
+
+
+def test_untimestamped_linelog_is_left_out_with_a_warning(tmp_path, caplog):
+    log_dir = str(tmp_path)
+    write(os.path.join(log_dir, 'radius.log'), [radius_line(0, 'alice')])
+    write(os.path.join(log_dir, 'linelog'), ['Accepted user: alice\n'])
+    with caplog.at_level(logging.WARNING, logger='event_stream'):
+        sources = log_dir_sources(log_dir)
+    assert list(sources) == [os.path.join(log_dir, 'radius.log*')]
+    assert 'linelog_events' in caplog.text
+    assert [event.kind for event in merge_events(sources)] == [AUTH]
+
+
+def test_correlation(tmp_path):
+    log_dir = str(tmp_path)
+    write(os.path.join(log_dir, 'radius.log'), [
+        radius_line(0, 'alice'),
+        radius_line(5, 'bob', ok=False),
+        radius_line(10, 'carol'),          # never opens a session
+        radius_line(20, 'alice'),          # a second, overlapping session
+    ])
+    write(os.path.join(log_dir, 'linelog-events'), [linelog_line(0, 'alice'), linelog_line(20, 'alice')])
+    write(os.path.join(log_dir, 'linelog-accounting-events'), [
+        accounting_line(1, 'alice', '10.0.0.1'),
+        accounting_line(22, 'alice', '10.0.0.2'),
+        accounting_line(30, 'dave', '10.0.0.3'),   # no login
+        accounting_line(40, 'alice', '10.0.0.1', 39),
+        accounting_line(45, 'erin', '10.0.0.4', 5),  # no start
+    ])
+    correlator = AuthAccountingCorrelator(window_seconds=60).feed_all(merge_events(log_dir_sources(log_dir)))
+    assert sum(correlator.login_delays.values()) == 2
+    assert correlator.sessions_without_login == 1
+    assert correlator.logins_without_session == 1
+    assert correlator.stops_without_start == 1
+    assert set(correlator.open_sessions) == {('alice', '10.0.0.2'), ('dave', '10.0.0.3')}
+    table = correlator.user_table()
+    assert table.loc['alice', 'sessions'] == 2
+    assert table.loc['alice', 'session seconds'] == 39
+    assert table.loc['alice', 'radius accepted'] == 2
+    assert table.loc['alice', 'linelog accepted'] == 2
+    assert table.loc['bob', 'radius rejected'] == 1
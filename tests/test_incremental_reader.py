@@ -0,0 +1,107 @@
+"""IncrementalLogReader: appends, partial lines, rotation and truncation."""
+
+import os
+
+from radius_log_monitor import IncrementalLogReader
+
+
+def append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_returns_only_appended_lines(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\nline2\n')
+    reader = IncrementalLogReader(log)
+    assert reader.read_new_lines() == ['line1', 'line2']
+    assert reader.read_new_lines() == []
+    append(log, 'line3\n')
+    assert reader.read_new_lines() == ['line3']
+
+
+def test_holds_back_unterminated_line(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\nline2-part')
+    reader = IncrementalLogReader(log)
+    assert reader.read_new_lines() == ['line1']
+    append(log, '-rest\n')
+    assert reader.read_new_lines() == ['line2-part-rest']
+
+
+def test_rename_rotation_mid_line(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\nline2-part')
+    reader = IncrementalLogReader(log)
+    assert reader.read_new_lines() == ['line1']
+    append(log, '-rest\nline3')
+    os.rename(log, log + '.1')
+    append(log, 'new1\nnew2')
+    # The old file's last line ends at the boundary, not on the new file's first line
+    assert reader.read_new_lines() == ['line2-part-rest', 'line3', 'new1']
+    append(log, '\n')
+    assert reader.read_new_lines() == ['new2']
+
+
+def test_rename_rotation_terminated_tail(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\n')
+    reader = IncrementalLogReader(log)
+    assert reader.read_new_lines() == ['line1']
+    append(log, 'line2\n')
+    os.rename(log, log + '.1')
+    append(log, 'new1\n')
+    assert reader.read_new_lines() == ['line2', 'new1']
+
+
+def test_missing_file_between_rename_and_reopen(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\n')
+    reader = IncrementalLogReader(log)
+    reader.read_new_lines()
+    os.rename(log, log + '.1')
+    assert reader.read_new_lines() == []
+    append(log, 'new1\n')
+    assert reader.read_new_lines() == ['new1']
+
+
+def test_truncation(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\nline2\n')
+    reader = IncrementalLogReader(log)
+    reader.read_new_lines()
+    with open(log, 'w') as f:
+        f.write('new1\n')
+    assert reader.read_new_lines() == ['new1']
+
+
+def test_copytruncate_hidden_by_new_writes(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'first line of the old file\n')
+    reader = IncrementalLogReader(log)
+    reader.read_new_lines()
+    # Truncated and refilled past the old offset before the next read
+    with open(log, 'w') as f:
+        f.write('other first line\n' + 'x' * 40 + '\n')
+    assert reader.read_new_lines() == ['other first line', 'x' * 40]
+
+
+def test_checkpoint_resumes_at_first_unreturned_line(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    append(log, 'line1\nline2-part')
+    reader = IncrementalLogReader(log, checkpoint)
+    assert reader.read_new_lines() == ['line1']
+    reader.close()
+    append(log, '-rest\n')
+    assert IncrementalLogReader(log, checkpoint).read_new_lines() == ['line2-part-rest']
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path, caplog):
+    log = str(tmp_path / 'radius.log')
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    append(log, 'line1\n')
+    append(checkpoint, '{not json')
+    reader = IncrementalLogReader(log, checkpoint)
+    assert 'Ignoring unreadable checkpoint' in caplog.text
+    assert reader.read_new_lines() == ['line1']
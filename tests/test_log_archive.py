@@ -0,0 +1,109 @@
+"""log_archive: parallel parses of rotated and compressed logs equal a serial parse."""
+
+import bz2
+import gzip
+import os
+import shutil
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+import log_archive
+from generators import END, write_auth_log
+from log_archive import find_log_files, overlapping_files, read_log_files, read_range, split_ranges
+from radius_log_monitor import RadiusLogMonitor
+
+COLUMNS = ['timestamp', 'username', 'status', 'auth_result', 'request_type']
+
+
+def events(path, **kwargs):
+    df = RadiusLogMonitor(path, **kwargs).read_logs(since_hours=None, compact=False)
+    return df[COLUMNS].astype(object).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def per_line(auth_log):
+    return RadiusLogMonitor(auth_log).read_logs(since_hours=None, compact=False, vectorized=False)[COLUMNS] \
+        .astype(object).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_parse_matches_per_line(auth_log, per_line, workers, monkeypatch):
+    # Small chunks, so each worker gets several ranges
+    monkeypatch.setattr(log_archive, 'CHUNK_BYTES', 64 * 1024)
+    pd.testing.assert_frame_equal(events(auth_log, workers=workers), per_line)
+
+
+def test_ranges_cover_every_line_once(auth_log):
+    with open(auth_log, 'rb') as f:
+        data = f.read()
+    ranges = split_ranges(auth_log, 7)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert b''.join(read_range(auth_log, start, end) for start, end in ranges) == data
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory):
+    """radius.log with three older rotations: plain, gzip and bzip2, a day each."""
+    directory = tmp_path_factory.mktemp('archive')
+    for day, name in enumerate(['radius.log', 'radius.log.1', 'radius.log.2.gz', 'radius.log.3.bz2']):
+        plain = str(directory / name.split('.gz')[0].split('.bz2')[0])
+        write_auth_log(plain, 3000, users=100, hours=23, end=END - timedelta(days=day), seed=day)
+        opener = {'.gz': gzip.open, '.bz2': bz2.open}.get(os.path.splitext(name)[1])
+        if opener:
+            with open(plain, 'rb') as f, opener(str(directory / name), 'wb') as out:
+                shutil.copyfileobj(f, out)
+            os.remove(plain)
+            # Compressed when rotated, right after the last line
+            rotated = (END - timedelta(days=day)).timestamp()
+            os.utime(directory / name, (rotated, rotated))
+    # A log index sidecar is not a log
+    (directory / 'radius.log.idx').write_bytes(b'RLIX')
+    return str(directory)
+
+
+def test_archive_is_read_in_time_order(archive):
+    files = find_log_files(archive)
+    assert [os.path.basename(path) for path in files] == \
+        ['radius.log', 'radius.log.1', 'radius.log.2.gz', 'radius.log.3.bz2']
+    expected = pd.concat([events(path, workers=1) for path in reversed(files)], ignore_index=True)
+    assert expected['timestamp'].tolist() == sorted(expected['timestamp'])
+    for workers in (1, 2):
+        pd.testing.assert_frame_equal(events(archive, workers=workers), expected)
+    pd.testing.assert_frame_equal(events(os.path.join(archive, 'radius.log*'), workers=None), expected)
+
+
+def test_only_overlapping_files_are_read(archive):
+    files = find_log_files(archive)
+    since = END - timedelta(hours=30)
+    # The compressed files' modification time stands in for their last line
+    assert overlapping_files(files, start=since) == [files[1], files[0]]
+    assert overlapping_files(files, start=since, end=END - timedelta(hours=26)) == [files[1]]
+
+
+def test_corrupted_timestamps_are_skipped(tmp_path):
+    path = str(tmp_path / 'radius.log')
+    with open(path, 'w') as f:
+        f.write("Xyz Jun 99 99:99:99 2025 : Auth: (0) Login OK: [a] (from client nas01 port 0)\n"
+                "Mon Jun  2 10:00:00 2025 : Auth: (1) Login OK: [b] (from client nas01 port 0)\n"
+                "Mon Jun  2 10:00:05 2025 : Auth: (2) Login OK: [c] (from client nas01 port 0)\n"
+                "Xyz Jun 99 99:99:99 2025 : Auth: (3) Login OK: [d] (from client nas01 port 0)\n")
+    assert log_archive.first_timestamp(path) == END.replace(hour=10)
+    assert log_archive.last_timestamp(path) == END.replace(hour=10, second=5)
+
+
+def test_single_plain_file_is_not_split_by_default(auth_log, archive, monkeypatch):
+    calls = []
+    original = log_archive.read_log_files
+
+    def spy(*args, **kwargs):
+        calls.append(kwargs['workers'])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(log_archive, 'read_log_files', spy)
+    RadiusLogMonitor(auth_log, workers=None).read_logs(since_hours=None)
+    assert calls == []
+    RadiusLogMonitor(auth_log, workers=2).read_logs(since_hours=None)
+    RadiusLogMonitor(archive, workers=None).read_logs(since_hours=None)
+    assert calls == [2, None]
@@ -0,0 +1,98 @@
+"""LogIndex: lookups equal grep, through incremental updates, rewrites and compression."""
+
+import gzip
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from generators import END, write_auth_log
+from log_index import LogIndex, decode_varints, encode_varints, find_lines, index_path
+
+pytestmark = pytest.mark.skipif(shutil.which('grep') is None, reason='needs grep')
+
+USERS = ['user00007', 'user00042', 'user00199', 'nobody']
+NASES = ['nas03']
+
+
+def grep(path, text):
+    """The lines of path containing text, as grep -F finds them."""
+    result = subprocess.run(['grep', '-F', '-a', '--', text, path], capture_output=True)
+    return result.stdout.decode('utf-8', errors='replace').splitlines()
+
+
+def indexed(pattern, users=(), nases=()):
+    return [line for _, line in find_lines(pattern, users, nases)]
+
+
+def check(path):
+    for user in USERS:
+        assert indexed(path, [user]) == grep(path, f"[{user}]"), user
+    for nas in NASES:
+        assert indexed(path, nases=[nas]) == grep(path, f"(from client {nas} "), nas
+    both = [line for line in grep(path, '[user00042]') if '(from client nas03 ' in line]
+    assert indexed(path, ['user00042'], ['nas03']) == both
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 2 ** 35, 2 ** 63 - 1], dtype=np.uint64)
+    data, lengths = encode_varints(values)
+    assert len(data) == lengths.sum()
+    assert decode_varints(data).tolist() == values.tolist()
+
+
+def test_lookup_equals_grep(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    write_auth_log(log, 10000, users=200, malformed_ratio=0.01)
+    check(log)
+    assert os.path.exists(index_path(log))
+
+
+def test_incremental_update_equals_grep(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    more = str(tmp_path / 'more.log')
+    write_auth_log(log, 5000, users=200, seed=1)
+    write_auth_log(more, 5000, users=200, seed=2)
+    index = LogIndex(log)
+    assert index.update() > 0
+    check(log)
+    with open(more) as f:
+        appended = f.read()
+    # An unterminated last line waits until it is complete
+    cut = appended.index('[user00042]') + 5
+    with open(log, 'a') as f:
+        f.write(appended[:cut])
+    added = index.update()
+    check(log)
+    with open(log, 'a') as f:
+        f.write(appended[cut:])
+    added += index.update()
+    assert added == sum(1 for line in appended.splitlines() if 'Auth:' in line and ']' in line)
+    assert index.update() == 0
+    check(log)
+
+
+def test_rewritten_file_is_indexed_again(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    write_auth_log(log, 5000, users=200, seed=1)
+    LogIndex(log).update()
+    # Truncated and rewritten with other content, larger than before
+    write_auth_log(log, 6000, users=200, seed=3)
+    check(log)
+
+
+def test_compressed_and_rotated_files(tmp_path):
+    current = str(tmp_path / 'radius.log')
+    rotated = str(tmp_path / 'radius.log.1')
+    write_auth_log(rotated, 5000, users=200, seed=1, end=END.replace(day=1))
+    write_auth_log(current, 5000, users=200, seed=2)
+    with open(rotated, 'rb') as f, gzip.open(rotated + '.gz', 'wb') as out:
+        shutil.copyfileobj(f, out)
+    expected = {user: grep(rotated, f"[{user}]") + grep(current, f"[{user}]") for user in USERS}
+    os.remove(rotated)
+    pattern = str(tmp_path / 'radius.log*')
+    for user in USERS:
+        assert indexed(pattern, [user]) == expected[user], user
+    assert sorted(os.listdir(tmp_path)) == ['radius.log', 'radius.log.1.gz', 'radius.log.1.gz.idx', 'radius.log.idx']
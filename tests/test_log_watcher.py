@@ -0,0 +1,106 @@
+"""log_watcher: change notification (inotify and polling) and follow()'s throttled refreshes."""
+
+import asyncio
+import os
+
+import pytest
+
+from log_watcher import LogWatcher, follow
+
+
+def append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+@pytest.fixture(params=[True, False], ids=['inotify', 'polling'])
+def use_inotify(request):
+    return request.param
+
+
+def test_changes_wake_the_watcher(tmp_path, use_inotify):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\n')
+
+    async def scenario():
+        watcher = LogWatcher(log, poll_interval=0.02, use_inotify=use_inotify)
+        if use_inotify and watcher.mode != 'inotify':
+            pytest.skip('inotify is unavailable')
+        try:
+            assert not await watcher.changed(0.1)
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, append, log, 'line2\n')
+            assert await watcher.changed(2)
+            # Rename rotation, then the daemon creates the new log
+            loop.call_later(0.05, os.rename, log, log + '.1')
+            assert await watcher.changed(2)
+            loop.call_later(0.05, append, log, 'new\n')
+            assert await watcher.changed(2)
+        finally:
+            watcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_other_files_do_not_wake_inotify(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line1\n')
+
+    async def scenario():
+        watcher = LogWatcher(log)
+        if watcher.mode != 'inotify':
+            pytest.skip('inotify is unavailable')
+        try:
+            asyncio.get_running_loop().call_later(0.02, append, str(tmp_path / 'other.log'), 'x\n')
+            assert not await watcher.changed(0.2)
+        finally:
+            watcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_follow_delivers_lines_and_throttles_refreshes(tmp_path, use_inotify):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'old1\nold2\n')
+    received = []
+    refreshes = []
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        watcher = LogWatcher(log, poll_interval=0.01, use_inotify=use_inotify)
+        task = asyncio.create_task(follow(
+            log, received.extend, lambda: refreshes.append(loop.time()),
+            refresh_interval=0.3, idle_interval=5, watcher=watcher))
+        await asyncio.sleep(0.1)
+        # A burst of writes
+        for i in range(20):
+            append(log, f"burst{i}\n")
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert received == ['old1', 'old2'] + [f"burst{i}" for i in range(20)]
+    # The first read, then at most one refresh per refresh_interval during the
+    # 0.4 s burst, and a last one for its tail
+    assert 2 <= len(refreshes) <= 4
+    assert all(later - earlier >= 0.29 for earlier, later in zip(refreshes, refreshes[1:]))
+
+
+def test_follow_refreshes_when_idle(tmp_path):
+    log = str(tmp_path / 'radius.log')
+    append(log, 'line\n')
+    refreshes = []
+
+    async def scenario():
+        task = asyncio.create_task(follow(log, lambda lines: None, lambda: refreshes.append(1),
+                                          refresh_interval=0.05, idle_interval=0.1, poll_interval=0.01))
+        await asyncio.sleep(0.55)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert 4 <= len(refreshes) <= 7
@@ -0,0 +1,111 @@
+"""metrics_exporter: counters equal the parsed log, and the exposition is well-formed."""
+
+import re
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from metrics_exporter import (
+    CONTENT_TYPE, Histogram, MetricsCollector, MetricsHandler, escape_label, parse_address,
+)
+from radius_log_monitor import RadiusLogMonitor
+
+SAMPLE = re.compile(r'^(?P<name>[a-z_]+)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+
+
+def samples(text):
+    """Return {(name, labels): value} of an exposition, checking every line parses."""
+    found = {}
+    for line in text.splitlines():
+        if line.startswith('# '):
+            assert line.split()[1] in ('HELP', 'TYPE')
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        found[match.group('name'), match.group('labels') or ''] = float(match.group('value'))
+    return found
+
+
+@pytest.fixture
+def collector(auth_log):
+    collector = MetricsCollector(auth_log, from_start=True)
+    yield collector
+    collector.close()
+
+
+def test_counters_match_the_parsed_log(auth_log, collector):
+    collector.poll()
+    events = RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+    successes = int(events['success'].sum())
+    assert collector.results == {'success': successes, 'failed': len(events) - successes}
+    assert sum(collector.nas_results.values()) == len(events)
+    assert {nas for nas, _ in collector.nas_results} == {f"nas{i:02d}" for i in range(8)}
+    with open(auth_log) as f:
+        lines = f.read().splitlines()
+    assert collector.lines == len(lines)
+    assert collector.parse_errors == sum('Auth:' in line for line in lines) - len(events)
+    failures = events.loc[~events['success'], 'username'].astype(str).value_counts()
+    # The burst victims are heavy hitters, which SpaceSaving always tracks
+    heavy = failures[failures > failures.sum() / collector.failures.k]
+    assert len(heavy) and set(heavy.index) <= set(collector.failures.counts)
+    assert collector.last_event == events['timestamp'].max().to_pydatetime().timestamp()
+
+
+def test_exposition(collector):
+    collector.poll()
+    found = samples(collector.exposition.decode())
+    assert found['freeradius_auth_total', 'result="success"'] == collector.results['success']
+    assert found['freeradius_log_polls_total', ''] == 1
+    buckets = [value for (name, _), value in found.items() if name == 'freeradius_event_delay_seconds_bucket']
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == found['freeradius_event_delay_seconds_count', ''] == sum(collector.results.values())
+
+
+def test_only_new_lines_are_counted_by_default(auth_log, tmp_path):
+    log = tmp_path / 'radius.log'
+    log.write_bytes(open(auth_log, 'rb').read())
+    collector = MetricsCollector(str(log))
+    collector.poll()
+    assert collector.lines == 0 and not collector.results
+    with open(log, 'a') as f:
+        f.write('Mon Jun  2 12:00:00 2025 : Auth: (1) Login incorrect: [eve"\\] (from client nas99 port 0)\n')
+    collector.poll()
+    assert collector.results == {'failed': 1}
+    assert 'freeradius_user_failures{username="eve\\"\\\\"} 1' in collector.exposition.decode()
+    collector.close()
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram((1, 5))
+    histogram.observe([0.5, 1, 3, 5, 7])
+    assert histogram.lines('h') == ['h_bucket{le="1"} 2', 'h_bucket{le="5"} 4', 'h_bucket{le="+Inf"} 5',
+                                    'h_sum 16.5', 'h_count 5']
+
+
+def test_labels_and_addresses():
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+    assert parse_address('9812') == ('', 9812)
+    assert parse_address('127.0.0.1:9812') == ('127.0.0.1', 9812)
+    assert parse_address('[::1]:9812') == ('[::1]', 9812)
+
+
+def test_http_endpoint(collector):
+    collector.poll()
+    handler = type('Handler', (MetricsHandler,), {'collector': collector})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + '/metrics') as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert response.read() == collector.exposition
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(base + '/other')
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
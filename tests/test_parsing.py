@@ -0,0 +1,44 @@
+"""The per-line and vectorized parse paths return the same events."""
+
+import pandas as pd
+import pytest
+
+from radius_log_monitor import RadiusLogMonitor
+
+COLUMNS = ['timestamp', 'username', 'status', 'auth_result', 'request_type']
+
+
+def read(path, workers=1, chunk_lines=None, **kwargs):
+    monitor = RadiusLogMonitor(path, workers=workers)
+    if chunk_lines:
+        monitor.CHUNK_LINES = chunk_lines
+    df = monitor.read_logs(since_hours=None, compact=False, **kwargs)
+    return df[COLUMNS].astype(object).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def per_line(auth_log):
+    return read(auth_log, vectorized=False)
+
+
+def test_per_line_matches_parse_log_line(auth_log, per_line):
+    monitor = RadiusLogMonitor(auth_log)
+    with open(auth_log) as f:
+        events = [monitor.parse_log_line(line) for line in f if 'Auth:' in line]
+    expected = pd.DataFrame([event for event in events if event])[COLUMNS].astype(object)
+    # Malformed lines are rejected, the rest all parse
+    assert 0 < len(expected) < len(events)
+    pd.testing.assert_frame_equal(per_line, expected)
+
+
+@pytest.mark.parametrize('chunk_lines', [None, 997], ids=['vectorized', 'small-chunks'])
+def test_vectorized_matches_per_line(auth_log, per_line, chunk_lines):
+    pd.testing.assert_frame_equal(read(auth_log, chunk_lines=chunk_lines), per_line)
+
+
+def test_compact_frame_expands_to_the_same_events(auth_log, per_line):
+    compact = RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+    assert isinstance(compact['username'].dtype, pd.CategoricalDtype)
+    assert compact['timestamp'].tolist() == per_line['timestamp'].tolist()
+    assert compact['username'].astype(str).tolist() == per_line['username'].tolist()
+    assert compact['auth_result'].astype(str).tolist() == per_line['auth_result'].tolist()
@@ -0,0 +1,132 @@
+"""rlm_python3 policy hooks: request formats, cached decisions and reloads."""
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+import policy
+import radiusd
+
+USERS = """\
+alice   Cleartext-Password := "secret"
+        Reply-Message := "Hello alice"
+
+bob     NAS-IP-Address == 10.0.0.1
+
+DEFAULT Service-Type == Administrative-User, Auth-Type := Reject
+"""
+
+REQUEST = (('User-Name', '"alice"'), ('NAS-IP-Address', '10.0.0.1'), ('Acct-Status-Type', 'Start'),
+           ('Acct-Session-Id', '"0000002a"'))
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / 'authorize'
+    path.write_text(USERS)
+    return str(path)
+
+
+@pytest.fixture
+def hooks(users_file, monkeypatch):
+    monkeypatch.setattr(radiusd, 'config', {'users_file': users_file, 'reload_interval': '0'}, raising=False)
+    assert policy.instantiate(None) == 0
+    yield policy
+    policy.detach(None)
+
+
+def test_ttl_cache_lru_and_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(policy.time, 'monotonic', lambda: now[0])
+    cache = policy.TTLCache(maxsize=2, ttl=10)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # 'b' was the least recently used
+    assert cache.get('b') is None and cache.get('c') == 3
+    now[0] += 10
+    assert cache.get('a') is None and 'a' not in cache.data
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+@pytest.mark.parametrize('argument', [
+    REQUEST,
+    (REQUEST, (), (), (), (), ()),
+    {'request': REQUEST, 'reply': ()},
+], ids=['request', 'pass_all_vps', 'pass_all_vps_dict'])
+def test_request_formats(argument):
+    assert policy.request_list(argument) == REQUEST
+    assert policy.request_attributes(argument) == {
+        'User-Name': 'alice', 'NAS-IP-Address': '10.0.0.1', 'Acct-Status-Type': 'Start',
+        'Acct-Session-Id': '0000002a',
+    }
+    assert policy.request_list(None) == ()
+
+
+def test_authorize(hooks, capsys):
+    assert hooks.authorize(REQUEST) == (
+        radiusd.RLM_MODULE_UPDATED, (('Reply-Message', ':=', 'Hello alice'),),
+        (('Cleartext-Password', ':=', 'secret'),))
+    assert hooks.authorize((('User-Name', 'bob'), ('NAS-IP-Address', '10.0.0.1'))) == radiusd.RLM_MODULE_OK
+    assert hooks.authorize((('User-Name', 'bob'), ('NAS-IP-Address', '10.0.0.2'))) == radiusd.RLM_MODULE_NOOP
+    assert hooks.authorize((('User-Name', 'carol'), ('Service-Type', 'Administrative-User'))) == \
+        (radiusd.RLM_MODULE_UPDATED, (), (('Auth-Type', ':=', 'Reject'),))
+    assert hooks.authorize((('NAS-IP-Address', '10.0.0.1'),)) == radiusd.RLM_MODULE_NOOP
+    assert hooks.post_auth(REQUEST) == radiusd.RLM_MODULE_OK
+    assert hooks.accounting(REQUEST) == radiusd.RLM_MODULE_OK
+    # Nothing is printed on the packet path
+    assert capsys.readouterr().out == ''
+
+
+def test_decisions_are_cached_per_compared_attributes(hooks):
+    cache = hooks.module.cache
+    hooks.authorize(REQUEST)
+    # Acct-Session-Id isn't compared by any entry: same cache key
+    hooks.authorize(REQUEST[:3] + (('Acct-Session-Id', 'other'),))
+    assert (cache.hits, cache.misses) == (1, 1)
+    hooks.authorize(REQUEST[:1] + (('NAS-IP-Address', '10.0.0.2'),))
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_reload_swaps_policy_and_cache(users_file, monkeypatch):
+    monkeypatch.setattr(radiusd, 'config', {'users_file': users_file, 'reload_interval': '0.02'},
+                        raising=False)
+    assert policy.instantiate(None) == 0
+    try:
+        first_state = policy.module.state
+        assert policy.authorize((('User-Name', 'dave'),)) == radiusd.RLM_MODULE_NOOP
+        st = os.stat(users_file)
+        with open(users_file, 'a') as f:
+            f.write('\ndave Cleartext-Password := "x"\n')
+        os.utime(users_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        deadline = time.monotonic() + 5
+        while policy.module.reloads == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert policy.module.state[1] is not first_state[1]
+        assert policy.authorize((('User-Name', 'dave'),)) == \
+            (radiusd.RLM_MODULE_UPDATED, (), (('Cleartext-Password', ':=', 'x'),))
+    finally:
+        policy.detach(None)
+
+
+def test_instantiate_fails_on_a_bad_users_file(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'authorize'
+    path.write_text('    Reply-Message := "outside any entry"\n')
+    monkeypatch.setattr(radiusd, 'config', {'users_file': str(path)}, raising=False)
+    assert policy.instantiate(None) == -1
+    assert 'cannot load users policy' in capsys.readouterr().out
+
+
+def test_accounting_records_are_written(users_file, tmp_path, monkeypatch):
+    database = str(tmp_path / 'accounting.db')
+    monkeypatch.setattr(radiusd, 'config', {'users_file': users_file, 'reload_interval': '0',
+                                            'accounting_db': database}, raising=False)
+    assert policy.instantiate(None) == 0
+    for _ in range(3):
+        assert policy.accounting(REQUEST) == radiusd.RLM_MODULE_OK
+    policy.detach(None)
+    with sqlite3.connect(database) as db:
+        assert db.execute('SELECT COUNT(*) FROM accounting').fetchone() == (3,)
@@ -0,0 +1,114 @@
+"""Request templates encode exactly what pyrad encodes."""
+
+import asyncio
+import os
+import threading
+
+import pyrad.packet
+import pytest
+from pyrad.packet import AcctPacket, AuthPacket
+
+from radius_load import start_mock_responder
+from radius_packets import AccessRequestTemplate, AccountingRequestTemplate, load_dictionary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DICTIONARY = os.path.join(ROOT, 'dictionary')
+SECRET = b'testing123'
+NAS = {'NAS-IP-Address': '192.168.1.1', 'NAS-Port': 0}
+
+
+@pytest.fixture(scope='module')
+def dictionary():
+    return load_dictionary(DICTIONARY)
+
+
+def test_dictionary_is_parsed_once(dictionary):
+    assert load_dictionary(DICTIONARY) is dictionary
+    assert load_dictionary(os.path.relpath(DICTIONARY)) is dictionary
+    assert load_dictionary(dictionary) is dictionary
+
+
+@pytest.mark.parametrize('username, password', [
+    ('user1', '1234'),
+    ('', ''),
+    ('bob', 'x' * 15),
+    ('bob', 'x' * 16),
+    ('bob', 'x' * 17),
+    ('jürgen', 'pässwörd' * 5),
+])
+def test_access_request_matches_pyrad(dictionary, username, password):
+    template = AccessRequestTemplate(SECRET, dictionary, NAS)
+    raw, authenticator = template.encode(7, username, password)
+    request = AuthPacket(code=pyrad.packet.AccessRequest, secret=SECRET, dict=dictionary, id=7,
+                         authenticator=authenticator)
+    request['User-Name'] = username
+    request['User-Password'] = request.PwCrypt(password)
+    for name, value in NAS.items():
+        request[name] = value
+    assert raw == request.RequestPacket()
+    decoded = AuthPacket(packet=raw, secret=SECRET, dict=dictionary)
+    assert decoded.PwDecrypt(decoded[2][0]) == password
+
+
+def test_authenticators_differ(dictionary):
+    template = AccessRequestTemplate(SECRET, dictionary)
+    assert template.encode(1, 'a', 'b')[1] != template.encode(1, 'a', 'b')[1]
+
+
+@pytest.mark.parametrize('status, counters, cause, username', [
+    ('Start', {}, None, 'user1'),
+    ('Interim-Update', {'session_time': 60, 'input_octets': 123456, 'output_octets': 7890}, None, 'user1'),
+    ('Stop', {'session_time': 3600, 'input_octets': 2 ** 32 + 5, 'output_octets': 1, 'delay_time': 2},
+     'User-Request', 'user1'),
+    ('Stop', {}, 'Idle-Timeout', None),
+    (1, {}, None, 'user1'),
+])
+def test_accounting_request_matches_pyrad(dictionary, status, counters, cause, username):
+    template = AccountingRequestTemplate(SECRET, dictionary, NAS)
+    extra = template.encode_attributes({'Acct-Authentic': 1})
+    raw, authenticator = template.encode(9, status, '0000002a', username, terminate_cause=cause,
+                                         session_attributes=extra, **counters)
+    request = AcctPacket(code=pyrad.packet.AccountingRequest, secret=SECRET, dict=dictionary, id=9)
+    request['Acct-Status-Type'] = status
+    if request['Acct-Status-Type'][0] in ('Stop', 'Interim-Update'):
+        request['Acct-Session-Time'] = counters.get('session_time', 0)
+        request['Acct-Input-Octets'] = counters.get('input_octets', 0) & 0xFFFFFFFF
+        request['Acct-Output-Octets'] = counters.get('output_octets', 0)
+        request['Acct-Delay-Time'] = counters.get('delay_time', 0)
+    if cause is not None:
+        request['Acct-Terminate-Cause'] = cause
+    if username is not None:
+        request['User-Name'] = username
+    request['Acct-Session-Id'] = '0000002a'
+    request['Acct-Authentic'] = 1
+    for name, value in NAS.items():
+        request[name] = value
+    assert raw == request.RequestPacket()
+    assert authenticator == raw[4:20]
+    assert AcctPacket(packet=raw, secret=SECRET, dict=dictionary).VerifyAcctRequest()
+
+
+@pytest.fixture
+def responder():
+    loop = asyncio.new_event_loop()
+    transport, _, port = loop.run_until_complete(start_mock_responder(
+        dictionary=DICTIONARY, users=[('alice', 'alice123')]))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield port
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    transport.close()
+    loop.close()
+
+
+def test_test_suite_sends_template_packets(responder, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    from test_radius import RadiusTestSuite
+
+    suite = RadiusTestSuite(port=responder, timeout=1)
+    assert suite.send_access_request('alice', 'alice123') == pyrad.packet.AccessAccept
+    assert suite.test_successful_auth('alice', 'alice123')
+    assert suite.test_failed_auth('alice', 'wrong')
+    assert suite.test_nonexistent_user('hacker')
+    assert suite.test_empty_credentials()
@@ -0,0 +1,89 @@
+"""seek_time: the binary search lands on the first line of the window."""
+
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from generators import END
+from log_archive import SEEK_SLACK, seek_time
+from radius_log_monitor import RadiusLogMonitor
+
+COLUMNS = ['timestamp', 'username', 'status', 'auth_result', 'request_type']
+
+
+def line(seconds, user='alice', stamp=None):
+    stamp = stamp or (END + timedelta(seconds=seconds)).ctime()
+    return f"{stamp} : Auth: (0) Login OK: [{user}] (from client nas01 port 0)\n"
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'radius.log'
+    path.write_text(text)
+    return str(path)
+
+
+def offset_of(lines, seconds):
+    """Offset just past the last (seconds, text) line logged before END + seconds.
+
+    Untimestamped lines are skipped over by the search, so it stops at the
+    first of those before the window too.
+    """
+    offset = position = 0
+    for logged, text in lines:
+        if logged is not None:
+            if logged >= seconds:
+                return offset
+            offset = position + len(text)
+        position += len(text)
+    return offset
+
+
+def test_empty_file(tmp_path):
+    assert seek_time(write(tmp_path, ''), END) == 0
+
+
+def test_cutoff_before_the_first_line(tmp_path):
+    assert seek_time(write(tmp_path, line(0) + line(100)), END - timedelta(days=1)) == 0
+
+
+def test_cutoff_after_the_last_line(tmp_path):
+    text = line(0) + line(100)
+    assert seek_time(write(tmp_path, text), END + timedelta(days=1)) == len(text)
+    # Also without a final newline
+    assert seek_time(write(tmp_path, text[:-1]), END + timedelta(days=1)) == len(text) - 1
+
+
+@pytest.mark.parametrize('since', [0, 1, 150, 299, 300, 450])
+def test_lands_on_the_first_line_of_the_window(tmp_path, since):
+    lines = [(seconds, line(seconds)) for seconds in range(0, 600, 3)]
+    path = write(tmp_path, ''.join(text for _, text in lines))
+    assert seek_time(path, END + timedelta(seconds=since) + SEEK_SLACK) == offset_of(lines, since)
+
+
+def test_untimestamped_and_corrupted_lines(tmp_path):
+    lines = []
+    for seconds in range(0, 600, 3):
+        lines.append((seconds, line(seconds)))
+        if seconds % 9 == 0:
+            lines.append((None, "  continuation of a multi-line message\n"))
+        if seconds % 15 == 0:
+            lines.append((None, line(seconds, stamp='Xyz Jun 99 99:99:99 2025')))
+    path = write(tmp_path, ''.join(text for _, text in lines))
+    for since in (0, 100, 300, 597):
+        assert seek_time(path, END + timedelta(seconds=since) + SEEK_SLACK) == offset_of(lines, since)
+
+
+@pytest.fixture(scope='module')
+def per_line(auth_log):
+    df = RadiusLogMonitor(auth_log).read_logs(since_hours=None, compact=False, vectorized=False)
+    return df[COLUMNS].astype(object).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_seeking_to_since_matches_filtering(auth_log, per_line, vectorized):
+    since = per_line['timestamp'].iloc[len(per_line) // 3]
+    expected = per_line[per_line['timestamp'] >= since].reset_index(drop=True)
+    for seek in (True, False):
+        df = RadiusLogMonitor(auth_log).read_logs(since=since, seek=seek, vectorized=vectorized, compact=False)
+        pd.testing.assert_frame_equal(df[COLUMNS].astype(object).reset_index(drop=True), expected)
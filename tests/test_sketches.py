@@ -0,0 +1,83 @@
+"""Sketch accuracy against exact counts."""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import HyperLogLog, SlidingCountMin, SpaceSaving, hash_values
+
+
+def names(count, start=0):
+    return [f"user{i:06d}" for i in range(start, start + count)]
+
+
+def test_categorical_hashes_equal_plain_hashes():
+    values = ['a', 'b', 'a', 'c']
+    plain = hash_values(values)
+    assert (hash_values(pd.Categorical(values)) == plain).all()
+    assert (hash_values(pd.Series(values, dtype='category')) == plain).all()
+
+
+@pytest.mark.parametrize('distinct', [10, 1000, 200000])
+def test_hyperloglog_count(distinct):
+    hll = HyperLogLog()
+    values = names(distinct)
+    hll.add(values)
+    hll.add(values[::3])
+    assert abs(hll.count() - distinct) <= max(1, 0.05 * distinct)
+
+
+def test_hyperloglog_merge_equals_union():
+    a, b, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    a.add(names(50000))
+    b.add(names(50000, start=25000))
+    union.add(names(75000))
+    a.merge(b)
+    assert (a.registers == union.registers).all()
+    with pytest.raises(ValueError):
+        a.merge(HyperLogLog(10))
+
+
+def test_count_min_never_undercounts():
+    rng = np.random.default_rng(1)
+    keys = np.array(names(5000))[rng.zipf(1.3, 100000) % 5000]
+    sketch = SlidingCountMin(window_seconds=60, width=1 << 10)
+    for batch in np.array_split(keys, 10):
+        sketch.add(hash_values(batch), now=1000)
+    exact = Counter(keys.tolist())
+    distinct = list(exact)
+    estimates = sketch.estimate(hash_values(distinct))
+    truth = np.array([exact[key] for key in distinct])
+    assert (estimates >= truth).all()
+    assert (estimates - truth).max() <= np.e / (1 << 10) * len(keys) * 2
+
+
+def test_count_min_window_expires():
+    sketch = SlidingCountMin(window_seconds=60, slots=6)
+    key = hash_values(['user000001'])
+    sketch.add(key, now=0)
+    sketch.add(np.concatenate([key, key]), now=30)
+    assert sketch.estimate(key).tolist() == [3]
+    sketch.advance(65)
+    assert sketch.estimate(key).tolist() == [2]
+    sketch.advance(95)
+    assert sketch.estimate(key).tolist() == [0]
+    # A late event does not move the window back
+    sketch.add(key, now=10)
+    assert sketch.estimate(key).tolist() == [1]
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rng = np.random.default_rng(2)
+    keys = rng.zipf(1.5, 200000) % 10000
+    sketch = SpaceSaving(k=50)
+    for batch in np.array_split(keys, 20):
+        sketch.update(Counter(batch.tolist()))
+    exact = Counter(keys.tolist())
+    heavy = [key for key, count in exact.items() if count > len(keys) / 50]
+    assert set(heavy) <= set(sketch.counts)
+    for key, count in sketch.counts.items():
+        assert count - sketch.errors[key] <= exact[key] <= count
+    assert [key for key, _ in sketch.top(3)] == [key for key, _ in exact.most_common(3)]
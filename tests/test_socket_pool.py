@@ -0,0 +1,40 @@
+"""SocketPool: extra source ports past 256 in flight, identifier wait in the latency."""
+
+import asyncio
+import os
+
+from radius_load import RadiusLoadGenerator, SocketPool, start_mock_responder
+
+DICTIONARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dictionary')
+
+
+async def exchange_all(requests, max_sockets, delay=0.1):
+    transport, _, port = await start_mock_responder(dictionary=DICTIONARY, delay=delay)
+    generator = RadiusLoadGenerator(port=port, dictionary=DICTIONARY)
+    pool = SocketPool('127.0.0.1', port, b'testing123', max_sockets)
+    try:
+        results = await asyncio.gather(*(
+            pool.exchange(lambda ident: generator.build_request(ident, 'admin', '1234'), 5)
+            for _ in range(requests)
+        ))
+    finally:
+        pool.close()
+        transport.close()
+    return pool, results
+
+
+def test_opens_a_socket_per_256_in_flight():
+    pool, results = asyncio.run(exchange_all(600, max_sockets=64))
+    assert len(pool.sockets) == 3
+    assert {outcome for outcome, _ in results} == {'Accept'}
+    assert pool.id_wait.percentile(100) < 0.05
+
+
+def test_identifier_wait_counts_in_latency():
+    pool, results = asyncio.run(exchange_all(600, max_sockets=1))
+    assert len(pool.sockets) == 1
+    assert {outcome for outcome, _ in results} == {'Accept'}
+    # Requests past the first 256 wait about a service time (0.1 s) for an identifier
+    waited = pool.id_wait.percentile(100)
+    assert waited >= 0.08
+    assert max(seconds for _, seconds in results) >= waited + 0.09
@@ -0,0 +1,90 @@
+"""StreamingAggregator: rolling counters equal a recount of the window."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from radius_log_monitor import RadiusLogMonitor
+from stream_aggregator import StreamingAggregator
+
+
+@pytest.fixture(scope='module')
+def events(auth_log):
+    return RadiusLogMonitor(auth_log).read_logs(since_hours=None)
+
+
+def window_of(df, minutes):
+    cutoff = (df['timestamp'].max() - timedelta(minutes=minutes)).floor('min')
+    return df[df['timestamp'] >= cutoff]
+
+
+def counts(series):
+    return series.astype(str).value_counts().to_dict()
+
+
+@pytest.mark.parametrize('batches', [1, 7, 100])
+def test_window_totals_equal_a_recount(events, batches):
+    aggregator = StreamingAggregator(window_minutes=90)
+    for batch in np.array_split(np.arange(len(events)), batches):
+        aggregator.update(events.iloc[batch])
+    window = window_of(events, 90)
+    assert aggregator.success == int(window['success'].sum())
+    assert aggregator.failed == int((~window['success']).sum())
+    assert dict(aggregator.attempts) == counts(window['username'])
+    assert dict(aggregator.failures) == counts(window.loc[~window['success'], 'username'])
+    assert aggregator.time_range() == (window['timestamp'].min(), window['timestamp'].max())
+    distinct = window['username'].nunique()
+    assert abs(aggregator.unique_users() - distinct) <= max(2, 0.05 * distinct)
+
+
+def test_minute_and_hour_counts(events):
+    aggregator = StreamingAggregator(window_minutes=30, history_hours=6)
+    # In arrival order, as live mode feeds it: hours outside the window stay counted
+    for batch in np.array_split(np.arange(len(events)), 200):
+        aggregator.update(events.iloc[batch])
+    window = window_of(events, 30)
+    minutes = window.groupby(window['timestamp'].dt.floor('min'))['success'].agg(['sum', 'count'])
+    minute_counts = aggregator.minute_counts()
+    assert minute_counts['success'].tolist() == minutes['sum'].tolist()
+    assert (minute_counts['success'] + minute_counts['failed']).tolist() == minutes['count'].tolist()
+    hours = aggregator.hourly_counts()
+    assert hours.index.min() >= (events['timestamp'].max() - timedelta(hours=6)).floor('h')
+    expected = events['timestamp'].dt.floor('h').value_counts()
+    assert hours.tolist() == expected[hours.index].tolist()
+    assert len(hours) == 7
+
+
+def test_late_events_and_expiry(events):
+    aggregator = StreamingAggregator(window_minutes=10)
+    newest = events[events['timestamp'] >= events['timestamp'].max() - timedelta(minutes=5)]
+    aggregator.update(newest)
+    aggregator.update(events.iloc[:100])
+    assert aggregator.late_events == 100
+    assert aggregator.total == len(newest)
+    aggregator.expire(events['timestamp'].max() + timedelta(hours=1))
+    assert aggregator.total == 0 and not aggregator.attempts and aggregator.unique_users() == 0
+
+
+def test_read_new_logs(tmp_path):
+    log = tmp_path / 'radius.log'
+    now = datetime.now().replace(microsecond=0)
+
+    def append(minutes_ago, user, ok=True):
+        status = 'Login OK' if ok else 'Login incorrect'
+        stamp = (now - timedelta(minutes=minutes_ago)).ctime()
+        with open(log, 'a') as f:
+            f.write(f"{stamp} : Auth: (0) {status}: [{user}] (from client nas01 port 0)\n")
+
+    append(90, 'old')
+    append(5, 'alice')
+    monitor = RadiusLogMonitor(str(log))
+    window = monitor.read_new_logs(since_hours=1)
+    assert dict(window.attempts) == {'alice': 1}
+    append(1, 'alice', ok=False)
+    append(0, 'bob')
+    assert monitor.read_new_logs(since_hours=1) is window
+    assert dict(window.attempts) == {'alice': 2, 'bob': 1}
+    assert dict(window.failures) == {'alice': 1}
+    assert isinstance(window.top_users(), pd.Series)
@@ -0,0 +1,126 @@
+"""users file parsing and rlm_files matching semantics."""
+
+import pytest
+
+from users_file import UserPolicy, iter_users_file, parse_items
+
+USERS = """\
+# comment line
+alice   Cleartext-Password := "secret", NAS-IP-Address == 10.0.0.1
+        Reply-Message := "Hello, alice",   # trailing comment
+        Fall-Through = Yes
+
+alice   NAS-Port >= 10
+        Session-Timeout := 600
+
+DEFAULT Service-Type == Framed-User
+        Framed-Protocol := PPP,
+        Fall-Through = Yes
+
+bob     Calling-Station-Id =~ "^00:11"
+        Reply-Message := "Hi \\"bob\\""
+
+bob
+
+DEFAULT Auth-Type := Reject
+        Reply-Message := "Denied"
+"""
+
+
+@pytest.fixture
+def policy():
+    return UserPolicy(iter_users_file(USERS.splitlines()))
+
+
+def test_parse(policy):
+    alice = policy.entries[0]
+    assert alice.check == (('Cleartext-Password', ':=', 'secret'), ('NAS-IP-Address', '==', '10.0.0.1'))
+    assert alice.reply == (('Reply-Message', ':=', 'Hello, alice'),)
+    assert alice.fall_through
+    assert policy.entries[3].reply == (('Reply-Message', ':=', 'Hi "bob"'),)
+    assert policy.entries[4].check == () and policy.entries[4].reply == ()
+    assert [entry.name for entry in policy.entries] == ['alice', 'alice', 'DEFAULT', 'bob', 'bob', 'DEFAULT']
+    assert len(policy) == 2
+    assert policy.compare_attributes == ('Calling-Station-Id', 'NAS-IP-Address', 'NAS-Port', 'Service-Type')
+
+
+def test_fall_through_and_default_order(policy):
+    request = {'NAS-IP-Address': '10.0.0.1', 'NAS-Port': '12', 'Service-Type': 'Framed-User'}
+    matched, reply, config = policy.lookup('alice', request)
+    # The first alice entry falls through; the second stops before the DEFAULTs
+    assert matched
+    assert reply == (('Reply-Message', ':=', 'Hello, alice'), ('Session-Timeout', ':=', '600'))
+    assert config == (('Cleartext-Password', ':=', 'secret'),)
+
+    request['NAS-Port'] = '9'
+    matched, reply, config = policy.lookup('alice', request)
+    assert reply == (('Reply-Message', ':=', 'Hello, alice'), ('Framed-Protocol', ':=', 'PPP'),
+                     ('Reply-Message', ':=', 'Denied'))
+    assert config == (('Cleartext-Password', ':=', 'secret'), ('Auth-Type', ':=', 'Reject'))
+
+
+def test_default_entries_before_a_user_entry_apply_first(policy):
+    matched, reply, _ = policy.lookup('bob', {'Service-Type': 'Framed-User', 'Calling-Station-Id': '00:11:22'})
+    assert reply == (('Framed-Protocol', ':=', 'PPP'), ('Reply-Message', ':=', 'Hi "bob"'))
+    # The empty second bob entry matches anything
+    matched, reply, config = policy.lookup('bob', {'Calling-Station-Id': 'aa:bb'})
+    assert matched and reply == () and config == ()
+
+
+def test_unknown_user_gets_defaults(policy):
+    assert policy.lookup('carol', {}) == (True, (('Reply-Message', ':=', 'Denied'),),
+                                         (('Auth-Type', ':=', 'Reject'),))
+
+
+@pytest.mark.parametrize('check, request_, expected', [
+    ('Attr == 5', {'Attr': '5'}, True),
+    ('Attr != 5', {'Attr': '6'}, True),
+    ('Attr > 9', {'Attr': '10'}, True),  # numbers compare as numbers
+    ('Attr < 9', {'Attr': '10'}, False),
+    ('Attr >= 10', {'Attr': '10'}, True),
+    ('Attr <= 9', {'Attr': '10'}, False),
+    ('Attr =~ "^ab+c$"', {'Attr': 'abbc'}, True),
+    ('Attr !~ "^ab+c$"', {'Attr': 'abbc'}, False),
+    ('Attr =* ANY', {'Attr': ''}, True),
+    ('Attr !* ANY', {'Attr': ''}, False),
+    ('Attr !* ANY', {}, True),
+    # A missing attribute never matches a comparison, even a negative one
+    ('Attr != 5', {}, False),
+    ('Attr !~ "x"', {}, False),
+])
+def test_comparison_operators(check, request_, expected):
+    policy = UserPolicy(iter_users_file([f"user {check}"]))
+    assert policy.lookup('user', request_)[0] is expected
+
+
+def test_syntax_errors():
+    with pytest.raises(ValueError, match='reply item outside an entry'):
+        list(iter_users_file(['    Reply-Message := "x"']))
+    with pytest.raises(ValueError, match='reply item outside an entry'):
+        list(iter_users_file(['user', '    Reply-Message := "x"', '    Session-Timeout := 10']))
+    with pytest.raises(ValueError, match='cannot parse'):
+        parse_items('Attr')
+
+
+def test_tab_separated_entries():
+    text = ('alice\tCleartext-Password := "secret"\n'
+            '\tReply-Message := "Hello",\n'
+            '\tFall-Through = Yes\n'
+            'DEFAULT\tAuth-Type := Reject\n'
+            '\tReply-Message := "Denied"\n')
+    policy = UserPolicy(iter_users_file(text.splitlines()))
+    assert [entry.name for entry in policy.entries] == ['alice', 'DEFAULT']
+    assert policy.entries[1].check == (('Auth-Type', ':=', 'Reject'),)
+    assert policy.lookup('alice', {})[2] == (('Cleartext-Password', ':=', 'secret'), ('Auth-Type', ':=', 'Reject'))
+
+
+@pytest.mark.parametrize('line', [
+    'bob \t NAS-Port >= 10,\tService-Type == Framed-User',
+    'bob\t\tNAS-Port\t>=\t10 ,  Service-Type == Framed-User   ',
+    'bob  NAS-Port >= 10, Service-Type == Framed-User\t# comment',
+])
+def test_mixed_whitespace(line):
+    entry, = iter_users_file([line, ' \tSession-Timeout := 60'])
+    assert entry.name == 'bob'
+    assert entry.check == (('NAS-Port', '>=', '10'), ('Service-Type', '==', 'Framed-User'))
+    assert entry.reply == (('Session-Timeout', ':=', '60'),)
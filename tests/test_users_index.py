@@ -0,0 +1,114 @@
+"""Compiled users index: same answers as the parsed file, and stale-index detection."""
+
+import logging
+import os
+
+import pytest
+
+import policy
+from users_file import UserPolicy
+from users_index import CompiledUserPolicy, compile_users_file
+
+USERS = """\
+admin Cleartext-Password := "1234"
+    Reply-Message := "Welcome admin",
+    Service-Type := Administrative-User
+
+user1 Cleartext-Password := "1234", NAS-IP-Address == "10.0.0.1"
+    Reply-Message := "Hello from 10.0.0.1",
+    Fall-Through = Yes
+
+user1 Cleartext-Password := "5678"
+    Reply-Message := "Hello"
+
+DEFAULT Service-Type != Administrative-User
+    Idle-Timeout := 600
+"""
+
+REQUESTS = [
+    ('admin', {}),
+    ('user1', {'NAS-IP-Address': '10.0.0.1'}),
+    ('user1', {'NAS-IP-Address': '10.0.0.2'}),
+    ('user1', {'NAS-IP-Address': '10.0.0.2', 'Service-Type': 'Administrative-User'}),
+    ('nobody', {}),
+]
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / 'authorize'
+    path.write_text(USERS)
+    return str(path)
+
+
+def edit(path, text):
+    """Rewrite path with a modification time that certainly differs."""
+    st = os.stat(path)
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def test_compiled_lookups_match_parsed(users_file, tmp_path):
+    index = str(tmp_path / 'authorize.idx')
+    assert compile_users_file(users_file, index) == 2
+    parsed = UserPolicy.from_file(users_file)
+    compiled = CompiledUserPolicy(index)
+    assert compiled.compare_attributes == parsed.compare_attributes
+    for username, request in REQUESTS:
+        assert compiled.lookup(username, request) == parsed.lookup(username, request)
+
+
+def test_source_changed(users_file, tmp_path):
+    index = str(tmp_path / 'authorize.idx')
+    compile_users_file(users_file, index)
+    compiled = CompiledUserPolicy(index)
+    assert not compiled.source_changed()
+    edit(users_file, USERS + 'user2 Cleartext-Password := "1234"\n')
+    assert compiled.source_changed()
+    os.remove(users_file)
+    assert not compiled.source_changed()
+
+
+def module_for(index):
+    return policy.PolicyModule({'users_index': index, 'reload_interval': 0})
+
+
+def test_policy_recompiles_a_stale_index(users_file, tmp_path):
+    index = str(tmp_path / 'authorize.idx')
+    compile_users_file(users_file, index)
+    module = module_for(index)
+    try:
+        assert module.is_current()
+        assert not module.policy.user_entries('user2')
+        edit(users_file, USERS + 'user2 Cleartext-Password := "1234"\n')
+        assert not module.is_current()
+        reloaded = module.reload_policy()
+        assert reloaded.user_entries('user2')
+        assert not reloaded.source_changed()
+        # Also at startup
+        edit(users_file, USERS + 'user3 Cleartext-Password := "1234"\n')
+        module.close()
+        module = module_for(index)
+        assert module.policy.user_entries('user3')
+    finally:
+        module.close()
+
+
+def test_policy_warns_once_when_recompiling_fails(users_file, tmp_path, caplog):
+    index = str(tmp_path / 'authorize.idx')
+    compile_users_file(users_file, index)
+    module = module_for(index)
+    # The module's own handler goes to radlog; watch the records
+    policy.logger.addHandler(caplog.handler)
+    try:
+        edit(users_file, '    Reply-Message := "outside any entry"\n')
+        with caplog.at_level(logging.WARNING, logger=policy.logger.name):
+            assert not module.is_current()
+            assert module.reload_policy() is module.policy
+            # Not retried, nor warned about again, until the users file changes
+            assert module.is_current()
+        assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    finally:
+        policy.logger.removeHandler(caplog.handler)
+        module.close()